@@ -1,4 +1,11 @@
 import streamlit as st
+from shared.logging_setup import setup_logging
+from shared.metrics import start_metrics_server
+from shared.model_warmup import start_model_warmup
+
+setup_logging()
+start_metrics_server()
+start_model_warmup()
 
 st.set_page_config(
     page_title="Hello",
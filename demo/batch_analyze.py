@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Analyze a folder of event photos offline
+
+Runs the engagement analysis of 4_Analyze_Engagement (or the mood analysis
+of 3_Analyze_Mood with --mode mood) over a directory or glob of images and
+writes one report per photo pair in the analysis_report_*.md format the
+page stores in events/<event>/. Nothing is uploaded.
+
+Photos are paired like the page pairs its two captures: image1_<ts> with
+image2_<ts>, any other files two by two in name order. A worker pool
+keeps several pairs in flight; the shared Ollama scheduler still limits
+how many requests reach each model (--ollama-concurrency), and every
+request is queued at batch priority.
+
+Finished pairs are appended to a checkpoint file, so an interrupted run
+picks up where it stopped when started again with the same arguments.
+Photos that changed since are analyzed again; existing reports are never
+overwritten unless --overwrite is given.
+
+  cd demo
+  python batch_analyze.py ../events/apidays-paris-2025 --overwrite
+  python batch_analyze.py '/data/kubecon/**/*.jpg' --event kubecon-2026 --output ../events/kubecon-2026 --workers 8
+  python batch_analyze.py /data/booth --mode mood --ollama-concurrency 1
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger("batch_analyze")
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+# Captures stored by the engagement page: image1_<timestamp>.jpg / image2_<timestamp>.jpg
+PAGE_CAPTURE = re.compile(r"image([12])_(.+)")
+
+
+def find_images(source):
+    """Image files in a directory (not recursive) or matching a glob, sorted by name"""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(p for p in paths if os.path.isfile(p) and p.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def capture_time(path):
+    """When the photo was taken: the stamp in a page capture's name, else the file's mtime"""
+    match = PAGE_CAPTURE.fullmatch(_stem(path))
+    if match:
+        try:
+            return datetime.strptime(match.group(2), "%Y%m%d_%H%M%S")
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def capture_stamp(path):
+    """capture_time as the page formats report timestamps"""
+    return capture_time(path).strftime("%Y%m%d_%H%M%S")
+
+
+def plan_jobs(images, mode):
+    """[(report file name, [image paths])] for the photos; an unpaired photo is left out"""
+    if mode == "mood":
+        return [(f"mood_report_{capture_stamp(path)}_{_stem(path)}.md", [path]) for path in images], []
+
+    captures, others = {}, []
+    for path in images:
+        match = PAGE_CAPTURE.fullmatch(_stem(path))
+        if match:
+            captures.setdefault((os.path.dirname(path), match.group(2)), {})[match.group(1)] = path
+        else:
+            others.append(path)
+    jobs = []
+    for (_, stamp), pair in sorted(captures.items()):
+        if len(pair) == 2:
+            jobs.append((f"analysis_report_{stamp}.md", [pair["1"], pair["2"]]))
+        else:
+            others.extend(pair.values())
+    others.sort()
+    for first, second in zip(others[0::2], others[1::2]):
+        jobs.append((f"analysis_report_{capture_stamp(first)}_{_stem(first)}.md", [first, second]))
+    unpaired = others[-1:] if len(others) % 2 else []
+    return jobs, unpaired
+
+
+def _stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def job_key(mode, images):
+    """Identifies a job and the version of its photos, so edited photos are redone"""
+    parts = [mode]
+    for path in images:
+        stat = os.stat(path)
+        parts.append(f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}")
+    return "|".join(parts)
+
+
+class Checkpoint:
+    """Append-only JSON lines of finished jobs; a rerun skips what is recorded as done"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash
+                        continue
+                    if entry.get("status") == "ok":
+                        self.done.add(entry["key"])
+
+    def record(self, key, report, error=None):
+        entry = {"key": key, "report": report, "status": "error" if error else "ok",
+                 "error": error, "time": datetime.now().isoformat(timespec="seconds")}
+        with self.lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            if not error:
+                self.done.add(key)
+
+
+def write_report(path, text):
+    """Write the report under a temporary name first so a crash never leaves half of one"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    # mkstemp creates the file 0600; reports must be readable like the ones the page writes
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def analyze_pair(client, images, report_path, event):
+    """Engagement analysis of two photos, as the engagement page runs it"""
+    from shared import pipelines
+    from shared.github_storage import build_analysis_report
+
+    image1, image2 = (_read(path) for path in images)
+    first = pipelines.analyze_engagement(client, image1)
+    second = pipelines.analyze_engagement(client, image2)
+    comparison = pipelines.compare_engagement(client, first.text, second.text, [image1, image2])
+    summary = pipelines.summarize_comparison(client, comparison.text)
+    analysis_data = {
+        'response1': first.text,
+        'response2': second.text,
+        'comparison': comparison.text,
+        'summary': summary.text,
+    }
+    names = [os.path.relpath(path, os.path.dirname(report_path)) for path in images]
+    # Date the report when the photos were taken, not when the batch ran
+    return build_analysis_report(analysis_data, None, event, images=names, generated=capture_time(images[0]))
+
+
+def analyze_single(client, images, report_path, event):
+    """Mood analysis of one photo, as the mood page runs it"""
+    from shared import pipelines
+    from shared.github_storage import build_mood_report
+
+    analysis = pipelines.analyze_mood(client, _read(images[0]))
+    summary = pipelines.summarize_mood(client, analysis.text)
+    analysis_data = {'response': analysis.text, 'summary': summary.text}
+    return build_mood_report(analysis_data, os.path.relpath(images[0], os.path.dirname(report_path)), event,
+                             generated=capture_time(images[0]))
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def run_job(worker_id, analyze, report_path, images, event):
+    from shared.tracing import span
+    from shared.ollama_router import router
+    from shared.ollama_scheduler import request_context, PRIORITY_BATCH
+
+    started = time.perf_counter()
+    with request_context(f"batch-{worker_id}", priority=PRIORITY_BATCH):
+        with span("batch.job", report=os.path.basename(report_path), images=len(images)):
+            write_report(report_path, analyze(router, images, report_path, event))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a folder of event photos and write analysis reports")
+    parser.add_argument("source", help="directory of photos (e.g. ../events/<event>) or a quoted glob")
+    parser.add_argument("--mode", choices=["engagement", "mood"], default="engagement",
+                        help="engagement: compare photos two by two; mood: one report per photo")
+    parser.add_argument("--output", help="where the reports go (default: the photos' directory)")
+    parser.add_argument("--event", help="event name in the report title (default: the output directory's name)")
+    parser.add_argument("--workers", type=int, default=4, help="photo pairs analyzed at once")
+    parser.add_argument("--ollama-concurrency", type=int,
+                        help="Ollama requests per model and backend (default: OLLAMA_MAX_CONCURRENCY / the app's default)")
+    parser.add_argument("--checkpoint", help="progress file (default: .batch_checkpoint.jsonl in the output directory)")
+    parser.add_argument("--overwrite", action="store_true", help="replace reports that already exist")
+    parser.add_argument("--limit", type=int, help="stop after this many jobs (for a trial run)")
+    args = parser.parse_args()
+
+    images = find_images(args.source)
+    if not images:
+        print(f"❌ No images found in {args.source}", file=sys.stderr)
+        return 1
+    output = args.output or (args.source if os.path.isdir(args.source) else os.path.dirname(images[0]) or ".")
+    os.makedirs(output, exist_ok=True)
+    event = args.event or os.path.basename(os.path.abspath(output))
+
+    # The shared modules read their configuration at import time. A batch
+    # waits for a slot as long as it takes instead of failing like a visitor would.
+    os.environ.setdefault("OLLAMA_QUEUE_MAX_WAIT", "86400")
+    os.environ.setdefault("OLLAMA_QUEUE_MAX_LENGTH", str(max(32, args.workers * 2)))
+    if args.ollama_concurrency:
+        os.environ["OLLAMA_DEFAULT_CONCURRENCY"] = str(args.ollama_concurrency)
+        os.environ.pop("OLLAMA_MAX_CONCURRENCY", None)
+    from shared.logging_setup import setup_logging
+    setup_logging()
+
+    jobs, unpaired = plan_jobs(images, args.mode)
+    for path in unpaired:
+        logger.warning(f"⚠️ {path} has no second photo to compare with, skipped")
+    checkpoint = Checkpoint(args.checkpoint or os.path.join(output, ".batch_checkpoint.jsonl"))
+    analyze = analyze_single if args.mode == "mood" else analyze_pair
+
+    pending = []
+    skipped = 0
+    for name, job_images in jobs:
+        key = job_key(args.mode, job_images)
+        report_path = os.path.join(output, name)
+        if key in checkpoint.done or (os.path.exists(report_path) and not args.overwrite):
+            skipped += 1
+            continue
+        pending.append((key, report_path, job_images))
+    if args.limit is not None:
+        pending = pending[:args.limit]
+    logger.info(f"📸 {len(images)} photos, {len(jobs)} jobs: {skipped} already done, {len(pending)} to run "
+                f"with {args.workers} workers → {output}")
+
+    started = time.perf_counter()
+    done = failed = 0
+    pool = ThreadPoolExecutor(max_workers=max(1, args.workers), thread_name_prefix="batch")
+    try:
+        futures = {pool.submit(run_job, i % args.workers, analyze, report_path, job_images, event): (key, report_path)
+                   for i, (key, report_path, job_images) in enumerate(pending)}
+        for future in as_completed(futures):
+            key, report_path = futures[future]
+            try:
+                seconds = future.result()
+            except Exception as e:
+                failed += 1
+                checkpoint.record(key, report_path, error=str(e))
+                logger.error(f"❌ {os.path.basename(report_path)} failed: {e}")
+                continue
+            done += 1
+            checkpoint.record(key, report_path)
+            logger.info(f"✅ [{done + failed}/{len(pending)}] {os.path.basename(report_path)} in {seconds:.1f}s")
+    except KeyboardInterrupt:
+        logger.warning("🛑 Interrupted; finishing the jobs in flight. Run again to resume")
+        pool.shutdown(wait=False, cancel_futures=True)
+        return 130
+    pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    rate = f", {done / elapsed * 60:.1f} jobs/min" if done and elapsed else ""
+    logger.info(f"📊 {done} reports written, {failed} failed, {skipped} skipped in {elapsed:.0f}s{rate}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
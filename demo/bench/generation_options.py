@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tokens and time saved by the per-task generation options
+
+Runs every model task of the pages with the options from
+shared/model_config.py and without any, and reports the generated tokens,
+wall time and how many answers num_predict cut off. The stand-in Ollama
+ignores the word limits in the prompts like a rambling model would and
+writes --tokens tokens, with a line break every --line-words words so the
+stop sequences of the one-line tasks end the answer at the first one;
+pass --live to measure the real models.
+
+  cd demo
+  python -m bench.generation_options --tokens 200 --iterations 5
+  python -m bench.generation_options --live --iterations 10 --json options.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from bench.mock_servers import MockStack, add_config_arguments, config_from_args
+from bench.stats import summarize
+from shared.stats import format_table
+
+ANALYSIS = (
+    "The group looks relaxed and curious. Most people are smiling and leaning towards the "
+    "speaker, a few are taking photos of the slides, and the room feels warm and lively."
+)
+
+
+def task_calls(pipelines, image):
+    """One call per task, as the pages make them"""
+    return {
+        "mood_analysis": lambda client: pipelines.analyze_mood(client, image),
+        "mood_summary": lambda client: pipelines.summarize_mood(client, ANALYSIS),
+        "engagement_analysis": lambda client: pipelines.analyze_engagement(client, image),
+        "engagement_compare": lambda client: pipelines.compare_engagement(client, ANALYSIS, ANALYSIS, [image, image]),
+        "engagement_summary": lambda client: pipelines.summarize_comparison(client, ANALYSIS),
+        "chat": lambda client: pipelines.chat_reply(client, [{"role": "user", "content": "What should I see in Paris?"}]),
+    }
+
+
+def measure(call, client, iterations):
+    durations, tokens, truncated = [], [], 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = call(client)
+        durations.append(time.perf_counter() - started)
+        tokens.append(result.stats.get("eval_count") or 0)
+        truncated += result.stats.get("done_reason") == "length"
+    return summarize(durations)["p50_ms"], sum(tokens) / len(tokens), truncated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the tokens saved by the per-task generation options")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--image-kb", type=int, default=64, help="size of the fake camera image")
+    parser.add_argument("--live", action="store_true", help="use the Ollama from the environment instead of a stand-in")
+    parser.add_argument("--json", help="write the results to this file")
+    add_config_arguments(parser)
+    parser.set_defaults(tokens=200, line_words=12)
+    args = parser.parse_args()
+
+    stack = None
+    if not args.live:
+        stack = MockStack(config_from_args(args)).start()
+        os.environ.update(stack.env())
+    # The shared modules read their configuration at import time
+    from shared import pipelines
+    from shared.ollama_router import router
+    from bench.scenarios import make_test_image
+
+    configured = pipelines.generation_options
+    rows = []
+    try:
+        for task, call in task_calls(pipelines, make_test_image(args.image_kb)).items():
+            print(f"⏱️  {task}: {args.iterations} runs with and without options", file=sys.stderr)
+            # One untimed call so model loading is not measured
+            call(router)
+            pipelines.generation_options = lambda task, model=None: {}
+            try:
+                before_ms, before_tokens, _ = measure(call, router, args.iterations)
+            finally:
+                pipelines.generation_options = configured
+            after_ms, after_tokens, truncated = measure(call, router, args.iterations)
+            rows.append({
+                "task": task,
+                "num_predict": configured(task).get("num_predict"),
+                "stop": json.dumps(configured(task).get("stop") or []),
+                "tokens_before": round(before_tokens),
+                "tokens_after": round(after_tokens),
+                "tokens_saved_pct": round(100 * (1 - after_tokens / before_tokens)) if before_tokens else None,
+                "p50_before_ms": before_ms,
+                "p50_after_ms": after_ms,
+                "truncated": f"{truncated}/{args.iterations}",
+            })
+    finally:
+        if stack:
+            stack.stop()
+
+    print(format_table(rows, ["task", "num_predict", "stop", "tokens_before", "tokens_after", "tokens_saved_pct",
+                              "p50_before_ms", "p50_after_ms", "truncated"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+        print(f"\n📄 Results written to {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for container startup and page reruns
+
+Every measurement runs in a fresh interpreter so module caches do not hide
+the cost:
+
+  - cold import time of the heavy dependencies and the shared modules
+  - first run and reruns of each page through Streamlit's AppTest harness,
+    plus which audio libraries each page ended up loading
+
+  cd demo
+  python -m bench.import_time --repeat 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+from shared.stats import format_table
+
+MODULES = [
+    "streamlit",
+    "ollama",
+    "gtts",
+    "pydub",
+    "speech_recognition",
+    "shared.pipelines",
+    "shared.speech",
+    "shared.ui",
+]
+PAGES = [
+    "Hello.py",
+    "pages/1_Chat_With_Llama.py",
+    "pages/2_Voice_With_Llama.py",
+    "pages/3_Analyze_Mood.py",
+    "pages/4_Analyze_Engagement.py",
+    "pages/5_RAG_Demo.py",
+]
+AUDIO_MODULES = ["gtts", "pydub", "speech_recognition"]
+
+DEMO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import sys, time, json
+started = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - started}}))
+"""
+
+PAGE_SNIPPET = """
+import sys, time, json, logging
+logging.disable(logging.CRITICAL)
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness_seconds = time.perf_counter() - started
+at = AppTest.from_file({page!r}, default_timeout=60)
+started = time.perf_counter()
+at.run()
+first = time.perf_counter() - started
+reruns = []
+for _ in range({reruns}):
+    started = time.perf_counter()
+    at.run()
+    reruns.append(time.perf_counter() - started)
+print(json.dumps({{
+    "first": first,
+    "reruns": reruns,
+    "exceptions": [e.value for e in at.exception],
+    "audio": [m for m in {audio!r} if m in sys.modules],
+}}))
+"""
+
+
+def _run(snippet):
+    env = dict(os.environ, WARMUP_ENABLED="false", METRICS_ENABLED="false", PYTHONPATH=DEMO_DIR)
+    completed = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=DEMO_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def module_rows(repeat):
+    rows = []
+    for module in MODULES:
+        samples = [_run(IMPORT_SNIPPET.format(module=module))["seconds"] for _ in range(repeat)]
+        rows.append({"module": module, "cold_import_ms": round(statistics.median(samples) * 1000, 1)})
+    return rows
+
+
+def page_rows(repeat, reruns):
+    rows = []
+    for page in PAGES:
+        firsts, rerun_samples = [], []
+        result = None
+        for _ in range(repeat):
+            result = _run(PAGE_SNIPPET.format(page=os.path.join(DEMO_DIR, page), reruns=reruns, audio=AUDIO_MODULES))
+            firsts.append(result["first"])
+            rerun_samples.extend(result["reruns"])
+        rows.append({
+            "page": page,
+            "first_run_ms": round(statistics.median(firsts) * 1000, 1),
+            "rerun_ms": round(statistics.median(rerun_samples) * 1000, 1) if rerun_samples else None,
+            "audio_libs_loaded": ",".join(result["audio"]) or "none",
+            "exceptions": len(result["exceptions"]),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import and page rerun times")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh interpreters per measurement")
+    parser.add_argument("--reruns", type=int, default=5, help="reruns per page after the first run")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    modules = module_rows(args.repeat)
+    print(format_table(modules, ["module", "cold_import_ms"]))
+    pages = page_rows(args.repeat, args.reruns)
+    print()
+    print(format_table(pages, ["page", "first_run_ms", "rerun_ms", "audio_libs_loaded", "exceptions"]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"modules": modules, "pages": pages}, f, indent=2)
+        print(f"\n📄 Results written to {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
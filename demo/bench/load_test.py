@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Load test simulating concurrent booth sessions
+
+Each simulated user loops over the page flows (picked from a weighted mix)
+with a think time in between, calling the same shared/ pipeline functions
+as the pages. The number of users follows a ramp profile and the report
+shows, per time interval and per user level, throughput, latency, the time
+model calls spent waiting before Ollama started evaluating (queueing plus
+model load) and the error rate, then names the saturation point.
+
+  cd demo
+  python -m bench.load_test --profile step --users 8 --step-users 2 --step-seconds 15
+  python -m bench.load_test --profile spike --users 10 --duration 60 --parallel 2
+  python -m bench.load_test --profile linear --users 6 --mix chat=1,mood=1 --live
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict
+
+from bench.mock_servers import MockStack, add_config_arguments, config_from_args
+from bench.stats import summarize
+from shared.stats import percentile, format_table
+
+DEFAULT_MIX = "chat=3,voice=2,mood=2,engagement=1,rag=1"
+PROFILES = ["constant", "step", "linear", "spike"]
+
+
+def parse_mix(text):
+    """Parse 'chat=3,mood=1' into {'chat': 3.0, 'mood': 1.0}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def target_users(profile, elapsed, duration, users, step_users=1, step_seconds=10, base_users=1):
+    """Number of users the profile wants active after `elapsed` seconds"""
+    if profile == "constant":
+        return users
+    if profile == "linear":
+        return max(1, min(users, round(users * elapsed / max(duration, 1))))
+    if profile == "step":
+        return min(users, step_users * (1 + int(elapsed // step_seconds)))
+    if profile == "spike":
+        # Baseline, a burst to the peak in the middle third, then baseline again
+        third = duration / 3
+        return users if third <= elapsed < 2 * third else base_users
+    raise ValueError(f"unknown profile {profile}")
+
+
+class LoadRecorder:
+    """Collects flow completions and model-call waits from the whole run"""
+
+    def __init__(self, started):
+        self.started = started
+        self.lock = threading.Lock()
+        self.flows = []
+        self.waits = []
+
+    def record_flow(self, scenario, seconds, error, users):
+        with self.lock:
+            self.flows.append({
+                "t": time.perf_counter() - self.started,
+                "scenario": scenario,
+                "seconds": seconds,
+                "error": error,
+                "users": users,
+            })
+
+    def __call__(self, span):
+        # Span processor: model calls carry the Ollama timings as attributes
+        wait_ms = span.attributes.get("ollama.wait_ms")
+        if wait_ms is None:
+            return
+        with self.lock:
+            self.waits.append({
+                "t": time.perf_counter() - self.started,
+                "model": span.attributes.get("model", "?"),
+                "wait": wait_ms / 1000,
+                "load": span.attributes.get("ollama.load_ms", 0) / 1000,
+                "queue": span.attributes.get("queue_wait_ms", 0) / 1000,
+            })
+
+
+class SimulatedUser(threading.Thread):
+    """One booth visitor running flows until told to leave"""
+
+    def __init__(self, index, ctx, mix, think_time, recorder, active, deadline):
+        super().__init__(name=f"user-{index}", daemon=True)
+        self.ctx = ctx
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.think_time = think_time
+        self.recorder = recorder
+        self.active = active
+        self.deadline = deadline
+        self.leave = threading.Event()
+        self.random = random.Random(index)
+
+    def run(self):
+        from bench.scenarios import run_scenario
+        from shared.ollama_scheduler import request_context
+
+        with request_context(self.name):
+            self._loop(run_scenario)
+
+    def _loop(self, run_scenario):
+        while not self.leave.is_set() and time.perf_counter() < self.deadline:
+            name = self.random.choices(self.names, self.weights)[0]
+            users = self.active()
+            started = time.perf_counter()
+            error = None
+            try:
+                run_scenario(name, self.ctx)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            self.recorder.record_flow(name, time.perf_counter() - started, error, users)
+            if self.think_time:
+                self.leave.wait(self.random.expovariate(1 / self.think_time))
+
+
+def run_load(ctx, args, mix, recorder):
+    """Start and stop users to follow the profile until the duration is over"""
+    users = []
+    lock = threading.Lock()
+    started = recorder.started
+    deadline = started + args.duration
+
+    def active():
+        with lock:
+            return sum(1 for u in users if not u.leave.is_set())
+
+    timeline = []
+    next_sample = 0.0
+    while True:
+        elapsed = time.perf_counter() - started
+        if elapsed >= args.duration:
+            break
+        wanted = target_users(args.profile, elapsed, args.duration, args.users,
+                              args.step_users, args.step_seconds, args.base_users)
+        with lock:
+            running = [u for u in users if not u.leave.is_set()]
+            for _ in range(wanted - len(running)):
+                user = SimulatedUser(len(users), ctx, mix, args.think_time, recorder, active, deadline)
+                users.append(user)
+                user.start()
+            # Users leaving finish the flow they are in, like a visitor walking off
+            for user in running[wanted:]:
+                user.leave.set()
+        if elapsed >= next_sample:
+            timeline.append((elapsed, wanted))
+            next_sample += args.interval
+        time.sleep(0.1)
+
+    for user in users:
+        user.leave.set()
+    for user in users:
+        user.join(timeout=args.drain_timeout)
+    return timeline
+
+
+def interval_rows(recorder, timeline, interval):
+    """Throughput, latency, model wait and errors per reporting interval"""
+    buckets = defaultdict(lambda: {"flows": [], "waits": []})
+    for flow in recorder.flows:
+        buckets[int(flow["t"] // interval)]["flows"].append(flow)
+    for wait in recorder.waits:
+        buckets[int(wait["t"] // interval)]["waits"].append(wait)
+    users_at = {int(t // interval): wanted for t, wanted in timeline}
+
+    rows = []
+    for index in sorted(buckets):
+        flows = buckets[index]["flows"]
+        ok = [f["seconds"] for f in flows if not f["error"]]
+        errors = len(flows) - len(ok)
+        waits = [w["wait"] for w in buckets[index]["waits"]]
+        rows.append({
+            "t_s": int(index * interval),
+            "users": users_at.get(index, "-"),
+            "done": len(ok),
+            "errors": errors,
+            "error_rate": _rate(errors, len(flows)),
+            "rps": round(len(ok) / interval, 2),
+            "p50_ms": _ms(percentile(ok, 50)),
+            "p95_ms": _ms(percentile(ok, 95)),
+            "wait_p95_ms": _ms(percentile(waits, 95)),
+        })
+    return rows
+
+
+def level_rows(recorder, timeline, interval):
+    """The same figures grouped by the number of active users"""
+    seconds_at = defaultdict(float)
+    for _, wanted in timeline:
+        seconds_at[wanted] += interval
+    flows_at = defaultdict(list)
+    for flow in recorder.flows:
+        flows_at[flow["users"]].append(flow)
+
+    rows = []
+    for users in sorted(flows_at):
+        flows = flows_at[users]
+        ok = [f["seconds"] for f in flows if not f["error"]]
+        seconds = seconds_at.get(users) or interval
+        rows.append({
+            "users": users,
+            "done": len(ok),
+            "error_rate": _rate(len(flows) - len(ok), len(flows)),
+            "rps": round(len(ok) / seconds, 2),
+            "p50_ms": _ms(percentile(ok, 50)),
+            "p95_ms": _ms(percentile(ok, 95)),
+        })
+    return rows
+
+
+def saturation_point(levels, slo_p95_ms, max_error_rate, min_gain=0.1):
+    """First user level where latency, errors or throughput stop scaling"""
+    previous = None
+    for row in levels:
+        if row["error_rate"] is not None and row["error_rate"] > max_error_rate:
+            return row["users"], f"error rate {row['error_rate']:.0%} above {max_error_rate:.0%}"
+        if slo_p95_ms and row["p95_ms"] is not None and row["p95_ms"] > slo_p95_ms:
+            return row["users"], f"p95 {row['p95_ms']} ms above the {slo_p95_ms} ms target"
+        if previous and previous["rps"] and row["users"] > previous["users"]:
+            gain = row["rps"] / previous["rps"] - 1
+            if gain < min_gain:
+                return previous["users"], (
+                    f"throughput flat ({previous['rps']} -> {row['rps']} flows/s) "
+                    f"going from {previous['users']} to {row['users']} users"
+                )
+        previous = row
+    return None, "not reached"
+
+
+def _rate(errors, total):
+    return round(errors / total, 3) if total else None
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent booth sessions against the demo pipelines")
+    parser.add_argument("--profile", choices=PROFILES, default="step")
+    parser.add_argument("--users", type=int, default=8, help="peak number of simulated users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument("--step-users", type=int, default=1, help="users added per step (step profile)")
+    parser.add_argument("--step-seconds", type=float, default=10, help="seconds per step (step profile)")
+    parser.add_argument("--base-users", type=int, default=1, help="users before and after the spike")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weighted flows, e.g. chat=3,mood=1")
+    parser.add_argument("--think-time", type=float, default=2.0, help="mean seconds between a user's flows")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds per report row")
+    parser.add_argument("--drain-timeout", type=float, default=60, help="seconds to wait for running flows at the end")
+    parser.add_argument("--slo-p95-ms", type=float, default=None, help="p95 flow latency counted as saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.05)
+    parser.add_argument("--image-kb", type=int, default=64, help="size of the fake camera images")
+    parser.add_argument("--live", action="store_true", help="use the endpoints from the environment instead of stand-ins")
+    parser.add_argument("--json", help="write the results to this file")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    stack = None
+    if not args.live:
+        stack = MockStack(config_from_args(args)).start()
+        os.environ.update(stack.env())
+    # The shared modules read their configuration at import time
+    from shared.tracing import tracer
+    from bench.scenarios import ScenarioContext, SCENARIOS
+
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown flows in --mix: {', '.join(sorted(unknown))}")
+
+    ctx = ScenarioContext(os.getenv("RAG_SERVICE_URL", "http://rag:80"), image_kb=args.image_kb)
+    recorder = LoadRecorder(time.perf_counter())
+    tracer.add_processor(recorder)
+
+    print(f"🚦 {args.profile} profile up to {args.users} users for {args.duration:.0f}s", file=sys.stderr)
+    try:
+        timeline = run_load(ctx, args, mix, recorder)
+    finally:
+        if stack:
+            stack.stop()
+
+    intervals = interval_rows(recorder, timeline, args.interval)
+    levels = level_rows(recorder, timeline, args.interval)
+    scenarios = []
+    for name in mix:
+        flows = [f for f in recorder.flows if f["scenario"] == name]
+        ok = [f["seconds"] for f in flows if not f["error"]]
+        scenarios.append({"scenario": name, **summarize(ok, len(flows) - len(ok), args.duration)})
+    waits = []
+    for model in sorted({w["model"] for w in recorder.waits}):
+        model_waits = [w for w in recorder.waits if w["model"] == model]
+        waits.append({
+            "model": model,
+            "calls": len(model_waits),
+            "wait_p50_ms": _ms(percentile([w["wait"] for w in model_waits], 50)),
+            "wait_p95_ms": _ms(percentile([w["wait"] for w in model_waits], 95)),
+            "scheduler_p95_ms": _ms(percentile([w["queue"] for w in model_waits], 95)),
+            "load_total_s": round(sum(w["load"] for w in model_waits), 2),
+        })
+    saturated_at, reason = saturation_point(levels, args.slo_p95_ms, args.max_error_rate)
+    errors = sorted({f["error"] for f in recorder.flows if f["error"]})
+
+    print(format_table(intervals, ["t_s", "users", "done", "errors", "error_rate", "rps", "p50_ms", "p95_ms", "wait_p95_ms"]))
+    print("\nby active users")
+    print(format_table(levels, ["users", "done", "error_rate", "rps", "p50_ms", "p95_ms"]))
+    print("\nby flow")
+    print(format_table(scenarios, ["scenario", "count", "errors", "p50_ms", "p95_ms", "p99_ms", "throughput_rps"]))
+    print("\nmodel queueing (time in the app's scheduler, then wall time at Ollama before evaluation started)")
+    print(format_table(waits, ["model", "calls", "scheduler_p95_ms", "wait_p50_ms", "wait_p95_ms", "load_total_s"]))
+    if saturated_at is None:
+        print(f"\n📈 No saturation up to {max((r['users'] for r in levels), default=0)} users")
+    else:
+        print(f"\n🧱 Saturated at {saturated_at} users: {reason}")
+    for error in errors[:5]:
+        print(f"  ❌ {error}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "args": vars(args),
+                "intervals": intervals,
+                "levels": levels,
+                "scenarios": scenarios,
+                "model_waits": waits,
+                "saturation": {"users": saturated_at, "reason": reason},
+                "errors": errors,
+            }, f, indent=2)
+        print(f"\n📄 Results written to {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
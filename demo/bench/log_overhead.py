@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+CPU cost of logging around an MCP image upload
+
+Each iteration sends one create_or_update_file call carrying a base64 JPEG
+through shared.mcp_client.call_tool against an in-process fake HTTP client,
+so only the client-side work is measured. Compared modes:
+
+  before        the INFO logging the MCP paths used to do: indented JSON of
+                the request and response, headers, repr() of the SSE body
+                and a base64 preview, on top of today's call
+  info          today's code at INFO (bodies skipped, status line sampled)
+  debug         today's code at DEBUG (bodies logged, truncated)
+  json-info     today's code at INFO with the JSON formatter
+
+Log lines go to a counting sink, not the terminal.
+
+  cd demo
+  python -m bench.log_overhead --image-kb 64 256 --iterations 200
+"""
+import io
+import os
+import sys
+import json
+import time
+import base64
+import logging
+import argparse
+import statistics
+
+from shared.stats import format_table
+from shared import logging_setup
+from shared.mcp_client import call_tool
+from shared.logging_setup import JsonFormatter, SamplingFilter, TEXT_FORMAT
+
+SERVER_URL = "http://mcp.invalid/mcp"
+
+
+class _Sink(io.TextIOBase):
+    """Counts the characters written instead of keeping them"""
+
+    def __init__(self):
+        self.chars = 0
+
+    def write(self, text):
+        self.chars += len(text)
+        return len(text)
+
+
+class _FakeResponse:
+    status_code = 200
+
+    def __init__(self, request_id):
+        body = {"jsonrpc": "2.0", "id": request_id, "result": {"content": [{"type": "text", "text": "ok"}]}}
+        self.text = f"event: message\ndata: {json.dumps(body)}\n\n"
+        self.headers = {"content-type": "text/event-stream", "mcp-session-id": "bench-session"}
+
+
+class _FakeHTTP:
+    """Stands in for requests: answers every tools/call with an SSE success"""
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        return _FakeResponse(json["id"])
+
+
+def _legacy_logging(logger, arguments, response, image_content):
+    """The per-call INFO logging removed from the MCP paths"""
+    mcp_request = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+                   "params": {"name": "create_or_update_file", "arguments": arguments}}
+    logger.info(f"🌐 Arguments: {json.dumps(arguments, indent=2)}")
+    logger.info(f"📸 Image1 base64 preview: {image_content[:50]}...")
+    logger.info(f"🌐 Sending request: {json.dumps(mcp_request, indent=2)}")
+    logger.info(f"🌐 Response headers: {dict(response.headers)}")
+    logger.info(f"🌐 Extracted JSON from SSE: {repr(response.text)}")
+    logger.info(f"🌐 Parsed SSE data: {json.dumps(json.loads(response.text.split('data: ', 1)[1]), indent=2)}")
+
+
+def _configure(level, formatter):
+    sink = _Sink()
+    handler = logging.StreamHandler(sink)
+    handler.setFormatter(formatter)
+    handler.addFilter(SamplingFilter())
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    logging_setup._configured = True
+    return sink
+
+
+def measure(mode, image_kb, iterations):
+    level = logging.DEBUG if mode == "debug" else logging.INFO
+    formatter = JsonFormatter() if mode == "json-info" else logging.Formatter(TEXT_FORMAT)
+    sink = _configure(level, formatter)
+    logger = logging.getLogger("bench.log_overhead")
+    http = _FakeHTTP()
+
+    image_content = base64.b64encode(os.urandom(image_kb * 1024)).decode("utf-8")
+    arguments = {"owner": "linsun", "repo": "gen-ai-demo", "path": "events/bench/image1.jpg",
+                 "content": image_content, "message": "bench", "branch": "bench"}
+
+    samples = []
+    for _ in range(iterations):
+        started = time.process_time()
+        if mode == "before":
+            _legacy_logging(logger, arguments, _FakeResponse(1), image_content)
+        call_tool(SERVER_URL, "create_or_update_file", arguments, "bench-session", http=http)
+        samples.append(time.process_time() - started)
+    return {
+        "mode": mode,
+        "image_kb": image_kb,
+        "cpu_us_per_call": round(statistics.mean(samples) * 1e6, 1),
+        "log_kb_per_call": round(sink.chars / iterations / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure logging CPU per MCP image upload")
+    parser.add_argument("--image-kb", type=int, nargs="+", default=[64, 256, 1024], help="image sizes to upload")
+    parser.add_argument("--iterations", type=int, default=200, help="calls per mode and size")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    rows = []
+    for image_kb in args.image_kb:
+        baseline = None
+        for mode in ("before", "info", "debug", "json-info"):
+            row = measure(mode, image_kb, args.iterations)
+            if baseline is None:
+                baseline = row["cpu_us_per_call"]
+            row["saved_vs_before"] = f"{100 * (1 - row['cpu_us_per_call'] / baseline):.0f}%"
+            rows.append(row)
+
+    print(format_table(rows, ["image_kb", "mode", "cpu_us_per_call", "saved_vs_before", "log_kb_per_call"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n📄 Results written to {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,686 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for Ollama, the MCP servers, the GitHub REST API, the RAG
+service and the Redis state store
+
+Only the parts of each API the demo uses are implemented, with configurable
+latencies so the page pipelines can be benchmarked on a laptop.
+
+Run them on their own and point the Streamlit app at them:
+
+  python -m bench.mock_servers --token-latency 0.02
+"""
+import re
+import json
+import time
+import uuid
+import base64
+import hashlib
+import argparse
+import threading
+import socketserver
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from shared.config import parse_pairs
+
+FAKE_WORDS = (
+    "the audience looks engaged and curious while the speaker walks through "
+    "a live demo of agents calling tools behind the gateway everyone smiles"
+).split()
+
+
+class MockConfig:
+    """Latency knobs shared by every stand-in server (seconds)"""
+
+    def __init__(self, token_latency=0.01, prompt_latency=0.05, load_latency=0.5,
+                 tokens=40, parallel=1, keep_alive=300, mcp_latency=0.05,
+                 github_latency=0.05, rag_latency=0.1, ollama_backends=1, model_token_latency=None, line_words=0):
+        self.token_latency = token_latency
+        # Per-model overrides, e.g. {"llava": 0.03} for a slower vision model
+        self.model_token_latency = model_token_latency or {}
+        self.prompt_latency = prompt_latency
+        self.load_latency = load_latency
+        self.tokens = tokens
+        self.parallel = parallel
+        self.keep_alive = keep_alive
+        self.mcp_latency = mcp_latency
+        self.github_latency = github_latency
+        self.rag_latency = rag_latency
+        self.ollama_backends = ollama_backends
+        # A line break after every n words (0: one long line), so stop sequences have something to stop at
+        self.line_words = line_words
+
+    def token_latency_for(self, model):
+        return self.model_token_latency.get(model.split(":")[0], self.token_latency)
+
+
+class Traffic:
+    """Requests and request-body bytes received per stand-in server"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, server, nbytes):
+        with self.lock:
+            requests, received = self.counts.get(server, (0, 0))
+            self.counts[server] = (requests + 1, received + nbytes)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+    def rows(self, since=None):
+        """Per-server totals, minus an earlier snapshot if given"""
+        since = since or {}
+        rows = []
+        for server, (requests, received) in sorted(self.snapshot().items()):
+            before_requests, before_received = since.get(server, (0, 0))
+            if requests > before_requests:
+                rows.append({
+                    "server": server,
+                    "requests": requests - before_requests,
+                    "received_kb": round((received - before_received) / 1024, 1),
+                })
+        return rows
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Shared request helpers; quiet by default"""
+
+    config = None
+    traffic = None
+    server_label = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.count_request(len(body))
+        return json.loads(body) if body else {}
+
+    def count_request(self, nbytes=0):
+        if self.traffic is not None:
+            self.traffic.add(self.server_label, nbytes)
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeOllamaHandler(_Handler):
+    """/api/chat (streaming NDJSON or single JSON), /api/generate, /api/tags, /api/ps"""
+
+    slots = None
+    loaded = None
+    loaded_lock = threading.Lock()
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/":
+            body = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif path == "/api/tags":
+            self.send_json(200, {"models": [{"name": "llava:latest"}, {"name": "llama3.2:latest"}]})
+        elif path == "/api/ps":
+            with self.loaded_lock:
+                models = [{"name": name, "expires_at": expires} for name, expires in self.loaded.items()]
+            self.send_json(200, {"models": models})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        request = self.read_json()
+        if path == "/api/chat":
+            self._generate(request, chat=True)
+        elif path == "/api/generate":
+            self._generate(request, chat=False)
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def _load(self, model, keep_alive):
+        """Simulate the model load a cold request pays"""
+        now = time.time()
+        with self.loaded_lock:
+            expires = self.loaded.get(model, 0)
+            cold = expires < now
+        if cold:
+            time.sleep(self.config.load_latency)
+        ttl = _keep_alive_seconds(keep_alive, self.config.keep_alive)
+        with self.loaded_lock:
+            self.loaded[model] = now + ttl
+        return self.config.load_latency if cold else 0.0
+
+    def _generate(self, request, chat):
+        cfg = self.config
+        model = request.get("model", "")
+        stream = request.get("stream", True)
+        options = request.get("options") or {}
+        tokens = cfg.tokens
+        truncated = False
+        if options.get("num_predict") is not None and options["num_predict"] >= 0:
+            truncated = options["num_predict"] < tokens
+            tokens = min(tokens, options["num_predict"])
+        prompt = request.get("prompt")
+        if not chat and not prompt:
+            # An empty generate request only loads the model (used for warmup)
+            tokens = 0
+
+        started = time.time()
+        with self.slots:
+            load_seconds = self._load(model, request.get("keep_alive"))
+            prompt_started = time.time()
+            if tokens:
+                time.sleep(cfg.prompt_latency)
+            prompt_seconds = time.time() - prompt_started
+
+            if stream:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+            eval_started = time.time()
+            words = []
+            stop = options.get("stop") or []
+            for i in range(tokens):
+                time.sleep(cfg.token_latency_for(model))
+                line_end = cfg.line_words and (i + 1) % cfg.line_words == 0
+                word = FAKE_WORDS[i % len(FAKE_WORDS)] + ("\n" if line_end else " ")
+                stopped = any(s in word for s in stop)
+                if stopped:
+                    # Ollama ends the answer at a stop sequence and does not send it
+                    word = word.rstrip()
+                words.append(word)
+                if stream:
+                    self._write_line(_chunk(model, word, chat))
+                if stopped:
+                    tokens, truncated = i + 1, False
+                    break
+            eval_seconds = time.time() - eval_started
+
+        final = _chunk(model, "" if stream else "".join(words), chat)
+        final.update({
+            "done": True,
+            "done_reason": "length" if truncated else "stop" if tokens else "load",
+            "total_duration": int((time.time() - started) * 1e9),
+            "load_duration": int(load_seconds * 1e9),
+            "prompt_eval_count": _prompt_tokens(request),
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+            "eval_count": tokens,
+            "eval_duration": int(eval_seconds * 1e9),
+        })
+        if stream:
+            self._write_line(final)
+        else:
+            self.send_json(200, final)
+
+    def _write_line(self, payload):
+        self.wfile.write(json.dumps(payload).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+def _chunk(model, text, chat):
+    chunk = {
+        "model": model,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "done": False,
+    }
+    if chat:
+        chunk["message"] = {"role": "assistant", "content": text}
+    else:
+        chunk["response"] = text
+    return chunk
+
+
+def _prompt_tokens(request):
+    text = " ".join(m.get("content", "") for m in request.get("messages", [])) or request.get("prompt") or ""
+    images = sum(len(m.get("images") or []) for m in request.get("messages", []))
+    return len(text.split()) + 576 * images
+
+
+def _keep_alive_seconds(keep_alive, default):
+    if keep_alive is None:
+        return default
+    if isinstance(keep_alive, (int, float)):
+        return float("inf") if keep_alive < 0 else keep_alive
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)([smh]?)", str(keep_alive).strip())
+    if not match:
+        return default
+    value = float(match.group(1))
+    if value < 0:
+        return float("inf")
+    return value * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+class GitHubState:
+    """Branches and files shared by the fake GitHub MCP server and REST API"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.branches = {"main"}
+        self.files = {}
+
+    def put(self, branch, path, content):
+        sha = hashlib.sha1(content.encode("utf-8")).hexdigest()
+        with self.lock:
+            self.files[(branch, path)] = {"sha": sha, "content": content}
+        return sha
+
+
+class FakeMCPHandler(_Handler):
+    """Streamable-HTTP MCP server answering with SSE bodies"""
+
+    github = None
+    sessions = None
+    sessions_lock = threading.Lock()
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        request = self.read_json()
+        method = request.get("method")
+        session_id = self.headers.get("mcp-session-id")
+        time.sleep(self.config.mcp_latency)
+
+        if method == "initialize":
+            session_id = uuid.uuid4().hex
+            with self.sessions_lock:
+                self.sessions.add(session_id)
+            result = {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "fake-mcp", "version": "1.0.0"},
+            }
+            self._send_sse(request.get("id"), result, {"mcp-session-id": session_id})
+            return
+
+        with self.sessions_lock:
+            known = session_id in self.sessions
+        if session_id and not known:
+            self.send_json(404, {"error": "unknown session"})
+            return
+
+        if method == "notifications/initialized":
+            self.send_response(202)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif method == "tools/list":
+            tools = [{"name": name} for name in sorted(_TOOLS)]
+            self._send_sse(request.get("id"), {"tools": tools})
+        elif method == "tools/call":
+            params = request.get("params", {})
+            tool = _TOOLS.get(params.get("name"))
+            if tool is None:
+                self._send_sse(request.get("id"), None, error={"code": -32601, "message": "unknown tool"})
+            else:
+                text = tool(self.github, params.get("arguments", {}))
+                self._send_sse(request.get("id"), {"content": [{"type": "text", "text": text}]})
+        else:
+            self._send_sse(request.get("id"), None, error={"code": -32601, "message": "unknown method"})
+
+    def _send_sse(self, request_id, result, headers=None, error=None):
+        message = {"jsonrpc": "2.0", "id": request_id}
+        if error:
+            message["error"] = error
+        else:
+            message["result"] = result
+        body = f"event: message\ndata: {json.dumps(message)}\n\n".encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _list_branches(github, arguments):
+    with github.lock:
+        return "\n".join(f"name: {name}" for name in sorted(github.branches))
+
+
+def _create_branch(github, arguments):
+    with github.lock:
+        github.branches.add(arguments["branch"])
+    return f"Created branch {arguments['branch']}"
+
+
+def _create_or_update_file(github, arguments):
+    sha = github.put(arguments.get("branch", "main"), arguments["path"], arguments["content"])
+    return json.dumps({"content": {"path": arguments["path"], "sha": sha}})
+
+
+def _create_presentation(github, arguments):
+    return f"Created presentation '{arguments.get('title')}'\nID: {uuid.uuid4().hex[:16]}"
+
+
+def _batch_update_presentation(github, arguments):
+    return f"Applied {len(arguments.get('requests', []))} updates"
+
+
+_TOOLS = {
+    "list_branches": _list_branches,
+    "create_branch": _create_branch,
+    "create_or_update_file": _create_or_update_file,
+    "create_file": _create_or_update_file,
+    "create_presentation": _create_presentation,
+    "batch_update_presentation": _batch_update_presentation,
+}
+
+
+class FakeGitHubHandler(_Handler):
+    """GET/PUT /repos/{owner}/{repo}/contents/{path} of the GitHub REST API"""
+
+    github = None
+    path_pattern = re.compile(r"^/repos/[^/]+/[^/]+/contents/(.+)$")
+
+    def do_GET(self):
+        self.count_request()
+        time.sleep(self.config.github_latency)
+        parsed = urlparse(self.path)
+        match = self.path_pattern.match(parsed.path)
+        if not match:
+            self.send_json(404, {"message": "Not Found"})
+            return
+        branch = parse_qs(parsed.query).get("ref", ["main"])[0]
+        with self.github.lock:
+            entry = self.github.files.get((branch, match.group(1)))
+        if entry is None:
+            self.send_json(404, {"message": "Not Found"})
+        else:
+            self.send_json(200, {"path": match.group(1), "sha": entry["sha"], "encoding": "base64"})
+
+    def do_PUT(self):
+        time.sleep(self.config.github_latency)
+        match = self.path_pattern.match(urlparse(self.path).path)
+        if not match:
+            self.send_json(404, {"message": "Not Found"})
+            return
+        request = self.read_json()
+        branch = request.get("branch", "main")
+        path = match.group(1)
+        with self.github.lock:
+            entry = self.github.files.get((branch, path))
+        if entry is not None and request.get("sha") != entry["sha"]:
+            self.send_json(409, {"message": f"{path} does not match {request.get('sha')}"})
+            return
+        if entry is None and request.get("sha"):
+            self.send_json(422, {"message": "sha given for a file that does not exist"})
+            return
+        content = base64.b64decode(request["content"]).decode("latin-1")
+        sha = self.github.put(branch, path, content)
+        self.send_json(201 if entry is None else 200, {"content": {"path": path, "sha": sha}})
+
+
+class FakeRAGHandler(_Handler):
+    """/upload (multipart) and /query of the RAG service"""
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        time.sleep(self.config.rag_latency)
+        if path == "/upload":
+            length = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(length)
+            self.send_json(200, {"message": "Document processed", "bytes": length})
+        elif path == "/query":
+            question = self.read_json().get("question", "")
+            self.send_json(200, {
+                "answer": f"A stand-in answer to: {question}",
+                "sources": [{"content": " ".join(FAKE_WORDS * 4)}],
+            })
+        else:
+            self.send_json(404, {"detail": "not found"})
+
+
+class RedisState:
+    """Keys and expiry times behind the fake Redis"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def get(self, key):
+        with self.lock:
+            value, expires = self.values.get(key, (None, None))
+            if expires is not None and expires < time.monotonic():
+                del self.values[key]
+                return None
+            return value
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Just enough RESP for redis-py: HELLO, PING, GET, SET [EX|PX], DEL, EXPIRE"""
+
+    protocol = b"2"
+
+    def handle(self):
+        while True:
+            command = self._read_command()
+            if command is None:
+                return
+            name, args = command[0].upper(), command[1:]
+            handler = getattr(self, f"_cmd_{name.decode().lower()}", None)
+            if handler is None:
+                self._write(b"-ERR unknown command '" + name + b"'\r\n")
+            else:
+                self._write(handler(*args))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line.startswith(b"*"):
+            return None
+        items = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            items.append(self.rfile.read(length + 2)[:-2])
+        return items
+
+    def _write(self, payload):
+        self.wfile.write(payload)
+        self.wfile.flush()
+
+    def _cmd_ping(self, *args):
+        return b"+PONG\r\n"
+
+    def _cmd_hello(self, *args):
+        # redis-py negotiates RESP3 on connect; only the null reply differs
+        self.protocol = args[0] if args else b"2"
+        return b"%%2\r\n+server\r\n+fake-redis\r\n+proto\r\n:%s\r\n" % self.protocol
+
+    def _cmd_client(self, *args):
+        return b"+OK\r\n"
+
+    def _cmd_select(self, *args):
+        return b"+OK\r\n"
+
+    def _cmd_get(self, key):
+        value = self.redis.get(key)
+        if value is None:
+            return b"_\r\n" if self.protocol == b"3" else b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _cmd_set(self, key, value, *options):
+        expires = None
+        if len(options) >= 2:
+            seconds = float(options[1]) / (1000 if options[0].upper() == b"PX" else 1)
+            expires = time.monotonic() + seconds
+        with self.redis.lock:
+            self.redis.values[key] = (value, expires)
+        return b"+OK\r\n"
+
+    def _cmd_del(self, *keys):
+        with self.redis.lock:
+            removed = sum(self.redis.values.pop(key, None) is not None for key in keys)
+        return b":%d\r\n" % removed
+
+    def _cmd_expire(self, key, seconds):
+        value = self.redis.get(key)
+        if value is None:
+            return b":0\r\n"
+        with self.redis.lock:
+            self.redis.values[key] = (value, time.monotonic() + int(seconds))
+        return b":1\r\n"
+
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 makes bursts of concurrent callers
+    # wait a full SYN retransmit (~1 s), which the real servers do not do
+    request_queue_size = 128
+
+
+class MockStack:
+    """Start every stand-in server on a free localhost port"""
+
+    def __init__(self, config=None, host="127.0.0.1"):
+        self.config = config or MockConfig()
+        self.host = host
+        self.github = GitHubState()
+        self.redis = RedisState()
+        self.traffic = Traffic()
+        self.servers = {}
+
+    def _serve(self, name, handler_base, port=0, **attributes):
+        handler = type(handler_base.__name__, (handler_base,), dict(
+            config=self.config, traffic=self.traffic, server_label=name.split("-")[0], **attributes))
+        server = _Server((self.host, port), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name=f"mock-{name}", daemon=True).start()
+        self.servers[name] = server
+        return f"http://{self.host}:{server.server_address[1]}"
+
+    def start(self, ports=None):
+        ports = ports or {}
+        # Each stand-in Ollama host has its own slots and loaded models
+        self.ollama_urls = [
+            self._serve(
+                f"ollama-{i}" if i else "ollama", FakeOllamaHandler, ports.get("ollama", 0) if i == 0 else 0,
+                slots=threading.BoundedSemaphore(self.config.parallel), loaded={})
+            for i in range(max(1, self.config.ollama_backends))
+        ]
+        self.ollama_url = self.ollama_urls[0]
+        self.mcp_url = self._serve(
+            "mcp", FakeMCPHandler, ports.get("mcp", 0), github=self.github, sessions=set()) + "/mcp"
+        self.github_url = self._serve("github", FakeGitHubHandler, ports.get("github", 0), github=self.github)
+        self.rag_url = self._serve("rag", FakeRAGHandler, ports.get("rag", 0))
+
+        handler = type("FakeRedisHandler", (FakeRedisHandler,), {"redis": self.redis})
+        server = socketserver.ThreadingTCPServer((self.host, ports.get("redis", 0)), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="mock-redis", daemon=True).start()
+        self.servers["redis"] = server
+        self.redis_url = f"redis://{self.host}:{server.server_address[1]}/0"
+        return self
+
+    def stop(self):
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+
+    def env(self):
+        """Environment variables that point the demo at the stand-ins"""
+        backends = "|".join(self.ollama_urls)
+        return {
+            "OLLAMA_BASE_URL": self.ollama_url,
+            "LLAVA_BASE_URL": self.ollama_url,
+            "OLLAMA_BACKENDS": f"llama3.2={backends},llava={backends}",
+            "MCP_SERVER_URL": self.mcp_url,
+            "GITHUB_MCP_SERVER_URL": self.mcp_url,
+            "GITHUB_API_URL": self.github_url,
+            "GITHUB_TOKEN": "fake-token",
+            "RAG_SERVICE_URL": self.rag_url,
+            "STATE_STORE": "redis",
+            "REDIS_URL": self.redis_url,
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_config_arguments(parser):
+    """Expose the MockConfig knobs as command line flags"""
+    defaults = MockConfig()
+    parser.add_argument("--token-latency", type=float, default=defaults.token_latency, help="seconds per generated token")
+    parser.add_argument("--model-token-latency", default="",
+                        help="per-model seconds per token, e.g. 'llava=0.03,llama3.2=0.01'")
+    parser.add_argument("--prompt-latency", type=float, default=defaults.prompt_latency, help="seconds of prompt evaluation")
+    parser.add_argument("--load-latency", type=float, default=defaults.load_latency, help="seconds to load a cold model")
+    parser.add_argument("--tokens", type=int, default=defaults.tokens, help="tokens per reply (capped by num_predict)")
+    parser.add_argument("--line-words", type=int, default=defaults.line_words,
+                        help="break the reply into lines of this many words (0: one line), for stop sequences")
+    parser.add_argument("--parallel", type=int, default=defaults.parallel, help="concurrent generations (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--ollama-backends", type=int, default=defaults.ollama_backends, help="stand-in Ollama hosts behind the router")
+    parser.add_argument("--mcp-latency", type=float, default=defaults.mcp_latency, help="seconds per MCP call")
+    parser.add_argument("--github-latency", type=float, default=defaults.github_latency, help="seconds per GitHub REST call")
+    parser.add_argument("--rag-latency", type=float, default=defaults.rag_latency, help="seconds per RAG call")
+
+
+def config_from_args(args):
+    return MockConfig(
+        token_latency=args.token_latency,
+        prompt_latency=args.prompt_latency,
+        load_latency=args.load_latency,
+        tokens=args.tokens,
+        parallel=args.parallel,
+        mcp_latency=args.mcp_latency,
+        github_latency=args.github_latency,
+        rag_latency=args.rag_latency,
+        ollama_backends=args.ollama_backends,
+        model_token_latency=parse_model_latency(args.model_token_latency),
+        line_words=args.line_words,
+    )
+
+
+def parse_model_latency(text):
+    """Parse 'llava=0.03,llama3.2=0.01' into {'llava': 0.03, 'llama3.2': 0.01}"""
+    return parse_pairs(text, float, "--model-token-latency")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local stand-ins for Ollama, MCP, GitHub, RAG and Redis")
+    add_config_arguments(parser)
+    parser.add_argument("--ollama-port", type=int, default=11434)
+    parser.add_argument("--mcp-port", type=int, default=3000)
+    parser.add_argument("--github-port", type=int, default=3001)
+    parser.add_argument("--rag-port", type=int, default=3002)
+    parser.add_argument("--redis-port", type=int, default=6379)
+    args = parser.parse_args()
+
+    stack = MockStack(config_from_args(args)).start({
+        "ollama": args.ollama_port,
+        "mcp": args.mcp_port,
+        "github": args.github_port,
+        "rag": args.rag_port,
+        "redis": args.redis_port,
+    })
+    print("🧪 Stand-in servers running. Point the demo at them with:")
+    for key, value in stack.env().items():
+        print(f"export {key}=\"{value}\"")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stack.stop()
+
+
+if __name__ == "__main__":
+    main()
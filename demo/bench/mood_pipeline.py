@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Time to voice on the mood page: serial vs pipelined
+
+Runs 3_Analyze_Mood's two modes against the stand-in Ollama, with a
+stand-in for gTTS (see bench/tts_latency.py), and reports when each phase
+ended, counted from the moment the photo was taken:
+
+  serial     llava analysis → summary → TTS; the text appears at the end
+  pipelined  the analysis streams (first text), TTS plays from the first
+             synthesized clip
+
+Both modes write the summary with the summary model (SUMMARY_MODEL).
+
+llava generates more slowly than llama3.2; --model-token-latency sets the
+per-token cost of each.
+
+  cd demo
+  python -m bench.mood_pipeline --iterations 5 --model-token-latency llava=0.03,llama3.2=0.01
+"""
+import os
+import sys
+import json
+import argparse
+
+from bench.mock_servers import MockStack, add_config_arguments, config_from_args
+from bench.stats import summarize
+from shared.stats import format_table
+from bench.tts_latency import _FakeTTS
+
+PHASES = ["first text", "analysis", "summary", "voice"]
+
+
+def run_once(pipelines, speech, client, image, pipelined):
+    clock = pipelines.PhaseClock()
+    if pipelined:
+        analysis = pipelines.analyze_mood(client, image, on_text=lambda piece: clock.mark("first text"))
+    else:
+        analysis = pipelines.analyze_mood(client, image)
+    clock.mark("analysis")
+    # Serial mode only shows the text once the analysis is complete
+    clock.mark("first text")
+    summary = pipelines.summarize_mood(client, analysis.text)
+    clock.mark("summary")
+    for _ in speech.synthesize_stream(summary.text + " This is cool!"):
+        clock.mark("voice")
+        break
+    return clock.marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare time to voice of the serial and pipelined mood page")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--image-kb", type=int, default=64, help="size of the fake camera image")
+    parser.add_argument("--tts-latency", type=float, default=0.25, help="seconds per gTTS request (100 chars)")
+    parser.add_argument("--json", help="write the results to this file")
+    add_config_arguments(parser)
+    parser.set_defaults(model_token_latency="llava=0.03,llama3.2=0.01")
+    args = parser.parse_args()
+
+    stack = MockStack(config_from_args(args)).start()
+    os.environ.update(stack.env())
+    # The shared modules read their configuration at import time
+    from shared import pipelines, speech
+    from shared.ollama_router import router
+    from bench.scenarios import make_test_image
+
+    _FakeTTS.request_latency = args.tts_latency
+    speech._modules["gtts"] = _FakeTTS
+    image = make_test_image(args.image_kb)
+
+    rows = []
+    try:
+        # Load both models first so neither mode pays for it
+        run_once(pipelines, speech, router, image, pipelined=True)
+        run_once(pipelines, speech, router, image, pipelined=False)
+        for mode in ("serial", "pipelined"):
+            print(f"⏱️  {mode}: {args.iterations} runs", file=sys.stderr)
+            runs = [run_once(pipelines, speech, router, image, mode == "pipelined") for _ in range(args.iterations)]
+            row = {"mode": mode}
+            for phase in PHASES:
+                row[f"{phase.replace(' ', '_')}_ms"] = summarize([run[phase] for run in runs])["p50_ms"]
+            rows.append(row)
+    finally:
+        stack.stop()
+
+    print(format_table(rows, ["mode"] + [f"{phase.replace(' ', '_')}_ms" for phase in PHASES]))
+    print("\n(p50 of each phase's end, from the photo; voice = first clip ready to play)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+        print(f"\n📄 Results written to {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Report index at scale: build, incremental refresh and query latency
+
+Writes --reports synthetic analysis reports (in the page's format, spread
+over --events event folders) to a temporary directory, indexes them with
+shared/report_index.py and reports:
+
+  build      the first refresh, parsing every file
+  noop       a refresh when nothing changed (stat only)
+  update     a refresh after --changed files were rewritten
+  queries    p50/p95/p99 of typical searches, with and without an event filter
+
+  cd demo
+  python -m bench.report_search --reports 100000 --events 40
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+from bench.stats import summarize
+from shared.stats import format_table
+from shared.github_storage import build_analysis_report
+from shared.report_index import ReportIndex
+
+WORDS = (
+    "audience attendees crowd room hall stage speaker slides demo laptop phones badge booth queue "
+    "smiling curious focused distracted relaxed excited tired bored lively quiet packed sparse "
+    "engaged engagement attention attentive leaning listening talking clapping laughing note taking "
+    "first second image larger smaller denser front rows back rows standing seated keynote workshop "
+    "panel gateway agents kubernetes istio ambient mesh mcp tools llm inference gpu latency"
+).split()
+
+QUERIES = [
+    ("common word", "engagement", None),
+    ("two words", "speaker focused", None),
+    ("prefix", "attent", None),
+    ("rare word", "gpu latency", None),
+    ("no match", "zeppelin", None),
+    ("event filter", "engaged crowd", 1),
+    ("common, 3 events", "engagement", 3),
+    ("browse event", "", 1),
+]
+
+
+def sentence(rng, words=30):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def write_reports(root, count, events, rng):
+    names = [f"event-{i:03d}" for i in range(events)]
+    for name in names:
+        os.makedirs(os.path.join(root, name), exist_ok=True)
+    started = datetime(2025, 1, 1)
+    for i in range(count):
+        stamp = (started + timedelta(minutes=7 * i)).strftime("%Y%m%d_%H%M%S")
+        write_report(root, names[i % events], stamp, rng)
+    return names
+
+
+def write_report(root, event, stamp, rng):
+    analysis = {
+        "response1": sentence(rng, 45),
+        "response2": sentence(rng, 45),
+        "comparison": sentence(rng, 60),
+        "summary": sentence(rng, 14),
+    }
+    path = os.path.join(root, event, f"analysis_report_{stamp}.md")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(build_analysis_report(analysis, stamp, event))
+    return path
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the report index at scale")
+    parser.add_argument("--reports", type=int, default=100000)
+    parser.add_argument("--events", type=int, default=40)
+    parser.add_argument("--changed", type=int, default=100, help="reports rewritten before the incremental refresh")
+    parser.add_argument("--iterations", type=int, default=50, help="runs of each query")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", help="write the reports and index here and keep them")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    root = args.keep or tempfile.mkdtemp(prefix="report-index-")
+    reports_dir = os.path.join(root, "events")
+    try:
+        print(f"📝 Writing {args.reports} reports over {args.events} events to {reports_dir}", file=sys.stderr)
+        seconds, events = timed(lambda: write_reports(reports_dir, args.reports, args.events, rng))
+        print(f"   {seconds:.1f}s", file=sys.stderr)
+
+        db_path = os.path.join(root, "report_index.db")
+        index = ReportIndex(reports_dir, db_path)
+        refresh_rows = []
+        seconds, (changed, _) = timed(index.refresh)
+        refresh_rows.append({"refresh": "build", "files_indexed": changed, "seconds": round(seconds, 2)})
+        index.optimize()
+        seconds, (changed, _) = timed(index.refresh)
+        refresh_rows.append({"refresh": "noop", "files_indexed": changed, "seconds": round(seconds, 2)})
+        for path in rng.sample(sorted(index.scan()), min(args.changed, args.reports)):
+            event = os.path.basename(os.path.dirname(path))
+            stamp = os.path.basename(path)[len("analysis_report_"):-len(".md")]
+            write_report(reports_dir, event, stamp, rng)
+            # Coarse mtime clocks: make sure the change is visible in size or mtime
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+        seconds, (changed, _) = timed(index.refresh)
+        refresh_rows.append({"refresh": "update", "files_indexed": changed, "seconds": round(seconds, 2)})
+
+        query_rows = []
+        for name, text, event_count in QUERIES:
+            filter_events = events[:event_count] if event_count else None
+            durations, hits = [], 0
+            for _ in range(args.iterations):
+                seconds, results = timed(lambda: index.search(text, filter_events))
+                durations.append(seconds)
+                hits = len(results)
+            summary = summarize(durations)
+            query_rows.append({"query": name, "text": text or "(newest)", "results": hits,
+                               "p50_ms": summary["p50_ms"], "p95_ms": summary["p95_ms"], "p99_ms": summary["p99_ms"]})
+        durations = [timed(lambda: index.matches_by_event("engaged crowd"))[0] for _ in range(args.iterations)]
+        summary = summarize(durations)
+        query_rows.append({"query": "matches per event", "text": "engaged crowd", "results": args.events,
+                           "p50_ms": summary["p50_ms"], "p95_ms": summary["p95_ms"], "p99_ms": summary["p99_ms"]})
+        db_mb = sum(os.path.getsize(db_path + suffix) for suffix in ("", "-wal") if os.path.exists(db_path + suffix)) / 1e6
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print(format_table(refresh_rows, ["refresh", "files_indexed", "seconds"]))
+    print()
+    print(format_table(query_rows, ["query", "text", "results", "p50_ms", "p95_ms", "p99_ms"]))
+    print(f"\n🗂️ {args.reports} reports, index {db_mb:.0f} MB")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "refresh": refresh_rows, "queries": query_rows, "db_mb": db_mb}, f, indent=2)
+        print(f"\n📄 Results written to {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of every page pipeline
+
+Starts the stand-in servers from bench/mock_servers.py (unless --live is
+given), runs each scenario and reports p50/p95/p99 latency, throughput and
+a per-stage breakdown taken from the tracing spans.
+
+  cd demo
+  python -m bench.run_bench --iterations 20 --concurrency 4
+  python -m bench.run_bench --scenario engagement --json before.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.mock_servers import MockStack, add_config_arguments, config_from_args
+from bench.stats import summarize
+from shared.stats import format_table
+
+SCENARIO_NAMES = ["chat", "voice", "mood", "engagement", "rag"]
+
+
+class StageRecorder:
+    """Span processor collecting per-stage durations of benchmark runs"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations = defaultdict(lambda: defaultdict(list))
+
+    def __call__(self, span):
+        scenario = span.root.attributes.get("scenario")
+        if scenario is None or span is span.root:
+            return
+        with self.lock:
+            self.durations[scenario][span.name].append(span.duration_ms / 1000)
+
+    def clear(self, scenario):
+        with self.lock:
+            self.durations.pop(scenario, None)
+
+    def rows(self, scenario):
+        with self.lock:
+            stages = dict(self.durations.get(scenario, {}))
+        rows = []
+        for name, durations in sorted(stages.items(), key=lambda item: -sum(item[1])):
+            rows.append({"stage": name, **summarize(durations)})
+        return rows
+
+
+def run_one(name, ctx, iterations, concurrency, warmup, recorder, traffic=None):
+    from bench.scenarios import run_scenario
+
+    for _ in range(warmup):
+        run_scenario(name, ctx)
+    recorder.clear(name)
+    traffic_before = traffic.snapshot() if traffic else None
+
+    durations = []
+    errors = []
+    lock = threading.Lock()
+
+    def task(_):
+        started = time.perf_counter()
+        try:
+            run_scenario(name, ctx)
+        except Exception as e:
+            with lock:
+                errors.append(f"{type(e).__name__}: {e}")
+            return
+        with lock:
+            durations.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(task, range(iterations)))
+    wall_seconds = time.perf_counter() - started
+
+    traffic_rows = []
+    if traffic:
+        # Upstream requests and request bytes per timed run
+        for row in traffic.rows(traffic_before):
+            traffic_rows.append(dict(
+                row,
+                requests_per_run=round(row["requests"] / iterations, 1),
+                kb_per_run=round(row["received_kb"] / iterations, 1),
+            ))
+    return summarize(durations, len(errors), wall_seconds), errors, traffic_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the demo page pipelines against local stand-ins")
+    parser.add_argument("--scenario", choices=SCENARIO_NAMES + ["all"], default="all")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per scenario")
+    parser.add_argument("--image-kb", type=int, default=64, help="size of the fake camera images")
+    parser.add_argument("--live", action="store_true", help="use the endpoints from the environment instead of stand-ins")
+    parser.add_argument("--json", help="write the results to this file")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    stack = None
+    if not args.live:
+        stack = MockStack(config_from_args(args)).start()
+        os.environ.update(stack.env())
+    # The shared modules read their configuration at import time
+    from shared.tracing import tracer
+    from bench.scenarios import ScenarioContext
+
+    recorder = StageRecorder()
+    tracer.add_processor(recorder)
+    ctx = ScenarioContext(os.getenv("RAG_SERVICE_URL", "http://rag:80"), image_kb=args.image_kb)
+
+    names = SCENARIO_NAMES if args.scenario == "all" else [args.scenario]
+    results = {}
+    try:
+        for name in names:
+            print(f"⏱️  {name}: {args.iterations} runs, concurrency {args.concurrency}", file=sys.stderr)
+            summary, errors, traffic = run_one(
+                name, ctx, args.iterations, args.concurrency, args.warmup, recorder, stack.traffic if stack else None)
+            results[name] = {"summary": summary, "stages": recorder.rows(name), "errors": errors[:5], "traffic": traffic}
+    finally:
+        if stack:
+            stack.stop()
+
+    columns = ["scenario", "count", "errors", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "throughput_rps"]
+    print(format_table([{"scenario": n, **r["summary"]} for n, r in results.items()], columns))
+    for name, result in results.items():
+        print(f"\n{name} stages")
+        print(format_table(result["stages"], ["stage", "count", "p50_ms", "p95_ms", "p99_ms", "mean_ms"]))
+        if result["traffic"]:
+            print(f"\n{name} upstream traffic")
+            print(format_table(result["traffic"], ["server", "requests", "requests_per_run", "kb_per_run"]))
+        for error in result["errors"]:
+            print(f"  ❌ {error}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"\n📄 Results written to {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
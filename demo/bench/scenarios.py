@@ -0,0 +1,102 @@
+"""
+Each page's pipeline as a benchmark scenario
+
+Scenarios call the same shared/ functions the pages use. Import this module
+only after the environment points at the servers under test, because the
+shared modules read their URLs at import time.
+"""
+import os
+import io
+from datetime import datetime
+
+from shared import pipelines
+from shared.ollama_router import router
+from shared.tracing import span
+from shared.github_storage import store_engagement_analysis_to_github
+
+
+def make_test_image(kilobytes=64):
+    """JPEG-shaped bytes of roughly the given size, like a camera capture"""
+    return b"\xff\xd8\xff\xe0" + os.urandom(kilobytes * 1024) + b"\xff\xd9"
+
+
+class ScenarioContext:
+    """RAG URL and fixtures shared by every scenario run"""
+
+    def __init__(self, rag_url, image_kb=64):
+        self.rag_url = rag_url
+        self.image1 = make_test_image(image_kb)
+        self.image2 = make_test_image(image_kb)
+        self.document = b"Istio ambient mode moves the data plane out of the pod. " * 200
+
+    def client(self):
+        # Pages route through the shared router, so do the same here
+        return router
+
+
+def run_chat(ctx):
+    """1_Chat_With_Llama: one chat turn"""
+    messages = [
+        {"role": "assistant", "content": "How can I help you?"},
+        {"role": "user", "content": "What should I see in Paris?"},
+    ]
+    return pipelines.chat_reply(ctx.client(), messages).text
+
+
+def run_voice(ctx):
+    """2_Voice_With_Llama: a chat turn on a longer conversation (speech recognition needs Google and is skipped)"""
+    messages = [{"role": "assistant", "content": "How can I help you?"}]
+    for turn in range(3):
+        messages.append({"role": "user", "content": f"Tell me more about topic {turn}"})
+        messages.append({"role": "assistant", "content": "Here are a few facts about it. " * 5})
+    messages.append({"role": "user", "content": "Summarize what we discussed"})
+    return pipelines.chat_reply(ctx.client(), messages).text
+
+
+def run_mood(ctx):
+    """3_Analyze_Mood: analysis then five-word summary (TTS needs Google and is skipped)"""
+    client = ctx.client()
+    analysis = pipelines.analyze_mood(client, ctx.image1)
+    return pipelines.summarize_mood(client, analysis.text).text
+
+
+def run_engagement(ctx):
+    """4_Analyze_Engagement: two analyses, comparison, summary and GitHub storage"""
+    client = ctx.client()
+    first = pipelines.analyze_engagement(client, ctx.image1)
+    second = pipelines.analyze_engagement(client, ctx.image2)
+    comparison = pipelines.compare_engagement(client, first.text, second.text, [ctx.image1, ctx.image2])
+    summary = pipelines.summarize_comparison(client, comparison.text)
+    analysis_data = {
+        'response1': first.text,
+        'response2': second.text,
+        'comparison': comparison.text,
+        'summary': summary.text,
+        'timestamp': datetime.now().isoformat()
+    }
+    result = store_engagement_analysis_to_github(ctx.image1, ctx.image2, analysis_data)
+    if not result["success"]:
+        raise RuntimeError(f"GitHub storage failed: {result.get('error')}")
+    return summary.text
+
+
+def run_rag(ctx):
+    """5_RAG_Demo: upload a document then ask a question"""
+    response = pipelines.rag_upload(ctx.rag_url, "notes.txt", io.BytesIO(ctx.document), "text/plain")
+    response.raise_for_status()
+    return pipelines.rag_query(ctx.rag_url, "What does ambient mode change?")["answer"]
+
+
+SCENARIOS = {
+    "chat": run_chat,
+    "voice": run_voice,
+    "mood": run_mood,
+    "engagement": run_engagement,
+    "rag": run_rag,
+}
+
+
+def run_scenario(name, ctx):
+    """Run one scenario inside its own trace so stage timings can be collected"""
+    with span(f"bench.{name}", scenario=name):
+        return SCENARIOS[name](ctx)
@@ -0,0 +1,24 @@
+"""
+Latency summaries shared by the benchmark and load-test reports
+"""
+from shared.stats import percentile
+
+
+def summarize(durations, errors=0, wall_seconds=None):
+    """p50/p95/p99/mean in milliseconds plus throughput for one scenario"""
+    count = len(durations)
+    summary = {
+        "count": count,
+        "errors": errors,
+        "p50_ms": _ms(percentile(durations, 50)),
+        "p95_ms": _ms(percentile(durations, 95)),
+        "p99_ms": _ms(percentile(durations, 99)),
+        "mean_ms": _ms(sum(durations) / count if count else None),
+    }
+    if wall_seconds:
+        summary["throughput_rps"] = round(count / wall_seconds, 3)
+    return summary
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
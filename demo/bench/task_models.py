@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Latency and answer length of the text-only tasks per model
+
+The summaries (and optionally the engagement comparison) only read text.
+This runs each of them on the vision model, which used to do them, and on
+the model shared/model_config.py now assigns, and reports wall time,
+generation time (Ollama's eval_duration) and how long the answers are.
+Against the stand-ins only the speed differs (set it with
+--model-token-latency); pass --live to compare the real models' answers
+on a running Ollama.
+
+  cd demo
+  python -m bench.task_models --iterations 5
+  python -m bench.task_models --live --models llama3.2 phi3 --json models.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from bench.mock_servers import MockStack, add_config_arguments, config_from_args
+from bench.stats import summarize
+from shared.stats import format_table
+from shared.model_config import VISION_MODEL, model_for
+
+ANALYSIS = (
+    "The group looks relaxed and curious. Most people are smiling and leaning towards the "
+    "speaker, a few are taking photos of the slides, and the room feels warm and lively."
+)
+SECOND_ANALYSIS = (
+    "Several people are looking at their phones and the front rows are half empty. A couple "
+    "of attendees are chatting, but attention on the stage seems low."
+)
+TASKS = ["mood_summary", "engagement_compare", "engagement_summary"]
+
+
+def run_task(pipelines, client, task, model, images):
+    if task == "mood_summary":
+        return pipelines.summarize_mood(client, ANALYSIS, model=model)
+    if task == "engagement_compare":
+        return pipelines.compare_engagement(client, ANALYSIS, SECOND_ANALYSIS, images, model=model)
+    return pipelines.summarize_comparison(client, f"{ANALYSIS} {SECOND_ANALYSIS}", model=model)
+
+
+def measure(pipelines, client, task, model, images, iterations):
+    durations, evals, chars, tokens = [], [], [], []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = run_task(pipelines, client, task, model, images)
+        durations.append(time.perf_counter() - started)
+        evals.append(result.eval_seconds or 0)
+        chars.append(len(result.text))
+        tokens.append(result.stats.get("eval_count") or 0)
+    summary = summarize(durations)
+    return {
+        "task": task,
+        "model": model,
+        "p50_ms": summary["p50_ms"],
+        "p95_ms": summary["p95_ms"],
+        "eval_p50_ms": summarize(evals)["p50_ms"],
+        "mean_chars": round(sum(chars) / len(chars)),
+        "mean_tokens": round(sum(tokens) / len(tokens)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the text-only tasks on the vision model and the configured model")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--task", choices=TASKS, nargs="+", default=TASKS)
+    parser.add_argument("--models", nargs="+", default=[], help="more models to try on every task")
+    parser.add_argument("--image-kb", type=int, default=64, help="size of the fake camera images")
+    parser.add_argument("--live", action="store_true", help="use the Ollama from the environment instead of a stand-in")
+    parser.add_argument("--json", help="write the results to this file")
+    add_config_arguments(parser)
+    parser.set_defaults(model_token_latency="llava=0.03,llama3.2=0.01")
+    args = parser.parse_args()
+
+    stack = None
+    if not args.live:
+        stack = MockStack(config_from_args(args)).start()
+        os.environ.update(stack.env())
+    # The shared modules read their configuration at import time
+    from shared import pipelines
+    from shared.ollama_router import router
+    from bench.scenarios import make_test_image
+
+    images = [make_test_image(args.image_kb), make_test_image(args.image_kb)]
+    rows = []
+    try:
+        for task in args.task:
+            models = []
+            for model in [VISION_MODEL, model_for(task)] + args.models:
+                if model not in models:
+                    models.append(model)
+            for model in models:
+                print(f"⏱️  {task} on {model}: {args.iterations} runs", file=sys.stderr)
+                # One untimed call so model loading is not measured
+                run_task(pipelines, router, task, model, images)
+                rows.append(measure(pipelines, router, task, model, images, args.iterations))
+    finally:
+        if stack:
+            stack.stop()
+
+    print(format_table(rows, ["task", "model", "p50_ms", "p95_ms", "eval_p50_ms", "mean_chars", "mean_tokens"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+        print(f"\n📄 Results written to {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Time to first audio: whole-text TTS vs sentence-chunked streaming TTS
+
+gTTS sends one request to Google per ~100 characters of text, one after
+the other, so a long reply takes seconds before its single clip exists.
+A stand-in for gTTS replays that cost (--request-latency per 100
+characters, no network) and both paths are timed:
+
+  whole    text_to_speech() on the full text; audio starts when it returns
+  stream   synthesize_stream(); audio starts with the first sentence
+
+  cd demo
+  python -m bench.tts_latency --request-latency 0.25 --workers 1 2 3
+"""
+import sys
+import json
+import time
+import math
+import argparse
+
+from shared.stats import format_table
+from shared import speech
+
+SAMPLES = {
+    "summary": "Happy, relaxed, curious, engaged, bright. This is cool!",
+    "chat reply": (
+        "Tokyo is a great place to visit in spring. The cherry blossoms usually peak in early April, "
+        "and parks like Ueno and Shinjuku Gyoen get busy. For food, try a standing sushi bar near "
+        "Tsukiji outer market in the morning. In the evening, Shibuya and Shinjuku are lively, while "
+        "Yanaka keeps an older, quieter feel. Get a Suica card on arrival; it works on almost every "
+        "train and bus. Most sights are a short ride apart, so three or four days cover the highlights."
+    ),
+}
+
+
+class _FakeTTS:
+    """Stands in for gTTS: one sequential request per 100 characters"""
+
+    request_latency = 0.25
+
+    def __init__(self, text, lang="en", slow=False):
+        self.text = text
+
+    def write_to_fp(self, fp):
+        time.sleep(self.request_latency * math.ceil(len(self.text) / 100))
+        fp.write(b"ID3" + self.text.encode())
+
+
+def measure(name, text, workers):
+    started = time.perf_counter()
+    speech.text_to_speech(text)
+    whole = time.perf_counter() - started
+
+    started = time.perf_counter()
+    first = None
+    clips = 0
+    for _ in speech.synthesize_stream(text, workers=workers):
+        clips += 1
+        if first is None:
+            first = time.perf_counter() - started
+    total = time.perf_counter() - started
+    return {
+        "text": name,
+        "chars": len(text),
+        "workers": workers,
+        "clips": clips,
+        "whole_ms": round(whole * 1000),
+        "stream_first_ms": round(first * 1000),
+        "stream_total_ms": round(total * 1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time to first audio with and without chunked TTS")
+    parser.add_argument("--request-latency", type=float, default=0.25, help="seconds per gTTS request (100 chars)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 3], help="chunks synthesized at once")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    _FakeTTS.request_latency = args.request_latency
+    speech._modules["gtts"] = _FakeTTS
+
+    rows = [measure(name, text, workers) for name, text in SAMPLES.items() for workers in args.workers]
+    print(format_table(rows, ["text", "chars", "workers", "clips", "whole_ms", "stream_first_ms", "stream_total_ms"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"\n📄 Results written to {args.json}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
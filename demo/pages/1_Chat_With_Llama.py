@@ -1,20 +1,22 @@
-import os
+import logging
 import streamlit as st
-from ollama import Client
+from shared.logging_setup import setup_logging, log_payload
+from shared.metrics import start_metrics_server
+from shared.model_warmup import start_model_warmup
+from shared.pipelines import chat_reply
+from shared.ollama_router import router
+from shared.ui import render_debug_panel, ollama_queue, load_chat_history, save_chat_history
 
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+setup_logging()
+logger = logging.getLogger(__name__)
+
+start_metrics_server()
+start_model_warmup()
 
 def process_stream(stream):
   for chunk in stream:
    yield chunk['message']['content']
 
-def collect_stream_text(stream):
-  """Collect all text from the stream for TTS conversion"""
-  full_text = ""
-  for chunk in stream:
-    full_text += chunk['message']['content']
-  return full_text
-
 # Streamlit UI
 st.set_page_config(
     page_title="Chat With Llama 💬",
@@ -34,28 +36,34 @@ st.markdown(styl, unsafe_allow_html=True)
 
 st.title(':grey[Chat with Llama on Anything 💬 ]')
 
-if "messages" not in st.session_state:
-    st.session_state["messages"] = [{"role": "assistant", "content": "How can I help you?"}]
+# History lives in the state store so a reconnect to another replica keeps it
+load_chat_history([{"role": "assistant", "content": "How can I help you?"}])
 
 for msg in st.session_state.messages:
     st.chat_message(msg["role"]).write(msg["content"])
 
 msg = "collecting stream text"
 if prompt := st.chat_input():
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    # The turn joins the saved history together with its reply, so a visitor
+    # turned away while Ollama is busy does not leave an unanswered message behind
+    turn = {"role": "user", "content": prompt}
     st.chat_message("user").write(prompt)
 
-    # Initialize the Ollama client
-    client = Client(host=OLLAMA_BASE_URL)
+    # Route to the least-loaded Ollama backend
+    client = router
 
     try:
-        stream = client.chat(model="llama3.2", messages=st.session_state.messages, stream=True)
-        msg = collect_stream_text(stream)
+        with ollama_queue():
+            result = chat_reply(client, st.session_state.messages + [turn])
+        msg = result.text
+        render_debug_panel([result])
 
-        print(f"Raw Ollama response: {msg}")  # Debug: print the full response
+        log_payload(logger, "🦙 Raw Ollama response", msg)
     except Exception as e:
         print(f"Exception occurred: {e}")  # Debug: print the exception
         msg = f"Error: {str(e)}"
 
+    st.session_state.messages.append(turn)
     st.session_state.messages.append({"role": "assistant", "content": msg})
+    save_chat_history()
     st.chat_message("assistant").write(msg)
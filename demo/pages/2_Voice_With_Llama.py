@@ -1,265 +1,72 @@
 import os
-import io
 import re
 import json
+import time
 import requests
 import logging
 import streamlit as st
-from ollama import Client
-import speech_recognition as sr
-from pydub import AudioSegment
-from pydub.playback import play
+from shared.tracing import span, traced, current_span
+from shared.logging_setup import setup_logging, log_payload
+from shared.metrics import start_metrics_server, observe_chat_response
+from shared.ollama_stats import result_from_response
+from shared.pipelines import chat_reply
+from shared.ollama_router import router
+from shared.ui import render_debug_panel, ollama_queue, load_chat_history, save_chat_history, speak
+from shared.ollama_scheduler import scheduler
+from shared.model_warmup import start_model_warmup, keep_alive_for
+from shared.model_config import model_for, generation_options
+from shared.speech import speech_to_text
+from shared.mcp_client import mcp_sessions, MCPSessionExpired, MCPInitializeFailed
+from shared.resilience import CircuitOpen
 
 # Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+setup_logging()
 logger = logging.getLogger(__name__)
 
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://agentgw.mcp.svc.cluster.local:3000")
 
+start_metrics_server()
+start_model_warmup()
+
 def process_stream(stream):
   for chunk in stream:
    yield chunk['message']['content']
 
-def collect_stream_text(stream):
-  """Collect all text from the stream for TTS conversion"""
-  full_text = ""
-  for chunk in stream:
-    full_text += chunk['message']['content']
-  return full_text
-
 def detect_slide_creation_intent(text):
     """Detect if user wants to create slides for a place"""
     logger.info(f"🔍 Analyzing text for slide creation intent: '{text}'")
     return None
 
-def initialize_mcp_session():
-    """Initialize MCP session before making tool calls"""
-    logger.info("🔧 Initializing MCP session...")
-    
-    try:
-        # Send initialize request
-        init_request = {
-            "jsonrpc": "2.0",
-            "id": 0,
-            "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {
-                    "tools": {}
-                },
-                "clientInfo": {
-                    "name": "voice-llama-client",
-                    "version": "1.0.0"
-                }
-            }
-        }
-        
-        logger.info(f"🔧 Sending initialize request: {json.dumps(init_request, indent=2)}")
-        
-        response = requests.post(
-            MCP_SERVER_URL,
-            json=init_request,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/event-stream"
-            },
-            timeout=30
-        )
-        
-        logger.info(f"🔧 Initialize response status: {response.status_code}")
-        logger.info(f"🔧 Initialize response headers: {dict(response.headers)}")
-        logger.info(f"🔧 Initialize response content: {repr(response.text)}")
-        logger.info(f"🔧 Initialize response content length: {len(response.text)}")
-        
-        # Extract session ID from headers
-        global _mcp_session_id
-        _mcp_session_id = response.headers.get('mcp-session-id')
-        if _mcp_session_id:
-            logger.info(f"🔧 Extracted MCP session ID: {_mcp_session_id}")
-        else:
-            logger.info("🔧 No MCP session ID found in response headers")
-        
-        if response.status_code == 200:
-            if response.text.strip():
-                try:
-                    # Check if response is Server-Sent Events format
-                    if response.headers.get('content-type', '').startswith('text/event-stream'):
-                        logger.info("🔧 Response is Server-Sent Events format")
-                        # Parse SSE format - extract only the data line
-                        sse_lines = response.text.strip().split('\n')
-                        json_str = None
-                        
-                        for line in sse_lines:
-                            if line.startswith('data: '):
-                                json_str = line[6:]  # Remove "data: " prefix
-                                break
-                        
-                        if json_str:
-                            logger.info(f"🔧 Extracted JSON from SSE: {repr(json_str)}")
-                            response_data = json.loads(json_str)
-                            logger.info(f"🔧 Parsed SSE data: {json.dumps(response_data, indent=2)}")
-                        else:
-                            logger.error(f"❌ No data line found in SSE response: {repr(response.text)}")
-                            return False
-                    else:
-                        # Regular JSON response
-                        response_data = response.json()
-                        logger.info(f"🔧 Initialize response: {json.dumps(response_data, indent=2)}")
-                except json.JSONDecodeError as e:
-                    logger.error(f"❌ Failed to parse initialize response as JSON: {e}")
-                    logger.error(f"❌ Raw response: {repr(response.text)}")
-                    return False
-                except Exception as e:
-                    logger.error(f"❌ Error parsing response: {e}")
-                    logger.error(f"❌ Raw response: {repr(response.text)}")
-                    return False
-            else:
-                logger.info("🔧 Initialize response is empty - this might be normal for MCP")
-                response_data = None
-            
-            # Send initialized notification
-            initialized_request = {
-                "jsonrpc": "2.0",
-                "method": "notifications/initialized"
-            }
-            
-            logger.info("🔧 Sending initialized notification")
-            logger.info(f"🔧 Notification request: {json.dumps(initialized_request, indent=2)}")
-            
-            # Prepare notification headers with session ID if available
-            notification_headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/event-stream"
-            }
-            if _mcp_session_id:
-                notification_headers["mcp-session-id"] = _mcp_session_id
-                logger.info(f"🔧 Including session ID in notification: {_mcp_session_id}")
-            
-            notification_response = requests.post(
-                MCP_SERVER_URL,
-                json=initialized_request,
-                headers=notification_headers,
-                timeout=30
-            )
-            
-            logger.info(f"🔧 Notification response status: {notification_response.status_code}")
-            logger.info(f"🔧 Notification response: {repr(notification_response.text)}")
-            
-            logger.info("✅ MCP session initialized successfully")
-            return True
-        else:
-            logger.error(f"❌ Initialize failed: {response.status_code} - {response.text}")
-            return False
-            
-    except Exception as e:
-        logger.error(f"❌ Error initializing MCP session: {e}")
-        return False
-
-# Global variables to track MCP session state
-_mcp_initialized = False
-_mcp_session_id = None
+# One session shared by every visitor and replica; see shared/mcp_client.py
+slides_mcp = mcp_sessions.get(MCP_SERVER_URL, "voice-llama-client", "slides", notify=True)
 
+@traced("mcp.call", server="slides", error_if=lambda result: result is None)
 def call_mcp_tool(tool_name, arguments):
     """Call a tool in the Google Slides MCP server via HTTP"""
-    global _mcp_initialized, _mcp_session_id
-    
+    current_span().set_attribute("tool", tool_name)
     logger.info(f"🌐 Calling MCP tool: {tool_name}")
     logger.info(f"🌐 Server URL: {MCP_SERVER_URL}")
-    logger.info(f"🌐 Arguments: {json.dumps(arguments, indent=2)}")
-    
-    # Initialize MCP session if not already done
-    if not _mcp_initialized:
-        logger.info("🔧 MCP not initialized, initializing now...")
-        if initialize_mcp_session():
-            _mcp_initialized = True
-        else:
-            logger.error("❌ Failed to initialize MCP session")
-            return None
-    
-    logger.info(f"🌐 Using MCP session ID: {_mcp_session_id}")
+    log_payload(logger, "🌐 Arguments", arguments)
     
     try:
-        mcp_request = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": arguments
-            }
-        }
-        
-        logger.info(f"🌐 Sending request: {json.dumps(mcp_request, indent=2)}")
-        
-        # Prepare headers with session ID if available
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json, text/event-stream"
-        }
-        
-        if _mcp_session_id:
-            headers["mcp-session-id"] = _mcp_session_id
-            logger.info(f"🌐 Including session ID in headers: {_mcp_session_id}")
-        
-        # Make HTTP POST request to the MCP server
-        response = requests.post(
-            MCP_SERVER_URL,
-            json=mcp_request,
-            headers=headers,
-            timeout=60
-        )
-        
-        logger.info(f"🌐 Response status: {response.status_code}")
-        logger.info(f"🌐 Response headers: {dict(response.headers)}")
-        
-        if response.status_code != 200:
-            logger.error(f"❌ HTTP Error: {response.status_code} - {response.text}")
-            print(f"HTTP Error: {response.status_code} - {response.text}")
-            return None
-        
-        # Parse response (handle both SSE and regular JSON)
-        try:
-            if response.headers.get('content-type', '').startswith('text/event-stream'):
-                logger.info("🌐 Response is Server-Sent Events format")
-                # Parse SSE format - extract only the data line
-                sse_lines = response.text.strip().split('\n')
-                json_str = None
-                
-                for line in sse_lines:
-                    if line.startswith('data: '):
-                        json_str = line[6:]  # Remove "data: " prefix
-                        break
-                
-                if json_str:
-                    logger.info(f"🌐 Extracted JSON from SSE: {repr(json_str)}")
-                    response_data = json.loads(json_str)
-                    logger.info(f"🌐 Parsed SSE data: {json.dumps(response_data, indent=2)}")
-                else:
-                    logger.error(f"❌ No data line found in SSE response: {repr(response.text)}")
-                    return None
-            else:
-                # Regular JSON response
-                response_data = response.json()
-                logger.info(f"🌐 Response data: {json.dumps(response_data, indent=2)}")
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ Failed to parse tool response: {e}")
-            logger.error(f"❌ Raw response: {repr(response.text)}")
-            return None
-        except Exception as e:
-            logger.error(f"❌ Error parsing tool response: {e}")
-            logger.error(f"❌ Raw response: {repr(response.text)}")
-            return None
-        
-        if "error" in response_data:
-            logger.error(f"❌ MCP Error: {response_data['error']}")
-            print(f"MCP Error: {response_data['error']}")
+        result = slides_mcp.call(tool_name, arguments)
+        if result is None:
+            print(f"MCP tool {tool_name} failed")
             return None
             
-        result = response_data.get("result", {}).get("content", [])
+        result = result.get("content", [])
         logger.info(f"✅ MCP tool success: {tool_name} returned {len(result) if isinstance(result, list) else 'data'}")
         return result
         
+    except CircuitOpen as e:
+        logger.warning(f"⚡ Skipping MCP tool {tool_name}: {e}")
+        return None
+    except MCPInitializeFailed as e:
+        logger.error(f"❌ Failed to initialize MCP session: {e}")
+        return None
+    except MCPSessionExpired:
+        logger.error("❌ MCP session expired again right after re-initializing")
+        return None
     except requests.exceptions.RequestException as e:
         logger.error(f"❌ HTTP request error: {e}")
         print(f"HTTP request error: {e}")
@@ -273,13 +80,15 @@ def call_mcp_tool(tool_name, arguments):
         print(f"Error calling MCP tool: {e}")
         return None
 
+@traced("llama.slides_content", model=model_for("slides_content"))
 def generate_place_slides_content(place):
     """Generate content for slides about a specific place"""
+    model = model_for("slides_content")
     logger.info(f"🤖 Generating content for place: {place}")
-    logger.info(f"🤖 Using Ollama at: {OLLAMA_BASE_URL}")
+    logger.info(f"🤖 Using Ollama at: {', '.join(b.url for b in router.backends_for(model))}")
     
     # Use Llama to generate structured content for the place
-    client = Client(host=OLLAMA_BASE_URL)
+    client = router
     
     prompt = f"""Generate information about {place} that would be suitable for a presentation. 
     Please provide:
@@ -291,18 +100,23 @@ def generate_place_slides_content(place):
     
     logger.info(f"🤖 Sending prompt to Llama: {prompt[:100]}...")
     
+    started = time.perf_counter()
     try:
-        response = client.chat(model="llama3.2", messages=[
-            {"role": "user", "content": prompt}
-        ])
-        content = response['message']['content']
+        # Queued for this session like the chat, with the same "you are #n in line" notice
+        with ollama_queue(), scheduler.slot(model):
+            response = client.chat(model=model, messages=[
+                {"role": "user", "content": prompt}
+            ], keep_alive=keep_alive_for(model), options=generation_options("slides_content", model))
+        content = result_from_response(response, model, "slides_content", time.perf_counter() - started).text
         logger.info(f"✅ Content generated successfully ({len(content)} characters)")
-        logger.info(f"🤖 Content preview: {content[:200]}...")
+        log_payload(logger, "🤖 Content", content)
         return content
     except Exception as e:
+        observe_chat_response(None, model, "slides_content", time.perf_counter() - started)
         logger.error(f"❌ Error generating content: {e}")
         return f"Error generating content: {e}"
 
+@traced("slides.create")
 def create_slides_for_place(place):
     """Create Google Slides presentation for a place"""
     logger.info(f"📊 Starting slide creation for place: {place}")
@@ -415,38 +229,6 @@ def create_slides_for_place(place):
         logger.error(f"❌ Exception in create_slides_for_place: {e}", exc_info=True)
         return f"Error creating slides: {str(e)}"
 
-def speech_to_text(audio_bytes):
-  """Convert audio bytes to text using speech recognition"""
-  if audio_bytes is None:
-    return None
-  
-  try:
-    # Convert audio bytes to AudioSegment
-    audio = AudioSegment.from_wav(io.BytesIO(audio_bytes))
-    
-    # Export as wav for speech recognition
-    wav_io = io.BytesIO()
-    audio.export(wav_io, format="wav")
-    wav_io.seek(0)
-    
-    # Initialize recognizer
-    recognizer = sr.Recognizer()
-    
-    # Use speech recognition
-    with sr.AudioFile(wav_io) as source:
-      audio_data = recognizer.record(source)
-      try:
-        # Use Google's speech recognition API
-        text = recognizer.recognize_google(audio_data)
-        return text
-      except sr.UnknownValueError:
-        return "Could not understand the audio"
-      except sr.RequestError as e:
-        return f"Speech recognition error: {str(e)}"
-        
-  except Exception as e:
-    return f"Error processing audio: {str(e)}"
-
 # Streamlit UI
 st.set_page_config(
     page_title="Chat With Llama 💬",
@@ -512,8 +294,10 @@ st.markdown(styl, unsafe_allow_html=True)
 
 st.title(':grey[Chat with Llama - Type or Speak! 💬🎤]')
 
-if "messages" not in st.session_state:
-    st.session_state["messages"] = [{"role": "assistant", "content": "How can I help you?"}]
+read_aloud = st.sidebar.toggle("🔊 Read replies aloud", value=False)
+
+# History lives in the state store so a reconnect to another replica keeps it
+load_chat_history([{"role": "assistant", "content": "How can I help you?"}])
 if "input_text" not in st.session_state:
     st.session_state["input_text"] = ""
 if "processing_voice" not in st.session_state:
@@ -535,7 +319,7 @@ with col2:
     if audio_data and not st.session_state.get("processing_voice", False):
         st.session_state["processing_voice"] = True
         # st.info("🎤 Processing...")
-        with st.spinner("..."):
+        with st.spinner("..."), span("voice.request", page="2_Voice_With_Llama"):
             try:
                 # st.audio_input returns bytes directly, perfect for speech_to_text
                 voice_prompt = speech_to_text(audio_data.getbuffer())
@@ -574,38 +358,53 @@ if send_button and user_input.strip():
 
 msg = "collecting stream text"
 if prompt:
-    logger.info(f"💬 User input received: '{prompt}'")
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    st.chat_message("user").write(prompt)
+    with span("chat.request", page="2_Voice_With_Llama"):
+        logger.info(f"💬 User input received: '{prompt}'")
+        # The turn joins the saved history together with its reply, so a visitor
+        # turned away while Ollama is busy does not leave an unanswered message behind
+        turn = {"role": "user", "content": prompt}
+        st.chat_message("user").write(prompt)
 
-    # Check if user wants to create slides for a place
-    logger.info("🔍 Checking for slide creation intent...")
-    place = detect_slide_creation_intent(prompt)
+        # Check if user wants to create slides for a place
+        logger.info("🔍 Checking for slide creation intent...")
+        with span("intent.detect"):
+            place = detect_slide_creation_intent(prompt)
     
-    if place:
-        logger.info(f"🎯 Slide creation intent detected for place: {place}")
-        with st.spinner(f"Creating Google Slides presentation for {place}..."):
-            logger.info(f"📊 Starting slide creation process...")
-            slides_result = create_slides_for_place(place)
-            logger.info(f"📊 Slide creation result: {slides_result[:100]}...")
-            msg = slides_result
-    else:
-        logger.info("💭 No slide creation intent detected, proceeding with regular chat")
-        # Initialize the Ollama client for regular chat
-        client = Client(host=OLLAMA_BASE_URL)
+        if place:
+            logger.info(f"🎯 Slide creation intent detected for place: {place}")
+            with st.spinner(f"Creating Google Slides presentation for {place}..."):
+                logger.info(f"📊 Starting slide creation process...")
+                slides_result = create_slides_for_place(place)
+                logger.info(f"📊 Slide creation result: {slides_result[:100]}...")
+                msg = slides_result
+        else:
+            logger.info("💭 No slide creation intent detected, proceeding with regular chat")
+            # Route regular chat to the least-loaded Ollama backend
+            client = router
 
-        try:
-            logger.info("🦙 Sending request to Ollama for regular chat")
-            stream = client.chat(model="llama3.2", messages=st.session_state.messages, stream=True)
-            msg = collect_stream_text(stream)
+            try:
+                logger.info("🦙 Sending request to Ollama for regular chat")
+                with ollama_queue():
+                    result = chat_reply(client, st.session_state.messages + [turn])
+                msg = result.text
+                render_debug_panel([result])
 
-            logger.info(f"🦙 Ollama response received ({len(msg)} chars)")
-            print(f"Raw Ollama response: {msg}")  # Debug: print the full response
-        except Exception as e:
-            logger.error(f"❌ Ollama error: {e}")
-            print(f"Exception occurred: {e}")  # Debug: print the exception
-            msg = f"Error: {str(e)}"
+                logger.info(f"🦙 Ollama response received ({len(msg)} chars)")
+                log_payload(logger, "🦙 Raw Ollama response", msg)
+            except Exception as e:
+                logger.error(f"❌ Ollama error: {e}")
+                print(f"Exception occurred: {e}")  # Debug: print the exception
+                msg = f"Error: {str(e)}"
 
-    logger.info(f"💬 Final response ready ({len(msg)} chars)")
-    st.session_state.messages.append({"role": "assistant", "content": msg})
-    st.chat_message("assistant").write(msg)
+        logger.info(f"💬 Final response ready ({len(msg)} chars)")
+        st.session_state.messages.append(turn)
+        st.session_state.messages.append({"role": "assistant", "content": msg})
+        save_chat_history()
+        st.chat_message("assistant").write(msg)
+        if read_aloud and not msg.startswith("Error"):
+            # Playback starts after the first sentence, the rest follows as it is synthesized
+            try:
+                with span("tts.synthesize"):
+                    speak(msg)
+            except Exception as e:
+                logger.error(f"❌ Could not read the reply aloud: {e}")
@@ -1,48 +1,26 @@
 import os
-import io
-import base64
 import streamlit as st
-from ollama import Client
-from gtts import gTTS
+from shared.tracing import span
+from shared.logging_setup import setup_logging
+from shared.metrics import start_metrics_server
+from shared.model_warmup import start_model_warmup
+from shared.pipelines import analyze_mood, summarize_mood, PhaseClock
+from shared.ollama_router import router
+from shared.ui import render_debug_panel, ollama_queue, speak, audio_player
 
-# OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-OLLAMA_BASE_URL = os.getenv("LLAVA_BASE_URL", "http://localhost:11434")
+# Pipelined: stream the analysis, summarize with the summarize model and
+# open the player while the summary is generated
+MOOD_PIPELINED = os.getenv("MOOD_PIPELINED", "true").lower() in ("1", "true", "yes")
+
+
+setup_logging()
+start_metrics_server()
+start_model_warmup()
 
 def process_stream(stream):
   for chunk in stream:
    yield chunk['message']['content']
 
-def collect_stream_text(stream):
-  """Collect all text from the stream for TTS conversion"""
-  full_text = ""
-  for chunk in stream:
-    full_text += chunk['message']['content']
-  return full_text
-
-def text_to_speech(text, lang='en'):
-  """Convert text to speech using gTTS and return audio bytes"""
-  if not text.strip():
-    return None
-  
-  tts = gTTS(text=text, lang=lang, slow=False)
-  audio_buffer = io.BytesIO()
-  tts.write_to_fp(audio_buffer)
-  audio_buffer.seek(0)
-  return audio_buffer.getvalue()
-
-def create_autoplay_audio(audio_bytes):
-  """Create HTML audio element with autoplay"""
-  b64_audio = base64.b64encode(audio_bytes).decode()
-  audio_html = f"""
-  <audio controls autoplay style="width: 100%;">
-    <source src="data:audio/mp3;base64,{b64_audio}" type="audio/mp3">
-    Your browser does not support the audio element.
-  </audio>
-  """
-  return audio_html
-
-
-
 # Streamlit UI
 st.set_page_config(
     page_title="Analyze a Image Mood with LLaVa 📸",
@@ -61,62 +39,71 @@ styl = f"""
 st.markdown(styl, unsafe_allow_html=True)
 
 st.title(':grey[Analyze the mood in an image with LLaVa 📸]')
+pipelined = st.sidebar.toggle("⚡ Pipelined", value=MOOD_PIPELINED,
+                              help="Stream the analysis and hand the summary to a small text model")
 picture = st.camera_input("")
 
 if picture:
-  with open ('snap.jpg','wb') as f:
-    f.write(picture.getbuffer())
-
-  # Initialize the Ollama client
-  client = Client(host=OLLAMA_BASE_URL)
-
-  # Define the path to your image
-  image_path = 'snap.jpg'
-
-  # Prepare the message to send to the LLaVA model
-  message = {
-      'role': 'user',
-      'content': 'Analyze the image and describe the mood. Keep the response within 50 words.',
-      'images': [image_path]
-  }
-
-  # Use the ollama.chat function to send the image and retrieve the description
-  stream = client.chat(
-      model="llava",  # Specify the desired LLaVA model size
-      messages=[message],
-      stream=True,
-  )
-  
-  # Collect the complete response text for TTS
-  with st.spinner('Analyzing the image...'):
-    response_text = collect_stream_text(stream)
-  
-  # Display the full response
-  # st.write("**Analysis Result:**")
-  st.write("Hello! " + response_text)
-
-  # Generate a 5-word summary
-  with st.spinner('Creating summary...'):
-    summary_message = {
-        'role': 'user',
-        'content': f'Summarize this mood analysis in exactly 5 words: {response_text}',
-    }
-    summary_stream = client.chat(model="llava", messages=[summary_message], stream=True)
-    summary_text = collect_stream_text(summary_stream)
-  
-
-  # Convert to speech and auto-play audio using summary
-  if summary_text:
-    with st.spinner('Generating voice...'):
-      try:
-        # Generate main audio
-        audio_bytes = text_to_speech(summary_text + " This is cool!")
-        if audio_bytes:
-          # st.write("🔊 **Listen to the analysis (auto-playing):**")
-          # Create and display auto-playing audio
-          audio_html = create_autoplay_audio(audio_bytes)
-          st.markdown(audio_html, unsafe_allow_html=True)
-          # st.success("🎵 Audio is now playing automatically!")
-      except Exception as e:
-        st.error(f"Could not generate speech: {str(e)}")
-        st.info("Note: Make sure you have internet connection for text-to-speech functionality.")
+  with span("mood.request", page="3_Analyze_Mood", pipelined=pipelined):
+    clock = PhaseClock()
+    # Hand the capture to Ollama as bytes - nothing is written to the pod's disk
+    image_bytes = picture.getvalue()
+
+    # Route to the least-loaded Ollama backend
+    client = router
+
+    if pipelined:
+      # Show the analysis as it is generated
+      placeholder = st.empty()
+      parts = ["Hello! "]
+
+      def show(piece):
+        clock.mark("first text")
+        parts.append(piece)
+        placeholder.write("".join(parts))
+
+      with ollama_queue():
+        analysis_result = analyze_mood(client, image_bytes, on_text=show)
+      response_text = analysis_result.text
+      clock.mark("analysis")
+
+      # The player loads in the browser while the summary is generated
+      player = audio_player(hidden=False)
+      with st.spinner('Creating summary...'), ollama_queue():
+        summary_result = summarize_mood(client, response_text)
+        summary_text = summary_result.text
+    else:
+      # Send the image to the LLaVA model and collect the complete response text for TTS
+      with st.spinner('Analyzing the image...'), ollama_queue():
+        analysis_result = analyze_mood(client, image_bytes)
+        response_text = analysis_result.text
+      clock.mark("analysis")
+
+      # Display the full response
+      # st.write("**Analysis Result:**")
+      st.write("Hello! " + response_text)
+
+      # Generate a 5-word summary on the summary model
+      player = None
+      with st.spinner('Creating summary...'), ollama_queue():
+        summary_result = summarize_mood(client, response_text)
+        summary_text = summary_result.text
+    clock.mark("summary")
+
+    # Convert to speech and auto-play audio using summary
+    if summary_text:
+      with st.spinner('Generating voice...'):
+        try:
+          # Speak the first sentence as soon as it is ready, the rest as it is synthesized
+          with span("tts.synthesize"):
+            first_clip = speak(summary_text + " This is cool!", hidden=False, player=player)
+          if first_clip is not None:
+            clock.mark("voice")
+        except Exception as e:
+          st.error(f"Could not generate speech: {str(e)}")
+          st.info("Note: Make sure you have internet connection for text-to-speech functionality.")
+    elif player:
+      player.close()
+
+    st.caption(f"⏱️ {clock.summary()}")
+    render_debug_panel([analysis_result, summary_result])
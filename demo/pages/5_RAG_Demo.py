@@ -3,19 +3,27 @@ import requests
 import json
 import mimetypes
 import os
+from shared.tracing import span
+from shared.logging_setup import setup_logging
+from shared.metrics import start_metrics_server
+from shared.pipelines import rag_upload, rag_query
+from shared.resilience import CircuitOpen
 
 st.set_page_config(page_title="RAG Demo", page_icon="🔍")
 st.write("# RAG Demo 🔍")
 
 RAG_SERVICE_URL = os.getenv("RAG_SERVICE_URL", "http://rag:80")
 
+setup_logging()
+start_metrics_server()
+
 # File uploader
 uploaded_file = st.file_uploader("Upload a document", type=['pdf', 'txt'], help="Supported formats: PDF, TXT")
 
 # Process the uploaded file
 if uploaded_file is not None:
     try:
-        with st.spinner('Processing document...'):
+        with st.spinner('Processing document...'), span("rag.upload", page="5_RAG_Demo", file_size=uploaded_file.size):
             # Get file extension and set correct MIME type
             file_extension = uploaded_file.name.split('.')[-1].lower()
             content_type = 'application/pdf' if file_extension == 'pdf' else 'text/plain'
@@ -23,17 +31,8 @@ if uploaded_file is not None:
             # Log file details
             st.write(f"Processing file: {uploaded_file.name} ({content_type})")
             
-            # Create a files dictionary with the correct filename and MIME type
-            files = {
-                "file": (
-                    uploaded_file.name,  # Use original filename
-                    uploaded_file,
-                    content_type
-                )
-            }
-            
-            # Send the request
-            response = requests.post(f"{RAG_SERVICE_URL}/upload", files=files)
+            # Send the file with its original filename and MIME type
+            response = rag_upload(RAG_SERVICE_URL, uploaded_file.name, uploaded_file, content_type)
             
             # Check response status and content
             if response.status_code != 200:
@@ -41,6 +40,8 @@ if uploaded_file is not None:
                 st.error(f"Server error: {error_detail}")
             else:
                 st.success("Document processed successfully!")
+    except CircuitOpen as e:
+        st.error(f"The RAG service is not responding ({e}). Please try again shortly.")
     except requests.exceptions.RequestException as e:
         st.error(f"Error communicating with RAG service: {str(e)}")
     except Exception as e:
@@ -51,15 +52,9 @@ query = st.text_input("Ask a question about your document:")
 
 if query:
     try:
-        with st.spinner('Searching for answer...'):
+        with st.spinner('Searching for answer...'), span("rag.query", page="5_RAG_Demo"):
             # Send the query as JSON with the correct structure
-            response = requests.post(
-                f"{RAG_SERVICE_URL}/query",
-                json={"question": query},
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
-            result = response.json()
+            result = rag_query(RAG_SERVICE_URL, query)
             
             # Display answer
             st.write("### Answer:")
@@ -69,6 +64,8 @@ if query:
             if result["sources"]:
                 st.write("### Source:")
                 st.text(result["sources"][0]["content"][:200] + "...")
+    except CircuitOpen as e:
+        st.error(f"The RAG service is not responding ({e}). Please try again shortly.")
     except requests.exceptions.RequestException as e:
         st.error(f"Error communicating with RAG service: {str(e)}")
     except Exception as e:
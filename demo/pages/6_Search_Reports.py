@@ -0,0 +1,84 @@
+import os
+import time
+import streamlit as st
+from shared.logging_setup import setup_logging
+from shared.metrics import start_metrics_server
+from shared.report_index import report_index, REPORT_INDEX_REFRESH_SECONDS
+
+setup_logging()
+start_metrics_server()
+
+st.set_page_config(
+    page_title="Search Reports 🔎",
+    page_icon="🔎",
+)
+
+st.title(':grey[Search Event Reports 🔎]')
+
+
+@st.cache_data(ttl=REPORT_INDEX_REFRESH_SECONDS, show_spinner=False)
+def matches_by_event(text, events, refreshed_at):
+  # Counting every match is the slowest query on the page; keep it until the next refresh
+  return report_index.matches_by_event(text, list(events))
+
+
+if st.sidebar.button("🔄 Rescan reports"):
+  with st.spinner("Scanning the report folders..."):
+    changed, removed = report_index.refresh()
+  st.sidebar.success(f"{changed} reports added or updated, {removed} removed")
+else:
+  report_index.refresh_if_stale()
+
+events = report_index.events()
+if not events:
+  st.info(f"No analysis reports in {report_index.reports_dir} yet. "
+          "Reports saved by the engagement page or written by batch_analyze.py show up here.")
+  st.stop()
+
+st.sidebar.caption(f"🗂️ {sum(e['reports'] for e in events)} reports from {len(events)} events")
+
+text = st.text_input("Search the analyses", placeholder="e.g. smiling crowd, laptops, standing room")
+selected = st.multiselect("Events", [e["event"] for e in events], help="Search every event when empty")
+
+started = time.perf_counter()
+results = report_index.search(text, selected)
+search_ms = (time.perf_counter() - started) * 1000
+
+if text.strip():
+  started = time.perf_counter()
+  counts = matches_by_event(text, tuple(selected), report_index.refreshed_at)
+  count_ms = (time.perf_counter() - started) * 1000
+  st.subheader("Matches per event")
+  st.bar_chart({"event": [c["event"] for c in counts], "share of reports": [c["share"] for c in counts]},
+               x="event", y="share of reports")
+  st.dataframe(counts, hide_index=True)
+  st.caption(f"⏱️ search {search_ms:.0f} ms · counts {count_ms:.0f} ms")
+  st.subheader(f"Best matches ({len(results)})")
+else:
+  st.caption(f"⏱️ {search_ms:.0f} ms")
+  st.subheader("Latest reports")
+
+if not results:
+  st.write("No report matches all of these words.")
+
+for row in results:
+  st.markdown(f"**{row['event']}** · {row['generated'] or 'unknown time'} · {row['kind']}")
+  if row["summary"]:
+    st.markdown(f"> {row['summary']}")
+  st.markdown(row["snippet"] or "")
+  with st.expander("📄 Full report"):
+    report = report_index.report(row["id"])
+    folder = os.path.dirname(report["path"])
+    first_label = "Image" if report["kind"] == "mood" else "First image"
+    for label, column, image in ((first_label, "first", "image1"), ("Second image", "second", "image2")):
+      if report[column]:
+        st.markdown(f"**{label}**")
+        image_path = os.path.join(folder, report[image] or "")
+        if report[image] and os.path.isfile(image_path):
+          st.image(image_path, width=240)
+        st.write(report[column])
+    if report["comparison"]:
+      st.markdown("**Comparison**")
+      st.write(report["comparison"])
+    st.caption(report["path"])
+  st.divider()
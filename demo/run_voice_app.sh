@@ -22,11 +22,12 @@ if [ $? -eq 0 ]; then
     echo "✅ MCP connection test successful!"
     echo "🎯 Starting Streamlit app..."
     echo ""
-    streamlit run pages/2_Voice_With_Llama.py --server.port 8501
+    # Keep the demo folder importable so pages can load the shared/ helpers
+    PYTHONPATH="$(pwd):${PYTHONPATH}" streamlit run pages/2_Voice_With_Llama.py --server.port 8501
 else
     echo "❌ MCP connection test failed!"
     echo "Please check your MCP server configuration before running the app."
     echo ""
     echo "You can still run the app manually with:"
-    echo "streamlit run pages/2_Voice_With_Llama.py"
+    echo "PYTHONPATH=. streamlit run pages/2_Voice_With_Llama.py"
 fi
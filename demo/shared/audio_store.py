@@ -0,0 +1,144 @@
+"""
+Content-addressed store for the audio the pages play
+
+Clips are written once to demo/static/audio/<sha256>.<ext> and played from
+Streamlit's static file route (app/static/audio/...), so a page sends the
+browser a short URL over the websocket instead of the whole MP3 as base64,
+and nothing is kept in the session's memory. The same clip (a repeated
+answer, the background music) maps to the same file and URL; since the
+content behind a URL never changes, browsers and proxies may cache it
+freely (Streamlit sends Last-Modified, ETag and byte-range support).
+
+  AUDIO_DELIVERY=static   serve clips by URL (default; needs
+                          server.enableStaticServing, see .streamlit/config.toml)
+  AUDIO_DELIVERY=inline   embed them as data: URIs like before
+
+An AudioQueue is a playlist file next to the clips. The page renders a
+small player that polls it and plays the clips in order while more are
+still being added, which is how spoken answers start after the first
+sentence instead of after the whole text.
+
+The oldest clips are deleted once the folder grows past AUDIO_STORE_MAX_MB.
+With several replicas and no session affinity, mount demo/static/audio
+from a shared volume so any pod can serve any clip.
+"""
+import os
+import json
+import uuid
+import base64
+import hashlib
+import logging
+import tempfile
+import threading
+
+import streamlit as st
+
+from shared.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+AUDIO_DELIVERY = os.getenv("AUDIO_DELIVERY", "static").lower()
+AUDIO_STORE_MAX_MB = int(os.getenv("AUDIO_STORE_MAX_MB", "200"))
+
+AUDIO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "audio")
+# Relative, so it resolves against whatever base path the app is served under
+AUDIO_URL_PREFIX = "app/static/audio"
+
+MIME_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav", "m4a": "audio/mp4", "ogg": "audio/ogg"}
+
+
+class AudioStore:
+    """Write-once audio files named by the hash of their content"""
+
+    def __init__(self, directory=AUDIO_DIR, max_bytes=AUDIO_STORE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def put(self, data, ext="mp3"):
+        """Store a clip (if it is not there yet) and return its file name"""
+        name = f"{hashlib.sha256(data).hexdigest()[:32]}.{ext}"
+        path = os.path.join(self.directory, name)
+        if os.path.exists(path):
+            record_cache("audio_store", True)
+            # Keep recently played clips away from eviction
+            os.utime(path)
+            return name
+        record_cache("audio_store", False)
+        os.makedirs(self.directory, exist_ok=True)
+        # Write under a temporary name so the static route never serves half a file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+        self._evict()
+        return name
+
+    def write_json(self, name, value):
+        """Atomically replace a small JSON file in the store"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+        with os.fdopen(fd, "w") as f:
+            json.dump(value, f)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+
+    def _evict(self):
+        with self.lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith(".part"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+audio_store = AudioStore()
+
+
+class AudioQueue:
+    """A playlist the browser plays in order while clips are still being added"""
+
+    def __init__(self, store=audio_store):
+        self.store = store
+        self.name = f"queue-{uuid.uuid4().hex}.json"
+        self.clips = []
+        self._write(done=False)
+
+    @property
+    def url(self):
+        return f"{AUDIO_URL_PREFIX}/{self.name}"
+
+    def add(self, data, ext="mp3"):
+        self.clips.append(self.store.put(data, ext))
+        self._write(done=False)
+
+    def close(self):
+        self._write(done=True)
+
+    def _write(self, done):
+        self.store.write_json(self.name, {"clips": self.clips, "done": done})
+
+
+def static_serving():
+    """True when clips are served by URL rather than embedded"""
+    return AUDIO_DELIVERY == "static" and st.get_option("server.enableStaticServing")
+
+
+def audio_src(data, ext="mp3"):
+    """URL to play a clip from, or a data: URI when static serving is off or the store fails"""
+    if static_serving():
+        try:
+            return f"{AUDIO_URL_PREFIX}/{audio_store.put(data, ext)}"
+        except OSError as e:
+            logger.warning(f"⚠️ Could not store audio clip, embedding it instead: {e}")
+    return f"data:{MIME_TYPES.get(ext, 'audio/mpeg')};base64,{base64.b64encode(data).decode()}"
@@ -0,0 +1,33 @@
+"""
+Parsing of the 'key=value,key=value' settings
+
+TASK_MODELS, MODEL_NUM_CTX, MODEL_KEEP_ALIVE, OLLAMA_MAX_CONCURRENCY,
+OLLAMA_BACKENDS and the bench's --model-token-latency all take this form.
+The modules read them at import time, so an entry that cannot be parsed
+is logged and skipped instead of taking every page down.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def parse_pairs(text, cast=str, setting="setting"):
+    """Parse 'a=1,b=2' into {'a': cast('1'), 'b': cast('2')}
+
+    Keys and values are stripped. Entries without a key or value, or whose
+    value `cast` rejects with ValueError, are logged and skipped.
+    """
+    pairs = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        key, _, value = part.partition("=")
+        key, value = key.strip(), value.strip()
+        if not (key and value):
+            logger.warning(f"⚠️ Ignoring {setting} entry {part.strip()!r}, expected key=value")
+            continue
+        try:
+            pairs[key] = cast(value)
+        except ValueError as e:
+            logger.warning(f"⚠️ Ignoring {setting} for {key}: {e}")
+    return pairs
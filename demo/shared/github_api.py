@@ -0,0 +1,124 @@
+"""
+Direct GitHub contents API client
+
+Uploads go straight to PUT /repos/{owner}/{repo}/contents/{path} with the
+file base64-encoded once, which GitHub stores as the original bytes. This
+is binary-correct on the first try, unlike text uploads through the MCP
+server that had to be fetched and re-uploaded. It needs GITHUB_TOKEN;
+without it callers fall back to MCP.
+
+Requests go through the "github-api" circuit breaker and are retried with
+backoff; both GET and a PUT of the same content are safe to repeat.
+
+Pass an `http` object (anything with requests' get/put) to point the
+client at a stand-in in tests and benchmarks. Otherwise each thread gets
+its own requests.Session over one shared connection pool.
+"""
+import os
+import time
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+from shared.logging_setup import truncate
+from shared.resilience import retry_call, timeouts, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_OWNER = "linsun"
+GITHUB_REPO = os.getenv("GITHUB_REPO", "gen-ai-demo")
+# Retries of a PUT that conflicted with another commit to the same branch
+CONFLICT_RETRIES = int(os.getenv("GITHUB_CONFLICT_RETRIES", "3"))
+
+
+class GitHubAPIError(Exception):
+    """The contents API answered with an unexpected status"""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+class GitHubContentsClient:
+    """Create or update files in one repository through the REST API"""
+
+    def __init__(self, token=GITHUB_TOKEN, api_url=GITHUB_API_URL, owner=GITHUB_OWNER, repo=GITHUB_REPO, http=None, timeout=60):
+        self.token = token
+        self.api_url = api_url.rstrip("/")
+        self.owner = owner
+        self.repo = repo
+        self.stand_in = http
+        self.adapter = HTTPAdapter()
+        self.local = threading.local()
+        self.timeout = timeout
+
+    @property
+    def http(self):
+        """The stand-in if one was passed, else this thread's requests.Session"""
+        if self.stand_in is not None:
+            return self.stand_in
+        http = getattr(self.local, "http", None)
+        if http is None:
+            http = self.local.http = requests.Session()
+            http.mount("http://", self.adapter)
+            http.mount("https://", self.adapter)
+        return http
+
+    @property
+    def enabled(self):
+        return bool(self.token)
+
+    def _url(self, path):
+        return f"{self.api_url}/repos/{self.owner}/{self.repo}/contents/{path}"
+
+    def _headers(self):
+        return {
+            "Authorization": f"token {self.token}",
+            "Accept": "application/vnd.github.v3+json",
+        }
+
+    def get_sha(self, path, branch):
+        """Blob sha of an existing file, or None when it does not exist"""
+        response = retry_call("github-api", lambda: self.http.get(
+            self._url(path), headers=self._headers(), params={"ref": branch}, timeout=timeouts(self.timeout)))
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise GitHubAPIError(response.status_code, truncate(response.text))
+        return response.json()["sha"]
+
+    def put_content(self, path, content_b64, message, branch, sha=None, conflicts=0):
+        """PUT base64-encoded content to path on branch; returns the new blob sha
+
+        Each PUT is a commit, so uploads running at the same time on one
+        branch can get 409 when another commit moved the branch head; those
+        are retried after a short backoff.
+        """
+        body = {"message": message, "content": content_b64, "branch": branch}
+        if sha:
+            body["sha"] = sha
+        response = retry_call("github-api", lambda: self.http.put(
+            self._url(path), json=body, headers=self._headers(), timeout=timeouts(self.timeout)))
+        if response.status_code in (409, 422) and sha is None:
+            # The file already exists (GitHub wants its sha to overwrite it)
+            existing = self.get_sha(path, branch)
+            if existing:
+                logger.info(f"🔄 {path} already exists, updating it")
+                return self.put_content(path, content_b64, message, branch, existing, conflicts)
+        if response.status_code == 409 and conflicts < CONFLICT_RETRIES:
+            delay = backoff_delay(conflicts + 1)
+            logger.info(f"🔄 {path} lost a race for {branch}, retrying in {delay:.2f}s")
+            time.sleep(delay)
+            if sha:
+                # The file itself may have moved on too
+                sha = self.get_sha(path, branch)
+            return self.put_content(path, content_b64, message, branch, sha, conflicts + 1)
+        if response.status_code not in (200, 201):
+            raise GitHubAPIError(response.status_code, truncate(response.text))
+        return response.json()["content"]["sha"]
+
+
+github_contents = GitHubContentsClient()
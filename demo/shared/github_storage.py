@@ -0,0 +1,509 @@
+"""
+Store engagement analysis reports and images to GitHub through the GitHub MCP server
+
+Moved out of pages/4_Analyze_Engagement.py so the storage flow can be
+benchmarked offline against the stand-in servers in bench/.
+"""
+import os
+import re
+import time
+import base64
+import logging
+import functools
+import contextvars
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from shared.tracing import span, traced, current_span
+from shared.logging_setup import truncate
+from shared.github_api import github_contents, GitHubAPIError, CONFLICT_RETRIES
+from shared.mcp_client import mcp_sessions, MCPSessionExpired, MCPInitializeFailed
+from shared.resilience import CircuitOpen, breakers, backoff_delay, OPEN
+
+logger = logging.getLogger(__name__)
+
+GITHUB_MCP_SERVER_URL = os.getenv("GITHUB_MCP_SERVER_URL", "http://agentgateway.mcp.svc.cluster.local:3000/mcp")
+EVENT_NAME = os.getenv("EVENT_NAME", "apidays-paris-2025")
+GITHUB_REPO = os.getenv("GITHUB_REPO", "gen-ai-demo")
+
+def build_analysis_report(analysis_data, timestamp, event_name=EVENT_NAME, images=None, generated=None):
+    """Render the markdown report stored next to the images
+
+    images names the two image files relative to the report; by default
+    they are the image1_/image2_ files uploaded with it. generated is when
+    the photos were taken (default: now).
+    """
+    image1, image2 = images or (f"image1_{timestamp}.jpg", f"image2_{timestamp}.jpg")
+    return f"""# Engagement Analysis Report - {event_name}
+
+**Generated:** {(generated or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")}
+
+## Analysis Results
+
+### First Image Analysis
+{analysis_data['response1']}
+
+### Second Image Analysis  
+{analysis_data['response2']}
+
+### Comparison Analysis
+{analysis_data['comparison']}
+
+### Summary
+{analysis_data['summary']}
+
+## Files
+- Image 1: ![Image 1]({image1})
+- Image 2: ![Image 2]({image2})
+"""
+
+
+def build_mood_report(analysis_data, image, event_name=EVENT_NAME, generated=None):
+    """Render a mood report for one image in the same layout"""
+    return f"""# Mood Analysis Report - {event_name}
+
+**Generated:** {(generated or datetime.now()).strftime("%Y-%m-%d %H:%M:%S")}
+
+## Analysis Results
+
+### Image Analysis
+{analysis_data['response']}
+
+### Summary
+{analysis_data['summary']}
+
+## Files
+- Image: ![Image]({image})
+"""
+
+# One session shared by every visitor and replica; see shared/mcp_client.py
+github_mcp = mcp_sessions.get(GITHUB_MCP_SERVER_URL, "engagement-analyzer-client", "github")
+
+# Tools that change nothing, so a timed-out call can simply be sent again
+READ_ONLY_TOOLS = {"list_branches", "get_file_contents"}
+
+@traced("mcp.call", server="github", error_if=lambda result: result is None)
+def call_github_mcp_tool(tool_name, arguments):
+    """Call a tool in the GitHub MCP server via HTTP"""
+    current_span().set_attribute("tool", tool_name)
+    logger.info(f"🌐 Calling GitHub MCP tool: {tool_name}")
+    
+    try:
+        # Make HTTP POST request to the GitHub MCP server with extended timeout for GitHub operations  
+        timeout_duration = 120 if tool_name in ['create_branch', 'create_or_update_file', 'list_branches'] else 60
+        logger.info(f"🕐 Using {timeout_duration}s timeout for {tool_name}")
+        
+        result = github_mcp.call(tool_name, arguments, timeout_duration, idempotent=tool_name in READ_ONLY_TOOLS)
+        if result is not None:
+            logger.info(f"✅ GitHub MCP tool success: {tool_name}")
+        return result
+        
+    except CircuitOpen as e:
+        logger.warning(f"⚡ Skipping GitHub MCP tool {tool_name}: {e}")
+        return None
+    except MCPInitializeFailed as e:
+        logger.error(f"❌ Failed to initialize GitHub MCP session: {e}")
+        return None
+    except MCPSessionExpired:
+        logger.error("❌ GitHub MCP session expired again right after re-initializing")
+        return None
+    except requests.exceptions.RequestException as e:
+        logger.error(f"❌ GitHub MCP HTTP request error: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"❌ Error calling GitHub MCP tool: {e}")
+        return None
+
+@traced("github.convert_binary", error_if=lambda ok: not ok)
+def convert_base64_to_binary_image(file_path, base64_content, branch_name, commit_message):
+    """
+    Convert uploaded base64 text file to proper binary image using direct GitHub API
+    """
+    if not github_contents.enabled:
+        logger.warning("⚠️ GITHUB_TOKEN not set, skipping binary conversion")
+        return False
+    
+    try:
+        logger.info(f"🔄 Converting {file_path} from base64 text to binary image...")
+        
+        # Get the current file SHA (needed for updates)
+        file_sha = github_contents.get_sha(file_path, branch_name)
+        if file_sha is None:
+            logger.error(f"❌ Failed to get current file info for {file_path}")
+            return False
+        
+        logger.info(f"📄 Current file SHA: {file_sha}")
+        
+        # Upload the binary content (GitHub API will handle base64 properly)
+        github_contents.put_content(file_path, base64_content, f"{commit_message} (converted to binary)", branch_name, file_sha)
+        logger.info(f"✅ Successfully converted {file_path} to binary image")
+        return True
+            
+    except (GitHubAPIError, requests.exceptions.RequestException) as e:
+        logger.error(f"❌ Failed to convert to binary: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"❌ Error converting to binary: {e}")
+        return False
+
+@traced("github.branch_check")
+def check_branch_exists(branch_name):
+    """Check if a branch exists in the repository using list_branches"""
+    logger.info(f"🔍 Checking if branch exists: {branch_name}")
+    
+    try:
+        result = call_github_mcp_tool("list_branches", {
+            "owner": "linsun",
+            "repo": GITHUB_REPO
+        })
+        
+        logger.info(f"🔍 List branches result: {result}")
+        
+        if result and "content" in result:
+            # Parse the response to get branch list
+            branches_data = result["content"]
+            logger.info(f"🔍 Branches data type: {type(branches_data)}")
+            logger.info(f"🔍 Branches data: {branches_data}")
+            
+            if isinstance(branches_data, list):
+                branch_names = []
+                for branch_info in branches_data:
+                    logger.info(f"🔍 Processing branch info: {branch_info}")
+                    if isinstance(branch_info, dict) and "text" in branch_info:
+                        # Extract branch names from the text content
+                        text = branch_info["text"]
+                        logger.info(f"🔍 Branch text content: {text}")
+                        
+                        # Try different parsing approaches
+                        if "name:" in text.lower():
+                            # Parse branch name from format like "name: branch-name"
+                            lines = text.split('\n')
+                            for line in lines:
+                                if line.strip().lower().startswith('name:'):
+                                    name = line.split(':', 1)[1].strip()
+                                    branch_names.append(name)
+                        elif branch_name in text:
+                            # Simple substring match as fallback
+                            branch_names.append(branch_name)
+                        else:
+                            # Try to extract any potential branch name from text
+                            words = text.strip().split()
+                            if words:
+                                # Assume first word might be branch name
+                                potential_name = words[0].strip()
+                                branch_names.append(potential_name)
+                
+                branch_exists = branch_name in branch_names
+                logger.info(f"📝 Extracted branch names: {branch_names}")
+                
+                if branch_exists:
+                    logger.info(f"✅ Branch {branch_name} found in list")
+                    return True
+                else:
+                    logger.info(f"❌ Branch {branch_name} not found in list")
+                    return False
+            else:
+                logger.warning(f"⚠️ Unexpected branches data format: {type(branches_data)}")
+                return False
+        else:
+            logger.warning("⚠️ No branches data returned or missing 'content' key")
+            return False
+            
+    except Exception as e:
+        logger.error(f"❌ Error checking branch existence: {e}")
+        # Assume branch doesn't exist if we can't check
+        return False
+
+@traced("github.branch_create", error_if=lambda ok: not ok)
+def create_branch_with_retry(branch_name, max_retries=3):
+    """Create branch with retry logic, backing off between attempts"""
+    for attempt in range(max_retries):
+        try:
+            logger.info(f"🌿 Creating branch: {branch_name} (attempt {attempt + 1}/{max_retries})")
+            
+            create_branch_result = call_github_mcp_tool("create_branch", {
+                "repo": GITHUB_REPO,
+                "owner": "linsun",
+                "branch": branch_name,
+                "from_branch": "main"
+            })
+            
+            if create_branch_result:
+                logger.info(f"✅ Successfully created branch: {branch_name}")
+                return True
+            else:
+                logger.warning(f"⚠️ Branch creation attempt {attempt + 1} failed")
+                
+        except Exception as e:
+            logger.error(f"❌ Branch creation attempt {attempt + 1} error: {e}")
+
+        if breakers.get(github_mcp.endpoint).state == OPEN:
+            logger.warning("⚡ GitHub MCP server is down, not retrying branch creation")
+            break
+        if attempt < max_retries - 1:
+            # An attempt that timed out may still have created the branch
+            if check_branch_exists(branch_name):
+                logger.info(f"✅ Branch {branch_name} exists after all")
+                return True
+            delay = backoff_delay(attempt + 1)
+            logger.info(f"🔄 Retrying branch creation in {delay:.2f}s...")
+            time.sleep(delay)
+    
+    logger.error(f"❌ Failed to create branch after {max_retries} attempts")
+    return False
+
+# How a create_or_update_file that lost a race for the branch head reads
+# ("409 ... is at <sha> but expected <sha>")
+_CONFLICT = re.compile(r"\b409\b|conflict|is at [0-9a-f]+ but expected", re.IGNORECASE)
+
+
+def _tool_error(result):
+    """Error text of a tool result the MCP server flagged with isError, else None"""
+    if isinstance(result, dict) and result.get("isError"):
+        texts = [item.get("text", "") for item in result.get("content", []) if isinstance(item, dict)]
+        return " ".join(texts) or "tool error"
+    return None
+
+def put_file_via_mcp(tool_name, arguments):
+    """Create or update a file through the GitHub MCP server; returns (result or None, conflicted)
+
+    The report and images are committed to one branch at the same time, so
+    a commit can lose the race for the branch head; like the direct API
+    upload, that is retried after a short backoff. conflicted is True when
+    every retry conflicted, so callers do not try other variants.
+    """
+    for attempt in range(CONFLICT_RETRIES + 1):
+        result = call_github_mcp_tool(tool_name, arguments)
+        error = _tool_error(result)
+        if error is None:
+            return result, False
+        if not _CONFLICT.search(error):
+            logger.error(f"❌ GitHub MCP {tool_name} of {arguments['path']} failed: {truncate(error)}")
+            return None, False
+        if attempt < CONFLICT_RETRIES:
+            delay = backoff_delay(attempt + 1)
+            logger.info(f"🔄 {arguments['path']} lost a race for {arguments['branch']}, retrying in {delay:.2f}s")
+            time.sleep(delay)
+    logger.error(f"❌ {arguments['path']} still conflicts after {CONFLICT_RETRIES} retries")
+    return None, True
+
+def _upload_image_via_mcp(label, path, image_content, message, branch_name):
+    """Upload base64 image text through the GitHub MCP server, trying the variants it has accepted before"""
+    arguments = {
+        "owner": "linsun",
+        "repo": GITHUB_REPO,
+        "path": path,
+        "content": image_content,
+        "message": message,
+        "branch": branch_name
+    }
+    variants = [
+        # GitHub API standard format (no encoding parameter - auto-detection)
+        ("GitHub API standard format", "create_or_update_file", arguments),
+        ("explicit encoding", "create_or_update_file", dict(arguments, encoding="base64")),
+        ("create_file tool", "create_file", arguments),
+    ]
+    result = None
+    for variant, tool_name, variant_arguments in variants:
+        logger.info(f"📸 Uploading {label} with {variant}")
+        result, conflicted = put_file_via_mcp(tool_name, variant_arguments)
+        if result or conflicted:
+            # A conflict is not the format's fault; another variant would not help
+            break
+    
+    # Storing it as a .b64 file (experimental) is only worth it when the server rejected every format
+    if not result and not conflicted:
+        logger.info(f"📸 EXPERIMENTAL: Storing {label} as .b64 file...")
+        result, _ = put_file_via_mcp("create_or_update_file", dict(arguments, path=f"{path}.b64"))
+        if result:
+            logger.warning(f"⚠️ {label} stored as .b64 file - manual conversion needed")
+            return result
+    
+    if result:
+        # The MCP server stores the base64 as text; rewrite it as the binary image
+        if convert_base64_to_binary_image(path, image_content, branch_name, message):
+            logger.info(f"🔄 {label} converted to binary format")
+        else:
+            logger.warning(f"⚠️ {label} remains as base64 text (check GITHUB_TOKEN)")
+    return result
+
+def upload_image(label, image_bytes, path, message, branch_name):
+    """Upload one JPEG, through the GitHub contents API when a token is set and the MCP server otherwise
+
+    The direct route sends the image once and stores it as binary; the MCP
+    route sends it twice (text upload, then conversion) and is only used
+    when there is no token or the direct upload failed.
+    """
+    image_content = base64.b64encode(image_bytes).decode('utf-8')
+    logger.info(f"📸 {label} size: {len(image_bytes)} bytes, base64 length: {len(image_content)}")
+    logger.debug("📸 %s base64 preview: %s", label, truncate(image_content, 50))
+    
+    # Verify it's a valid JPEG by checking header
+    if image_bytes.startswith(b'\xff\xd8\xff'):
+        logger.info(f"✅ {label} is a valid JPEG file")
+    else:
+        logger.warning(f"⚠️ {label} doesn't appear to be a valid JPEG")
+    
+    if github_contents.enabled:
+        try:
+            github_contents.put_content(path, image_content, message, branch_name)
+            current_span().set_attribute("route", "direct")
+            logger.info(f"✅ {label} uploaded as binary through the GitHub API")
+            return True
+        except (GitHubAPIError, requests.exceptions.RequestException) as e:
+            logger.warning(f"⚠️ Direct upload of {label} failed ({e}), falling back to the GitHub MCP server")
+    
+    current_span().set_attribute("route", "mcp")
+    return bool(_upload_image_via_mcp(label, path, image_content, message, branch_name))
+
+def _upload_report(path, analysis_report, branch_name):
+    """Upload the markdown report, through the GitHub contents API when a token is set and the MCP server otherwise"""
+    logger.info(f"📄 Uploading analysis report to {path}")
+    message = f"Add engagement analysis report for {EVENT_NAME}"
+    with span("github.upload", file="report"):
+        if github_contents.enabled:
+            try:
+                github_contents.put_content(path, base64.b64encode(analysis_report.encode("utf-8")).decode("ascii"),
+                                            message, branch_name)
+                current_span().set_attribute("route", "direct")
+                return True
+            except (GitHubAPIError, requests.exceptions.RequestException) as e:
+                logger.warning(f"⚠️ Direct upload of the report failed ({e}), falling back to the GitHub MCP server")
+        current_span().set_attribute("route", "mcp")
+        result, _ = put_file_via_mcp("create_or_update_file", {
+            "owner": "linsun",
+            "repo": GITHUB_REPO,
+            "path": path,
+            "content": analysis_report,
+            "message": message,
+            "branch": branch_name
+        })
+        return bool(result)
+
+def _upload_image_file(label, image_bytes, path, message, branch_name):
+    logger.info(f"📸 Uploading {label}")
+    with span("github.upload", file=label):
+        return upload_image(label, image_bytes, path, message, branch_name)
+
+def _timed(upload):
+    """Run one upload; return (ok, exception or None, seconds)"""
+    started = time.perf_counter()
+    try:
+        ok, error = upload(), None
+    except Exception as e:
+        ok, error = False, e
+    return ok, error, time.perf_counter() - started
+
+@traced("github.store")
+def store_engagement_analysis_to_github(image1_bytes, image2_bytes, analysis_data):
+    """Store engagement analysis results and the two captured JPEGs to GitHub"""
+    logger.info(f"📁 Storing engagement analysis to GitHub for event: {EVENT_NAME}")
+    
+    # Health is probed in the background; checking it costs no request
+    if not github_mcp.healthy():
+        logger.error(f"❌ GitHub MCP server is down: {github_mcp.last_error or 'circuit open'}")
+        return {
+            "success": False, 
+            "error": "Cannot connect to GitHub MCP server. Please check server status and network connectivity."
+        }
+    
+    try:
+        # Create branch name from event name
+        branch_name = EVENT_NAME.lower().replace(' ', '-')
+        folder_path = f"events/{EVENT_NAME}"
+        
+        # Generate timestamp for unique filenames
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        # 1. Check if branch exists first
+        branch_exists = check_branch_exists(branch_name)
+        
+        if not branch_exists:
+            # Try to create branch with retry logic
+            branch_created = create_branch_with_retry(branch_name)
+            if not branch_created:
+                logger.warning("⚠️ Branch creation failed, will try to use main branch")
+                branch_name = "main"  # Fallback to main branch
+                folder_path = f"events/{EVENT_NAME}"
+        else:
+            logger.info(f"📝 Using existing branch: {branch_name}")
+        
+        # 2. Create analysis report
+        analysis_report = build_analysis_report(analysis_data, timestamp)
+        
+        # 3. Upload the report and both images at once, each with its own fallback chain
+        uploads = [
+            (f"analysis_report_{timestamp}.md", "Analysis report",
+             functools.partial(_upload_report, f"{folder_path}/analysis_report_{timestamp}.md", analysis_report, branch_name)),
+        ]
+        for label, ordinal, image_bytes in (("image1", "first", image1_bytes), ("image2", "second", image2_bytes)):
+            uploads.append((
+                f"{label}_{timestamp}.jpg", f"{ordinal.capitalize()} image",
+                functools.partial(_upload_image_file, label, image_bytes, f"{folder_path}/{label}_{timestamp}.jpg",
+                                  f"Add {ordinal} engagement image for {EVENT_NAME}", branch_name)))
+        
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(uploads)) as pool:
+            # A copy of this context per upload keeps their spans under github.store
+            futures = [pool.submit(contextvars.copy_context().run, _timed, upload) for _, _, upload in uploads]
+            results = [future.result() for future in futures]
+        wall_seconds = time.perf_counter() - started
+        
+        uploaded_files = []
+        upload_errors = []
+        timings = {}
+        for (file_name, what, _), (ok, error, seconds) in zip(uploads, results):
+            timings[file_name] = round(seconds, 3)
+            if ok:
+                uploaded_files.append(file_name)
+                logger.info(f"✅ {what} uploaded successfully")
+            elif error is not None:
+                upload_errors.append(f"{what} error: {error}")
+                logger.error(f"❌ {what} upload error: {error}")
+            else:
+                upload_errors.append(f"{what} upload failed")
+                logger.error(f"❌ {what} upload failed")
+        logger.info("⏱️ Upload times: " + ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items())
+                    + f" (wall {wall_seconds * 1000:.0f}ms)")
+        
+        # Return results
+        if len(uploaded_files) > 0:
+            logger.info(f"✅ Successfully uploaded {len(uploaded_files)}/3 files to GitHub")
+            
+            # Validate image uploads by constructing expected URLs
+            validation_info = []
+            full_repo_path = f"linsun/{GITHUB_REPO}"
+            for file_name in uploaded_files:
+                if file_name.endswith('.jpg'):
+                    raw_url = f"https://raw.githubusercontent.com/{full_repo_path}/{branch_name}/{folder_path}/{file_name}"
+                    blob_url = f"https://github.com/{full_repo_path}/blob/{branch_name}/{folder_path}/{file_name}"
+                    validation_info.append({
+                        "file": file_name,
+                        "raw_url": raw_url,
+                        "blob_url": blob_url
+                    })
+            
+            return {
+                "success": True,
+                "branch": branch_name,
+                "folder": folder_path,
+                "files": uploaded_files,
+                "partial": len(uploaded_files) < 3,
+                "errors": upload_errors,
+                "timings": timings,
+                "upload_seconds": round(wall_seconds, 3),
+                "validation_info": validation_info
+            }
+        else:
+            logger.error("❌ Failed to upload any files to GitHub")
+            return {
+                "success": False, 
+                "error": "All file uploads failed",
+                "detailed_errors": upload_errors,
+                "timings": timings
+            }
+            
+    except Exception as e:
+        logger.error(f"❌ Error storing to GitHub: {e}")
+        return {"success": False, "error": str(e)}
@@ -0,0 +1,187 @@
+"""
+Logging configuration shared by the pages
+
+  LOG_FORMAT=text   the familiar "time - LEVEL - message" lines (default)
+  LOG_FORMAT=json   one JSON object per line with the page, stage and
+                    trace id of the span the record was logged in
+
+Request and response bodies are only logged at DEBUG, through log_payload()
+and truncate(), which do no formatting at all unless the record is going to
+be emitted. Records logged with extra={"sample": "<key>"} (and httpx's
+per-request lines) are high-volume; only one in LOG_SAMPLE_EVERY of them is
+kept, carrying a "sampled" count so totals can be scaled back up.
+
+With LOG_SPANS on (the default for json) every finished span is logged as
+a "span.end" record with its duration and status, which is what
+view_logs.py builds its per-stage latency and error summaries from.
+LOG_FILE additionally writes the same lines to a size-rotated file.
+"""
+import os
+import json
+import logging
+import threading
+import logging.handlers
+from datetime import datetime, timezone
+
+from shared.tracing import tracer, current_span, STATUS_ERROR
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "500"))
+LOG_SAMPLE_EVERY = int(os.getenv("LOG_SAMPLE_EVERY", "10"))
+LOG_SPANS = os.getenv("LOG_SPANS", "true" if LOG_FORMAT == "json" else "false").lower() in ("1", "true", "yes")
+LOG_FILE = os.getenv("LOG_FILE", "")
+LOG_FILE_MAX_BYTES = int(os.getenv("LOG_FILE_MAX_BYTES", str(20 * 1024 * 1024)))
+LOG_FILE_BACKUPS = int(os.getenv("LOG_FILE_BACKUPS", "3"))
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Loggers whose INFO records are sampled as a whole
+SAMPLED_LOGGERS = ("httpx",)
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_setup_lock = threading.Lock()
+_configured = False
+
+
+def _shorten(value, limit):
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}... ({len(value)} chars)"
+    if isinstance(value, dict):
+        return {k: _shorten(v, limit) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_shorten(v, limit) for v in value]
+    return value
+
+
+class _Truncated:
+    """Deferred str() of a value, cut to `limit` characters"""
+
+    def __init__(self, value, limit=None):
+        self.value = value
+        self.limit = limit or LOG_MAX_FIELD_CHARS
+
+    def __str__(self):
+        if isinstance(self.value, str):
+            text = self.value
+        else:
+            # Cut long strings (base64 images) before dumping, not after
+            text = json.dumps(_shorten(self.value, self.limit), default=str)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... ({len(text)} chars)"
+
+
+def truncate(value, limit=None):
+    """Shorten a value to LOG_MAX_FIELD_CHARS when (and only if) it is formatted"""
+    return _Truncated(value, limit)
+
+
+def log_payload(logger, label, payload):
+    """Log a request/response body at DEBUG, truncated; free when DEBUG is off"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s: %s", label, truncate(payload))
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in `every` records per sample key; let everything else through"""
+
+    def __init__(self, every=LOG_SAMPLE_EVERY):
+        super().__init__()
+        self.every = max(1, every)
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def filter(self, record):
+        key = getattr(record, "sample", None)
+        if key is None and record.name in SAMPLED_LOGGERS and record.levelno <= logging.INFO:
+            key = record.name
+        if key is None or self.every == 1:
+            return True
+        with self.lock:
+            count = self.counts.get(key, 0) + 1
+            self.counts[key] = count
+        if count % self.every != 1:
+            return False
+        record.sampled = self.every
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, tagged with the current span"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        span = current_span()
+        if span.name:
+            entry["stage"] = span.name
+            entry["trace_id"] = span.trace_id
+            page = span.root.attributes.get("page")
+            if page:
+                entry["page"] = page
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+span_logger = logging.getLogger("spans")
+
+
+def _log_span(span):
+    """Span processor: one span.end record per finished stage"""
+    span_logger.info(
+        "span.end %s %.1fms", span.name, span.duration_ms,
+        extra={
+            "event": "span.end",
+            "stage": span.name,
+            "trace_id": span.trace_id,
+            "page": span.root.attributes.get("page"),
+            "duration_ms": round(span.duration_ms, 1),
+            "error": span.status == STATUS_ERROR,
+        })
+
+
+def setup_logging():
+    """Configure the root logger once per process; later calls do nothing"""
+    global _configured
+    with _setup_lock:
+        if _configured:
+            return
+        _configured = True
+
+        handlers = [logging.StreamHandler()]
+        file_error = None
+        if LOG_FILE:
+            try:
+                os.makedirs(os.path.dirname(LOG_FILE) or ".", exist_ok=True)
+                handlers.append(logging.handlers.RotatingFileHandler(
+                    LOG_FILE, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8"))
+            except OSError as e:
+                # A read-only or missing volume should not take the pages down
+                file_error = e
+        formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+        root = logging.getLogger()
+        # Replace handlers from an earlier basicConfig so lines are not printed twice
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        for handler in handlers:
+            handler.setFormatter(formatter)
+            # Each handler sees the same records, so the counters keep the same ones
+            handler.addFilter(SamplingFilter())
+            root.addHandler(handler)
+        root.setLevel(LOG_LEVEL)
+        if file_error:
+            root.warning(f"⚠️ Cannot write LOG_FILE, logging to stdout only: {file_error}")
+
+        if LOG_SPANS:
+            tracer.add_processor(_log_span)
@@ -0,0 +1,341 @@
+"""
+Minimal MCP (Model Context Protocol) client over streamable HTTP
+
+The MCP servers behind agentgateway answer JSON-RPC either as plain JSON or
+as a Server-Sent Events body; both shapes are handled here.
+
+Pages call tools through mcp_sessions, which keeps one MCPSession per server.
+Streamable HTTP lets many requests share a session at once, each with its
+own JSON-RPC id, so concurrent visitors never wait on each other; only
+(re-)initializing the session is done under a lock. Each thread talks
+through its own requests.Session (requests does not promise that one is
+thread-safe), all of them over the server's one keep-alive pool. Requests go through
+the server's circuit breaker (shared.resilience); tool calls are retried
+only when they are marked idempotent or never reached the server.
+
+Each session also keeps a health state that a background thread refreshes
+every MCP_HEALTH_INTERVAL seconds, so pages can skip work for a server that
+is down without probing it on the visitor's request.
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import itertools
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+from shared.tracing import span
+from shared.logging_setup import log_payload, truncate
+from shared.metrics import record_cache, MCP_HEALTHY
+from shared.resilience import retry_call, timeouts, breakers, OPEN
+from shared.state_store import state_store, mcp_session_key
+
+logger = logging.getLogger(__name__)
+
+# Gateway sessions are shared by every replica through the state store
+MCP_SESSION_TTL_SECONDS = int(os.getenv("MCP_SESSION_TTL_SECONDS", "3600"))
+# Keep-alive connections per MCP server, i.e. calls that can be in flight at once
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "16"))
+MCP_HEALTH_INTERVAL = float(os.getenv("MCP_HEALTH_INTERVAL", "30"))
+MCP_HEALTH_TIMEOUT = float(os.getenv("MCP_HEALTH_TIMEOUT", "2"))
+
+MCP_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json, text/event-stream"
+}
+
+
+class MCPSessionExpired(Exception):
+    """The server no longer knows the session id (HTTP 404 per the MCP spec)"""
+
+
+class MCPInitializeFailed(Exception):
+    """The initialize handshake did not succeed"""
+
+
+# Sessions are shared by replicas, so ids carry a per-process tag as well as
+# a counter (next() on itertools.count is atomic under the GIL)
+_process_tag = uuid.uuid4().hex[:8]
+_request_ids = itertools.count(1)
+
+
+def next_request_id():
+    """JSON-RPC id that no other in-flight call on a shared session uses"""
+    return f"{_process_tag}-{next(_request_ids)}"
+
+
+def parse_mcp_response(response):
+    """Return the JSON-RPC payload of a response (plain JSON or SSE), or None"""
+    if response.headers.get('content-type', '').startswith('text/event-stream'):
+        # Parse SSE format - extract only the data line
+        for line in response.text.strip().split('\n'):
+            if line.startswith('data: '):
+                return json.loads(line[6:])  # Remove "data: " prefix
+        return None
+    return response.json()
+
+
+def cached_session(server_url):
+    """The stored session for a server as {"session_id": ...}, or None if not initialized"""
+    return state_store.get_json(mcp_session_key(server_url))
+
+
+def remember_session(server_url, session_id):
+    state_store.set_json(mcp_session_key(server_url), {"session_id": session_id}, MCP_SESSION_TTL_SECONDS)
+
+
+def forget_session(server_url):
+    state_store.delete(mcp_session_key(server_url))
+
+
+def health_url(server_url):
+    """The gateway's /health next to its /mcp endpoint"""
+    base = server_url.rstrip("/")
+    if base.endswith("/mcp"):
+        base = base[:-len("/mcp")]
+    return f"{base}/health"
+
+
+def _headers(session_id):
+    headers = dict(MCP_HEADERS)
+    if session_id:
+        headers["mcp-session-id"] = session_id
+    return headers
+
+
+def initialize_session(server_url, client_name, timeout=30, notify=False, http=requests, endpoint="mcp"):
+    """Run the MCP initialize handshake; return (ok, session_id)"""
+    init_request = {
+        "jsonrpc": "2.0",
+        "id": next_request_id(),
+        "method": "initialize",
+        "params": {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {
+                "tools": {}
+            },
+            "clientInfo": {
+                "name": client_name,
+                "version": "1.0.0"
+            }
+        }
+    }
+
+    # A fresh session is harmless to ask for twice
+    response = retry_call(endpoint, lambda: http.post(
+        server_url, json=init_request, headers=MCP_HEADERS, timeout=timeouts(timeout)))
+    logger.info(f"🔧 MCP initialize response status: {response.status_code}")
+
+    # Extract session ID from headers
+    session_id = response.headers.get('mcp-session-id')
+    if session_id:
+        logger.info(f"🔧 Extracted MCP session ID: {session_id}")
+
+    if response.status_code != 200:
+        logger.error(f"❌ MCP initialize failed: {response.status_code}")
+        return False, session_id
+
+    if response.text.strip():
+        parse_mcp_response(response)
+
+    if notify:
+        http.post(
+            server_url,
+            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+            headers=_headers(session_id),
+            timeout=timeouts(timeout)
+        )
+    return True, session_id
+
+
+def call_tool(server_url, tool_name, arguments, session_id=None, timeout=60, request_id=None, http=requests,
+              endpoint="mcp", idempotent=False):
+    """Call an MCP tool and return the JSON-RPC result, or None on failure
+
+    Raises MCPSessionExpired when the server has dropped the session so the
+    caller can initialize a new one, and CircuitOpen while the server is
+    considered down.
+    """
+    request_id = request_id or next_request_id()
+    mcp_request = {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {
+            "name": tool_name,
+            "arguments": arguments
+        }
+    }
+
+    log_payload(logger, f"🌐 MCP request {request_id}", mcp_request)
+    response = retry_call(endpoint, lambda: http.post(
+        server_url, json=mcp_request, headers=_headers(session_id), timeout=timeouts(timeout)), idempotent)
+    logger.info("🌐 MCP response status for %s: %s", tool_name, response.status_code, extra={"sample": "mcp.response"})
+    log_payload(logger, f"🌐 MCP response {request_id}", response.text)
+
+    if response.status_code == 404 and session_id:
+        raise MCPSessionExpired(session_id)
+    if response.status_code != 200:
+        logger.error("❌ MCP HTTP Error: %s - %s", response.status_code, truncate(response.text))
+        return None
+
+    try:
+        response_data = parse_mcp_response(response)
+    except json.JSONDecodeError as e:
+        logger.error(f"❌ Failed to parse MCP response: {e}")
+        return None
+    if response_data is None:
+        logger.error("❌ No data line found in MCP SSE response")
+        return None
+
+    if response_data.get("id") not in (None, request_id):
+        logger.error(f"❌ MCP response id {response_data.get('id')} does not match request {request_id}")
+        return None
+
+    if "error" in response_data:
+        logger.error(f"❌ MCP Error: {response_data['error']}")
+        return None
+
+    return response_data.get("result", {})
+
+
+class MCPSession:
+    """A session with one MCP server, shared by every thread that calls it"""
+
+    def __init__(self, server_url, client_name, name, notify=False):
+        self.server_url = server_url
+        self.client_name = client_name
+        self.name = name
+        self.notify = notify
+        self.endpoint = f"mcp-{name}"
+        self.health_url = health_url(server_url)
+        self.probe_ok = True
+        self.last_error = None
+        self._checker = None
+        self.lock = threading.Lock()
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MCP_POOL_SIZE)
+        self.local = threading.local()
+
+    @property
+    def http(self):
+        """This thread's requests.Session, sharing the server's connection pool"""
+        http = getattr(self.local, "http", None)
+        if http is None:
+            http = self.local.http = requests.Session()
+            http.mount("http://", self.adapter)
+            http.mount("https://", self.adapter)
+        return http
+
+    def session_id(self):
+        """Current session id, initializing a session if nobody has yet"""
+        session = cached_session(self.server_url)
+        record_cache(f"{self.name}_mcp_session", session is not None)
+        if session is None:
+            with self.lock:
+                # Another thread may have finished initializing while we waited
+                session = cached_session(self.server_url)
+                if session is None:
+                    session = {"session_id": self._initialize()}
+        return session["session_id"]
+
+    def _initialize(self):
+        with span("mcp.initialize", server=self.name):
+            logger.info(f"🔧 Initializing {self.name} MCP session...")
+            try:
+                ok, session_id = initialize_session(self.server_url, self.client_name, notify=self.notify,
+                                                     http=self.http, endpoint=self.endpoint)
+            except requests.exceptions.RequestException as e:
+                raise MCPInitializeFailed(str(e)) from e
+            if not ok:
+                raise MCPInitializeFailed(f"{self.name} MCP initialize failed")
+            remember_session(self.server_url, session_id)
+            logger.info(f"✅ {self.name} MCP session initialized successfully")
+            return session_id
+
+    def healthy(self):
+        """Last known state of the server; never makes a request on the caller's thread
+
+        Down when the last health probe failed or the server's circuit
+        breaker is open. Until the first probe has finished it is assumed up.
+        """
+        self._start_health_checks()
+        return self.probe_ok and breakers.get(self.endpoint).state != OPEN
+
+    def probe(self):
+        try:
+            status = self.http.get(self.health_url, timeout=MCP_HEALTH_TIMEOUT).status_code
+        except requests.exceptions.RequestException as e:
+            self._mark(False, e)
+            return
+        # A server without a health endpoint is judged by its calls alone
+        self._mark(status in (200, 404, 405), f"HTTP {status}")
+
+    def _mark(self, ok, error=None):
+        if ok != self.probe_ok:
+            if ok:
+                logger.info(f"✅ {self.name} MCP server is healthy again")
+            else:
+                logger.warning(f"⚠️ {self.name} MCP server health check failed: {error}")
+        self.probe_ok = ok
+        self.last_error = None if ok else str(error)
+        MCP_HEALTHY.labels(server=self.name).set(1 if ok else 0)
+
+    def _start_health_checks(self):
+        if self._checker is not None or MCP_HEALTH_INTERVAL <= 0:
+            return
+        with self.lock:
+            if self._checker is not None:
+                return
+            self._checker = threading.Thread(target=self._check_loop, name=f"mcp-health-{self.name}", daemon=True)
+            self._checker.start()
+
+    def _check_loop(self):
+        while True:
+            self.probe()
+            time.sleep(MCP_HEALTH_INTERVAL)
+
+    def invalidate(self, session_id):
+        """Forget an expired session unless another thread already replaced it"""
+        with self.lock:
+            session = cached_session(self.server_url)
+            if session is not None and session["session_id"] == session_id:
+                forget_session(self.server_url)
+
+    def call(self, tool_name, arguments, timeout=60, idempotent=False):
+        """Call a tool, re-initializing once if the server dropped the session
+
+        Pass idempotent=True for read-only tools so timeouts and 5xx answers
+        are retried too. Raises MCPInitializeFailed when no session can be
+        set up and CircuitOpen while the server is considered down.
+        """
+        session_id = self.session_id()
+        try:
+            return call_tool(self.server_url, tool_name, arguments, session_id, timeout, http=self.http,
+                             endpoint=self.endpoint, idempotent=idempotent)
+        except MCPSessionExpired:
+            # The server never ran the call, so it is safe to send it again
+            logger.warning(f"⚠️ {self.name} MCP session expired, re-initializing")
+            self.invalidate(session_id)
+            return call_tool(self.server_url, tool_name, arguments, self.session_id(), timeout, http=self.http,
+                             endpoint=self.endpoint, idempotent=idempotent)
+
+
+class MCPSessionPool:
+    """One MCPSession per server URL, created on first use"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+
+    def get(self, server_url, client_name, name, notify=False):
+        with self.lock:
+            session = self.sessions.get(server_url)
+            if session is None:
+                session = self.sessions[server_url] = MCPSession(server_url, client_name, name, notify)
+            return session
+
+
+mcp_sessions = MCPSessionPool()
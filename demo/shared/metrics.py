@@ -0,0 +1,204 @@
+"""
+Prometheus metrics for model calls, TTS, STT, MCP and caches
+
+Metrics are served on a side port next to Streamlit (METRICS_PORT, default
+8002). Every traced stage is counted and timed automatically through a span
+processor; Ollama streams additionally report time-to-first-token and
+tokens/sec from the final chunk's eval_count/eval_duration.
+
+prometheus_client is optional - without it every metric is a no-op.
+"""
+import os
+import time
+import logging
+import threading
+
+from shared.tracing import tracer, STATUS_ERROR
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, start_http_server
+except ImportError:
+    Counter = Gauge = Histogram = start_http_server = None
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "8002"))
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+TOKEN_RATE_BUCKETS = (1, 2, 5, 10, 20, 40, 60, 80, 100, 150, 200)
+
+
+class _NoopMetric:
+    """Accepts every prometheus_client call and does nothing"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+def _metric(kind, name, documentation, labelnames, **kwargs):
+    if kind is None:
+        return _NoopMetric()
+    return kind(name, documentation, labelnames, **kwargs)
+
+
+MODEL_REQUESTS = _metric(
+    Counter, "demo_model_requests_total",
+    "Ollama chat requests by model, task and outcome", ["model", "task", "status"])
+MODEL_LATENCY = _metric(
+    Histogram, "demo_model_request_seconds",
+    "Wall time of an Ollama chat request including streaming", ["model", "task"],
+    buckets=LATENCY_BUCKETS)
+MODEL_TTFT = _metric(
+    Histogram, "demo_model_time_to_first_token_seconds",
+    "Time until the first non-empty content chunk", ["model", "task"],
+    buckets=LATENCY_BUCKETS)
+MODEL_TOKENS_PER_SECOND = _metric(
+    Histogram, "demo_model_tokens_per_second",
+    "Generation speed reported by Ollama (eval_count / eval_duration)", ["model", "task"],
+    buckets=TOKEN_RATE_BUCKETS)
+MODEL_TOKENS = _metric(
+    Counter, "demo_model_tokens_total",
+    "Prompt and completion tokens reported by Ollama", ["model", "task", "kind"])
+MODEL_INFLIGHT = _metric(
+    Gauge, "demo_model_inflight_requests",
+    "Ollama chat requests currently streaming", ["model"])
+
+STAGE_REQUESTS = _metric(
+    Counter, "demo_stage_requests_total",
+    "Traced pipeline stages (TTS, STT, MCP, uploads, ...) by outcome", ["stage", "status"])
+STAGE_LATENCY = _metric(
+    Histogram, "demo_stage_seconds",
+    "Duration of traced pipeline stages", ["stage"],
+    buckets=LATENCY_BUCKETS)
+
+QUEUE_WAIT = _metric(
+    Histogram, "demo_model_queue_wait_seconds",
+    "Time a request waited for an Ollama slot in the scheduler", ["model"],
+    buckets=LATENCY_BUCKETS)
+QUEUE_DEPTH = _metric(
+    Gauge, "demo_model_queue_depth",
+    "Requests waiting for an Ollama slot", ["model"])
+QUEUE_REJECTED = _metric(
+    Counter, "demo_model_queue_rejected_total",
+    "Requests turned away by the scheduler", ["model", "reason"])
+
+BACKEND_REQUESTS = _metric(
+    Counter, "demo_ollama_backend_requests_total",
+    "Requests routed to each Ollama backend by outcome", ["backend", "status"])
+BACKEND_INFLIGHT = _metric(
+    Gauge, "demo_ollama_backend_inflight_requests",
+    "Requests currently running on each Ollama backend", ["backend"])
+BACKEND_HEALTHY = _metric(
+    Gauge, "demo_ollama_backend_healthy",
+    "1 while an Ollama backend is in rotation", ["backend"])
+
+MCP_HEALTHY = _metric(
+    Gauge, "demo_mcp_server_healthy",
+    "1 while the last health probe of an MCP server succeeded", ["server"])
+
+BREAKER_STATE = _metric(
+    Gauge, "demo_circuit_breaker_state",
+    "Circuit breaker per dependency: 0 closed, 1 half-open, 2 open", ["endpoint"])
+BREAKER_TRANSITIONS = _metric(
+    Counter, "demo_circuit_breaker_transitions_total",
+    "Circuit breaker state changes by the state entered", ["endpoint", "state"])
+BREAKER_REJECTED = _metric(
+    Counter, "demo_circuit_breaker_rejected_total",
+    "Calls failed fast because the dependency's breaker was open", ["endpoint"])
+RETRIES = _metric(
+    Counter, "demo_outbound_retries_total",
+    "Retried calls to other services by the failure that caused them", ["endpoint", "reason"])
+
+CACHE_REQUESTS = _metric(
+    Counter, "demo_cache_requests_total",
+    "Cache lookups by cache name and result", ["cache", "result"])
+
+_server_lock = threading.Lock()
+_server_started = False
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Serve /metrics once per process; safe to call on every Streamlit rerun"""
+    global _server_started
+    if _server_started or not METRICS_ENABLED or start_http_server is None:
+        return
+    with _server_lock:
+        if _server_started:
+            return
+        try:
+            start_http_server(port)
+            logger.info(f"📈 Prometheus metrics served on :{port}/metrics")
+        except OSError as e:
+            logger.warning(f"⚠️ Could not start metrics server on :{port}: {e}")
+        _server_started = True
+
+
+def record_cache(cache, hit):
+    """Count a cache lookup so hit rates can be graphed"""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def observe_chat_stats(model, task, chunk):
+    """Record token counts and generation speed from a final Ollama chunk"""
+    eval_count = chunk.get("eval_count") or 0
+    eval_duration = chunk.get("eval_duration") or 0
+    prompt_eval_count = chunk.get("prompt_eval_count") or 0
+    if eval_count and eval_duration:
+        MODEL_TOKENS_PER_SECOND.labels(model=model, task=task).observe(eval_count / (eval_duration / 1e9))
+    if eval_count:
+        MODEL_TOKENS.labels(model=model, task=task, kind="completion").inc(eval_count)
+    if prompt_eval_count:
+        MODEL_TOKENS.labels(model=model, task=task, kind="prompt").inc(prompt_eval_count)
+
+
+def instrument_chat_stream(stream, model, task):
+    """Pass an Ollama chat stream through while recording latency metrics"""
+    started = time.perf_counter()
+    first_token = False
+    status = "error"
+    MODEL_INFLIGHT.labels(model=model).inc()
+    try:
+        for chunk in stream:
+            if not first_token and chunk["message"]["content"]:
+                first_token = True
+                MODEL_TTFT.labels(model=model, task=task).observe(time.perf_counter() - started)
+            if chunk.get("done"):
+                observe_chat_stats(model, task, chunk)
+            yield chunk
+        status = "ok"
+    finally:
+        MODEL_INFLIGHT.labels(model=model).dec()
+        MODEL_REQUESTS.labels(model=model, task=task, status=status).inc()
+        MODEL_LATENCY.labels(model=model, task=task).observe(time.perf_counter() - started)
+
+
+def observe_chat_response(response, model, task, seconds):
+    """Record metrics for a non-streaming Ollama chat response (None on failure)"""
+    status = "ok" if response is not None else "error"
+    MODEL_REQUESTS.labels(model=model, task=task, status=status).inc()
+    MODEL_LATENCY.labels(model=model, task=task).observe(seconds)
+    if response is not None:
+        observe_chat_stats(model, task, response)
+
+
+def _record_span(span):
+    status = "error" if span.status == STATUS_ERROR else "ok"
+    STAGE_REQUESTS.labels(stage=span.name, status=status).inc()
+    STAGE_LATENCY.labels(stage=span.name).observe(span.duration_ms / 1000)
+
+
+if Counter is not None:
+    tracer.add_processor(_record_span)
@@ -0,0 +1,153 @@
+"""
+Which Ollama model runs each task
+
+Every model call names its task. Tasks belong to a role, and each role has
+a model:
+
+  vision      looks at the camera images (mood/engagement analysis, comparison)
+  summarize   condenses text that is already there (the voice summaries)
+  chat        the conversation pages and slide content
+
+Summaries only read text, so they run on the small chat model by default
+instead of keeping llava busy with work that needs no eyes.
+
+  VISION_MODEL=llava
+  SUMMARY_MODEL=llama3.2
+  CHAT_MODEL=llama3.2
+  TASK_MODELS="engagement_compare=llama3.2"    per-task overrides
+
+A task moved to a model that cannot see (anything not listed in
+VISION_CAPABLE_MODELS) is sent the text only, without the images.
+
+Each task also has generation options sent with every request, so a
+prompt asking for "exactly 5 words" cannot turn into a 300-token answer:
+num_predict caps the answer a little above what the prompt asks for,
+and the one-line summaries run at a low temperature and end at the first
+line break. GENERATION_OPTIONS (JSON) overrides them per task:
+
+  GENERATION_OPTIONS='{"mood_summary": {"num_predict": 12}, "engagement_summary": {"stop": []}}'
+
+num_ctx is set per model rather than per task (MODEL_NUM_CTX="llava=4096"):
+Ollama reloads a model whenever a request asks for a different context
+size, so every task on a model, and the warmup, must use the same one.
+"""
+import os
+import json
+import logging
+
+from shared.config import parse_pairs
+
+logger = logging.getLogger(__name__)
+
+VISION_MODEL = os.getenv("VISION_MODEL", "llava")
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "llama3.2")
+CHAT_MODEL = os.getenv("CHAT_MODEL", "llama3.2")
+TASK_MODELS = os.getenv("TASK_MODELS", "")
+GENERATION_OPTIONS = os.getenv("GENERATION_OPTIONS", "")
+MODEL_NUM_CTX = os.getenv("MODEL_NUM_CTX", "")
+VISION_CAPABLE_MODELS = os.getenv(
+    "VISION_CAPABLE_MODELS", "llava,bakllava,llava-llama3,llava-phi3,llama3.2-vision,moondream,minicpm-v")
+
+ROLE_MODELS = {
+    "vision": VISION_MODEL,
+    "summarize": SUMMARY_MODEL,
+    "chat": CHAT_MODEL,
+}
+
+TASK_ROLES = {
+    "chat": "chat",
+    "slides_content": "chat",
+    "mood_analysis": "vision",
+    "engagement_analysis": "vision",
+    # Looks at both pictures again next to the two analyses
+    "engagement_compare": "vision",
+    "mood_summary": "summarize",
+    "engagement_summary": "summarize",
+}
+
+# Roughly 1.3 tokens per English word, plus headroom so an answer that is
+# a little long is not cut mid-sentence. The summaries are spoken as one
+# line (the prompts ask for just that), so they stop at the first line break.
+TASK_OPTIONS = {
+    "chat": {"num_predict": 1024},
+    "slides_content": {"num_predict": 768},
+    "mood_analysis": {"num_predict": 100},            # "within 50 words"
+    "engagement_analysis": {"num_predict": 64},       # "within 30 words"
+    "engagement_compare": {"num_predict": 80},        # "within 40 words"
+    "mood_summary": {"num_predict": 24, "temperature": 0.3, "stop": ["\n"]},         # "exactly 5 words"
+    "engagement_summary": {"num_predict": 48, "temperature": 0.3, "stop": ["\n"]},   # "less than 15 words"
+}
+
+
+def parse_task_models(text):
+    """Parse 'mood_summary=llava,chat=llama3.1' into {'mood_summary': 'llava', 'chat': 'llama3.1'}"""
+    return parse_pairs(text, setting="TASK_MODELS")
+
+
+def parse_generation_options(text):
+    """Parse the GENERATION_OPTIONS JSON into {task: options}; invalid entries are ignored"""
+    if not text.strip():
+        return {}
+    try:
+        options = json.loads(text)
+    except ValueError as e:
+        logger.warning(f"⚠️ Ignoring GENERATION_OPTIONS, not valid JSON: {e}")
+        return {}
+    if not isinstance(options, dict):
+        logger.warning(f"⚠️ Ignoring GENERATION_OPTIONS, expected an object of tasks: {text}")
+        return {}
+    parsed = {}
+    for task, value in options.items():
+        if isinstance(value, dict):
+            parsed[task] = value
+        else:
+            logger.warning(f"⚠️ Ignoring GENERATION_OPTIONS for {task}, expected an object of options: {value!r}")
+    return parsed
+
+
+def parse_num_ctx(text):
+    """Parse 'llava=4096,llama3.2=8192' into {'llava': 4096, 'llama3.2': 8192}"""
+    return parse_pairs(text, int, "MODEL_NUM_CTX")
+
+
+_task_models = {task: ROLE_MODELS[role] for task, role in TASK_ROLES.items()}
+_task_models.update(parse_task_models(TASK_MODELS))
+_vision_capable = {name.strip() for name in VISION_CAPABLE_MODELS.split(",") if name.strip()}
+_task_options = {task: dict(options) for task, options in TASK_OPTIONS.items()}
+for _task, _options in parse_generation_options(GENERATION_OPTIONS).items():
+    _task_options.setdefault(_task, {}).update(_options)
+_num_ctx = parse_num_ctx(MODEL_NUM_CTX)
+
+
+def model_for(task):
+    """Model that runs a task; unknown tasks run on the chat model"""
+    return _task_models.get(task, CHAT_MODEL)
+
+
+def model_options(model):
+    """Options every request to this model must carry (num_ctx), also used by the warmup"""
+    if model in _num_ctx:
+        return {"num_ctx": _num_ctx[model]}
+    return {}
+
+
+def generation_options(task, model=None):
+    """Ollama options for one request of this task on its model"""
+    options = dict(_task_options.get(task, {}))
+    options.pop("num_ctx", None)
+    options.update(model_options(model or model_for(task)))
+    return options
+
+
+def sees_images(model):
+    """True when the model accepts images (the tag after ':' is ignored)"""
+    return model == VISION_MODEL or model.split(":")[0] in _vision_capable
+
+
+def configured_models():
+    """Every model some task runs on, vision model first, for warmup"""
+    models = [VISION_MODEL]
+    for model in _task_models.values():
+        if model not in models:
+            models.append(model)
+    return models
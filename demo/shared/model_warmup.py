@@ -0,0 +1,141 @@
+"""
+Keep the demo's models loaded so the first visitor does not pay for it
+
+Ollama unloads a model after keep_alive (5 minutes by default), and the next
+request then spends seconds in load_duration. start_model_warmup() loads
+every configured model with a zero-token generate request as soon as the
+app starts, passes a per-model keep_alive, and reloads the models on a
+timer during event hours so they stay resident while the booth is open.
+Warm-up requests count as in flight on their backend like routed ones, so
+the router sends visitors elsewhere while a model loads, and they go
+through the backend's circuit breaker: a host that is down is skipped.
+
+  WARMUP_MODELS="llama3.2,llava"               warmed on every backend the router knows
+                                               (default: every model in shared/model_config.py)
+  MODEL_KEEP_ALIVE="llava=2h,llama3.2=2h"     per-model keep_alive
+  MODEL_KEEP_ALIVE_DEFAULT=1h
+  WARMUP_REFRESH_SECONDS=240                   0 disables the timer
+  WARMUP_HOURS="08:30-18:00"                   only refresh in this window (local time)
+"""
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+
+from shared.config import parse_pairs
+from shared.tracing import span
+from shared.resilience import CircuitOpen
+from shared.ollama_router import router
+from shared.model_config import configured_models, model_options
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", ",".join(configured_models()))
+MODEL_KEEP_ALIVE = os.getenv("MODEL_KEEP_ALIVE", "")
+MODEL_KEEP_ALIVE_DEFAULT = os.getenv("MODEL_KEEP_ALIVE_DEFAULT", "1h")
+WARMUP_REFRESH_SECONDS = float(os.getenv("WARMUP_REFRESH_SECONDS", "240"))
+WARMUP_HOURS = os.getenv("WARMUP_HOURS", "")
+
+
+def warmup_targets(text):
+    """Parse 'llama3.2,llava' into [(model, backend)] for every routed backend"""
+    models = []
+    for model in text.split(","):
+        if model.strip():
+            models.extend((model.strip(), backend) for backend in router.backends_for(model.strip()))
+    return models
+
+
+def parse_keep_alive(text):
+    """Parse 'llava=2h,llama3.2=30m' into {'llava': '2h', 'llama3.2': '30m'}"""
+    return parse_pairs(text, setting="MODEL_KEEP_ALIVE")
+
+
+_keep_alive = parse_keep_alive(MODEL_KEEP_ALIVE)
+
+
+def keep_alive_for(model):
+    """keep_alive to send with every request for this model"""
+    return _keep_alive.get(model, MODEL_KEEP_ALIVE_DEFAULT)
+
+
+def within_hours(hours=WARMUP_HOURS, now=None):
+    """True when `now` falls inside an 'HH:MM-HH:MM' window (always when unset)"""
+    if not hours:
+        return True
+    start, _, end = hours.partition("-")
+    current = (now or datetime.now()).strftime("%H:%M")
+    start, end = start.strip().zfill(5), end.strip().zfill(5)
+    if start <= end:
+        return start <= current < end
+    # Window crossing midnight, e.g. 18:00-02:00
+    return current >= start or current < end
+
+
+def warm_model(model, backend):
+    """Load one model on one backend with a zero-token request; returns the wall time in seconds"""
+    with span("model.warmup", model=model, backend=backend.url) as current:
+        try:
+            backend.breaker.before_call()
+        except CircuitOpen as e:
+            logger.debug(f"🔥 Not warming {model} at {backend.url}: {e}")
+            return None
+        backend.started()
+        started = time.perf_counter()
+        try:
+            # Same num_ctx as the real requests, or Ollama would load the model twice
+            response = backend.client.generate(model=model, prompt="", keep_alive=keep_alive_for(model),
+                                               options=model_options(model) or None)
+        except Exception as e:
+            backend.finished(error=e)
+            current.record_exception(e)
+            logger.warning(f"⚠️ Could not warm up {model} at {backend.url}: {e}")
+            return None
+        # No latency sample: a load is not what visitors' requests see
+        backend.finished()
+        load_seconds = (response.get("load_duration") or 0) / 1e9
+        current.set_attribute("load_ms", round(load_seconds * 1000, 1))
+        if load_seconds > 0.1:
+            logger.info(f"🔥 Loaded {model} on {backend.url} in {load_seconds:.1f}s (keep_alive {keep_alive_for(model)})")
+        else:
+            logger.debug(f"🔥 {model} already loaded")
+        return time.perf_counter() - started
+
+
+def warm_all(models=None):
+    """Warm every configured model, one after the other"""
+    for model, backend in models or warmup_targets(WARMUP_MODELS):
+        warm_model(model, backend)
+
+
+def _refresh_loop(models, interval):
+    while True:
+        time.sleep(interval)
+        if within_hours():
+            warm_all(models)
+
+
+_warmup_lock = threading.Lock()
+_warmup_started = False
+
+
+def start_model_warmup():
+    """Warm the models in the background once per process; safe to call on every rerun"""
+    global _warmup_started
+    if _warmup_started or not WARMUP_ENABLED:
+        return
+    with _warmup_lock:
+        if _warmup_started:
+            return
+        _warmup_started = True
+    models = warmup_targets(WARMUP_MODELS)
+
+    def run():
+        warm_all(models)
+        if WARMUP_REFRESH_SECONDS > 0:
+            _refresh_loop(models, WARMUP_REFRESH_SECONDS)
+
+    threading.Thread(target=run, name="model-warmup", daemon=True).start()
+    logger.info(f"🔥 Warming up {', '.join(f'{m}@{b.url}' for m, b in models)} in the background")
@@ -0,0 +1,272 @@
+"""
+Spread Ollama requests over several backends per model
+
+Each model can be served by a list of Ollama hosts. The router sends every
+request to the healthy backend with the fewest requests in flight (ties go
+to the one with the lower recent time-to-first-token) and, when a backend fails before
+the first chunk arrives, retries on the next one. A background thread
+probes every backend so failed hosts come back into rotation on their own.
+Each backend also has a circuit breaker (shared.resilience): once a host
+has failed repeatedly it is skipped without a request, and when every
+backend of a model is open the call fails at once with CircuitOpen.
+
+  OLLAMA_BACKENDS="llama3.2=http://gpu-1:11434|http://gpu-2:11434,llava=http://gpu-3:11434"
+
+Models not listed fall back to OLLAMA_BASE_URL (LLAVA_BASE_URL for the
+vision model, see shared/model_config.py),
+so a single-host setup needs no extra configuration.
+
+Usage (drop-in for ollama.Client in the pipelines):
+
+  from shared.ollama_router import router
+  stream = router.chat(model="llava", messages=[...], stream=True)
+"""
+import os
+import time
+import random
+import logging
+import threading
+
+from shared.config import parse_pairs
+from shared.metrics import BACKEND_REQUESTS, BACKEND_INFLIGHT, BACKEND_HEALTHY
+from shared.resilience import breakers, CircuitOpen
+from shared.model_config import VISION_MODEL
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+LLAVA_BASE_URL = os.getenv("LLAVA_BASE_URL", "http://localhost:11434")
+OLLAMA_BACKENDS = os.getenv("OLLAMA_BACKENDS", "")
+OLLAMA_HEALTH_INTERVAL = float(os.getenv("OLLAMA_HEALTH_INTERVAL", "10"))
+OLLAMA_HEALTH_TIMEOUT = float(os.getenv("OLLAMA_HEALTH_TIMEOUT", "2"))
+
+# Weight of the newest sample in the latency moving average
+LATENCY_ALPHA = 0.3
+
+
+def parse_backends(text):
+    """Parse 'llama3.2=http://a|http://b,llava=http://c' into {model: [urls]}"""
+    return parse_pairs(text, _backend_urls, "OLLAMA_BACKENDS")
+
+
+def _backend_urls(text):
+    urls = [u.strip().rstrip("/") for u in text.split("|") if u.strip()]
+    if not urls:
+        raise ValueError(f"no backend URL in {text!r}")
+    return urls
+
+
+class Backend:
+    """One Ollama host with its load and health state"""
+
+    def __init__(self, url):
+        self.url = url
+        self._client = None
+        self.lock = threading.Lock()
+        self.inflight = 0
+        self.latency = None
+        self.healthy = True
+        self.last_error = None
+        self.breaker = breakers.get(f"ollama-{url}")
+        BACKEND_HEALTHY.labels(backend=url).set(1)
+
+    @property
+    def client(self):
+        # ollama (and httpx/pydantic under it) take a noticeable part of a
+        # page's first render, so they are loaded with the first request
+        if self._client is None:
+            from ollama import Client
+            with self.lock:
+                if self._client is None:
+                    self._client = Client(host=self.url)
+        return self._client
+
+    def score(self, default_latency):
+        # Fewest requests in flight wins; recent latency breaks ties. Latency
+        # alone would keep sending work to a fast host that is already busy,
+        # because its time-to-first-token includes the queue it just built.
+        return (self.inflight, self.latency if self.latency is not None else default_latency)
+
+    def started(self):
+        with self.lock:
+            self.inflight += 1
+        BACKEND_INFLIGHT.labels(backend=self.url).inc()
+
+    def finished(self, latency=None, error=None):
+        with self.lock:
+            self.inflight -= 1
+            if latency is not None:
+                self.latency = latency if self.latency is None else (
+                    LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * self.latency)
+        BACKEND_INFLIGHT.labels(backend=self.url).dec()
+        BACKEND_REQUESTS.labels(backend=self.url, status="error" if error else "success").inc()
+        if error is not None and _is_backend_failure(error):
+            self.breaker.failed(error)
+            self.mark(False, error)
+        else:
+            self.breaker.succeeded()
+
+    def mark(self, healthy, error=None):
+        if healthy != self.healthy:
+            if healthy:
+                logger.info(f"✅ Ollama backend {self.url} is back")
+            else:
+                logger.warning(f"⚠️ Ollama backend {self.url} taken out of rotation: {error}")
+        self.healthy = healthy
+        self.last_error = None if healthy else str(error)
+        BACKEND_HEALTHY.labels(backend=self.url).set(1 if healthy else 0)
+
+    def probe(self):
+        import httpx
+        try:
+            httpx.get(self.url + "/", timeout=OLLAMA_HEALTH_TIMEOUT).raise_for_status()
+            self.mark(True)
+        except Exception as e:
+            self.mark(False, e)
+
+
+def _is_backend_failure(error):
+    """Connection problems and 5xx take a backend out; a bad request does not"""
+    from ollama import ResponseError
+    if isinstance(error, ResponseError):
+        return error.status_code >= 500
+    return True
+
+
+class OllamaRouter:
+    """Least-loaded routing with failover across the backends of each model"""
+
+    def __init__(self, backends=None, default_url=OLLAMA_BASE_URL):
+        if backends is None:
+            backends = {VISION_MODEL: [LLAVA_BASE_URL.rstrip("/")]}
+            backends.update(parse_backends(OLLAMA_BACKENDS))
+        self.default_url = default_url.rstrip("/")
+        self.lock = threading.Lock()
+        self.backends = {}
+        self.models = {}
+        for model, urls in backends.items():
+            self.models[model] = [self._backend(url) for url in urls]
+        self._checker = None
+
+    def _backend(self, url):
+        # Backends are shared by URL so a host serving two models has one load figure
+        if url not in self.backends:
+            self.backends[url] = Backend(url)
+        return self.backends[url]
+
+    def backends_for(self, model):
+        with self.lock:
+            if model not in self.models:
+                self.models[model] = [self._backend(self.default_url)]
+            return list(self.models[model])
+
+    def ranked(self, model):
+        """Backends to try for a request, best first"""
+        self._start_health_checks()
+        backends = self.backends_for(model)
+        random.shuffle(backends)  # break ties between idle backends
+        # A backend without samples yet is assumed as fast as the best one,
+        # so new or recovered hosts get traffic straight away
+        known = [b.latency for b in backends if b.latency is not None]
+        default_latency = min(known) if known else 1.0
+        healthy = sorted((b for b in backends if b.healthy), key=lambda b: b.score(default_latency))
+        # If everything looks down, still try the rest rather than failing outright
+        return healthy + [b for b in backends if not b.healthy]
+
+    def chat(self, model, messages=None, stream=False, **kwargs):
+        if stream:
+            return self._stream(model, messages, kwargs)
+        return self._call(model, lambda client: client.chat(model=model, messages=messages, **kwargs))
+
+    def generate(self, model, prompt="", **kwargs):
+        return self._call(model, lambda client: client.generate(model=model, prompt=prompt, **kwargs))
+
+    def _call(self, model, request):
+        error = None
+        for backend in self.ranked(model):
+            try:
+                backend.breaker.before_call()
+            except CircuitOpen as e:
+                error = e
+                continue
+            backend.started()
+            started = time.perf_counter()
+            try:
+                response = request(backend.client)
+            except Exception as e:
+                backend.finished(error=e)
+                error = e
+                logger.warning(f"⚠️ {model} request to {backend.url} failed, trying next backend: {e}")
+                continue
+            backend.finished(latency=time.perf_counter() - started)
+            return response
+        raise error
+
+    def _stream(self, model, messages, kwargs):
+        error = None
+        for backend in self.ranked(model):
+            try:
+                backend.breaker.before_call()
+            except CircuitOpen as e:
+                error = e
+                continue
+            backend.started()
+            started = time.perf_counter()
+            try:
+                stream = backend.client.chat(model=model, messages=messages, stream=True, **kwargs)
+                # The HTTP request is only sent on the first next(); fail over
+                # until a chunk arrives, after that the answer is committed
+                first = next(stream)
+            except StopIteration:
+                backend.finished(latency=time.perf_counter() - started)
+                return iter(())
+            except Exception as e:
+                backend.finished(error=e)
+                error = e
+                logger.warning(f"⚠️ {model} stream from {backend.url} failed, trying next backend: {e}")
+                continue
+            return self._relay(backend, first, stream, time.perf_counter() - started)
+        raise error
+
+    def _relay(self, backend, first, stream, first_chunk_seconds):
+        error = None
+        try:
+            yield first
+            yield from stream
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            backend.finished(latency=first_chunk_seconds, error=error)
+
+    def _start_health_checks(self):
+        if self._checker is not None or OLLAMA_HEALTH_INTERVAL <= 0:
+            return
+        with self.lock:
+            if self._checker is not None:
+                return
+            self._checker = threading.Thread(target=self._check_loop, name="ollama-health", daemon=True)
+            self._checker.start()
+
+    def _check_loop(self):
+        while True:
+            time.sleep(OLLAMA_HEALTH_INTERVAL)
+            with self.lock:
+                backends = list(self.backends.values())
+            for backend in backends:
+                backend.probe()
+
+    def status(self):
+        """Per-backend state for logs and the debug panel"""
+        with self.lock:
+            backends = list(self.backends.values())
+        return [{
+            "backend": b.url,
+            "healthy": b.healthy,
+            "in flight": b.inflight,
+            "latency s": round(b.latency, 3) if b.latency is not None else None,
+            "last error": b.last_error,
+        } for b in backends]
+
+
+router = OllamaRouter()
@@ -0,0 +1,253 @@
+"""
+Admission control and fair queueing in front of Ollama
+
+Streamlit runs every browser session in the same process, so without a
+limit a burst of visitors sends as many concurrent requests as there are
+sessions to a single GPU host. The scheduler gives each model a fixed
+number of slots and queues the rest:
+
+  - lower priority numbers are served first (interactive before batch)
+  - within a priority, sessions take turns so one visitor clicking
+    repeatedly cannot starve the others
+  - a request waiting longer than OLLAMA_QUEUE_MAX_WAIT seconds, or
+    arriving when OLLAMA_QUEUE_MAX_LENGTH requests already wait, fails
+    fast with OllamaBusy instead of piling onto the server
+
+  OLLAMA_MAX_CONCURRENCY="llava=1,llama3.2=2"   slots per model
+  OLLAMA_DEFAULT_CONCURRENCY=2                   slots per routed backend for any other model (0 = unlimited)
+
+Usage:
+
+  with request_context(session_id, on_position=show_position):
+    with scheduler.slot("llava"):
+      stream = client.chat(...)
+"""
+import os
+import time
+import logging
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from shared.config import parse_pairs
+from shared.tracing import current_span
+from shared.metrics import QUEUE_WAIT, QUEUE_DEPTH, QUEUE_REJECTED
+from shared.ollama_router import router
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_MAX_CONCURRENCY = os.getenv("OLLAMA_MAX_CONCURRENCY", "")
+OLLAMA_DEFAULT_CONCURRENCY = int(os.getenv("OLLAMA_DEFAULT_CONCURRENCY", "2"))
+OLLAMA_QUEUE_MAX_WAIT = float(os.getenv("OLLAMA_QUEUE_MAX_WAIT", "60"))
+OLLAMA_QUEUE_MAX_LENGTH = int(os.getenv("OLLAMA_QUEUE_MAX_LENGTH", "32"))
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 5
+PRIORITY_BATCH = 10
+
+# How often a waiting request re-reports its queue position
+POSITION_POLL_SECONDS = 0.5
+
+
+class OllamaBusy(Exception):
+    """Raised when a request cannot get an Ollama slot in time"""
+
+    def __init__(self, model, reason, waited=0.0):
+        super().__init__(f"{model} is busy ({reason}) after waiting {waited:.1f}s")
+        self.model = model
+        self.reason = reason
+        self.waited = waited
+
+
+class RequestContext:
+    """Who is asking: used for fairness and queue-position feedback"""
+
+    def __init__(self, session_id="anonymous", priority=PRIORITY_DEFAULT, on_position=None, max_wait=None):
+        self.session_id = session_id
+        self.priority = priority
+        self.on_position = on_position
+        self.max_wait = max_wait
+
+
+_request_context = contextvars.ContextVar("ollama_request_context", default=RequestContext())
+
+
+@contextmanager
+def request_context(session_id, priority=PRIORITY_DEFAULT, on_position=None, max_wait=None):
+    """Attribute every Ollama call made inside the block to one session"""
+    token = _request_context.set(RequestContext(session_id, priority, on_position, max_wait))
+    try:
+        yield
+    finally:
+        _request_context.reset(token)
+
+
+def parse_concurrency(text):
+    """Parse 'llava=1,llama3.2=2' into {'llava': 1, 'llama3.2': 2}"""
+    return parse_pairs(text, int, "OLLAMA_MAX_CONCURRENCY")
+
+
+class _Ticket:
+    __slots__ = ("session_id", "priority", "granted")
+
+    def __init__(self, session_id, priority):
+        self.session_id = session_id
+        self.priority = priority
+        self.granted = False
+
+
+class ModelQueue:
+    """Bounded slots for one model with priority and per-session round robin"""
+
+    def __init__(self, model, slots, max_length=OLLAMA_QUEUE_MAX_LENGTH):
+        self.model = model
+        self.slots = slots
+        self.max_length = max_length
+        self.in_use = 0
+        self.cond = threading.Condition()
+        # priority -> OrderedDict(session_id -> deque of tickets); the
+        # session at the front of the OrderedDict is served next
+        self.waiting = {}
+        self.waiting_count = 0
+
+    def _enqueue(self, ticket):
+        sessions = self.waiting.setdefault(ticket.priority, OrderedDict())
+        sessions.setdefault(ticket.session_id, deque()).append(ticket)
+        self.waiting_count += 1
+
+    def _remove(self, ticket):
+        sessions = self.waiting[ticket.priority]
+        tickets = sessions[ticket.session_id]
+        tickets.remove(ticket)
+        if not tickets:
+            del sessions[ticket.session_id]
+        if not sessions:
+            del self.waiting[ticket.priority]
+        self.waiting_count -= 1
+
+    def _grant_next(self):
+        while self.in_use < self.slots and self.waiting:
+            priority = min(self.waiting)
+            sessions = self.waiting[priority]
+            session_id, tickets = next(iter(sessions.items()))
+            ticket = tickets.popleft()
+            # Move the session to the back so other sessions go first next time
+            del sessions[session_id]
+            if tickets:
+                sessions[session_id] = tickets
+            if not sessions:
+                del self.waiting[priority]
+            self.waiting_count -= 1
+            ticket.granted = True
+            self.in_use += 1
+        self.cond.notify_all()
+
+    def position(self, ticket):
+        """1-based place in line, following the round-robin order"""
+        ahead = 0
+        for priority in sorted(self.waiting):
+            sessions = self.waiting[priority]
+            if priority < ticket.priority:
+                ahead += sum(len(t) for t in sessions.values())
+                continue
+            if priority > ticket.priority:
+                break
+            # Each round serves one ticket per session, in session order
+            mine = sessions[ticket.session_id]
+            my_round = mine.index(ticket)
+            session_order = list(sessions)
+            my_index = session_order.index(ticket.session_id)
+            for index, session_id in enumerate(session_order):
+                queued = len(sessions[session_id])
+                rounds = my_round + 1 if index < my_index else my_round
+                ahead += min(queued, rounds)
+        return ahead + 1
+
+    def acquire(self, context):
+        if not self.slots:
+            return 0.0
+        started = time.perf_counter()
+        max_wait = context.max_wait if context.max_wait is not None else OLLAMA_QUEUE_MAX_WAIT
+        with self.cond:
+            if self.in_use < self.slots and not self.waiting:
+                self.in_use += 1
+                return 0.0
+            if self.waiting_count >= self.max_length:
+                QUEUE_REJECTED.labels(model=self.model, reason="queue_full").inc()
+                raise OllamaBusy(self.model, f"{self.waiting_count} requests already waiting")
+            ticket = _Ticket(context.session_id, context.priority)
+            self._enqueue(ticket)
+            QUEUE_DEPTH.labels(model=self.model).inc()
+            try:
+                while not ticket.granted:
+                    waited = time.perf_counter() - started
+                    if waited >= max_wait:
+                        QUEUE_REJECTED.labels(model=self.model, reason="timeout").inc()
+                        raise OllamaBusy(self.model, "queue wait timed out", waited)
+                    if context.on_position is not None:
+                        position = self.position(ticket)
+                        # Report without holding the lock; the UI call may be slow
+                        self.cond.release()
+                        try:
+                            context.on_position(self.model, position)
+                        finally:
+                            self.cond.acquire()
+                        if ticket.granted:
+                            break
+                    self.cond.wait(min(POSITION_POLL_SECONDS, max_wait - waited))
+            except BaseException:
+                # Timed out, or the Streamlit script was stopped while waiting
+                if ticket.granted:
+                    self.in_use -= 1
+                    self._grant_next()
+                else:
+                    self._remove(ticket)
+                raise
+            finally:
+                QUEUE_DEPTH.labels(model=self.model).dec()
+        waited = time.perf_counter() - started
+        QUEUE_WAIT.labels(model=self.model).observe(waited)
+        return waited
+
+    def release(self):
+        if not self.slots:
+            return
+        with self.cond:
+            self.in_use -= 1
+            self._grant_next()
+
+
+class OllamaScheduler:
+    """Process-wide registry of per-model queues"""
+
+    def __init__(self, limits=None, default_slots=OLLAMA_DEFAULT_CONCURRENCY):
+        self.limits = limits if limits is not None else parse_concurrency(OLLAMA_MAX_CONCURRENCY)
+        self.default_slots = default_slots
+        self.queues = {}
+        self.lock = threading.Lock()
+
+    def queue(self, model):
+        with self.lock:
+            if model not in self.queues:
+                slots = self.limits.get(model, self.default_slots * len(router.backends_for(model)))
+                self.queues[model] = ModelQueue(model, slots)
+                logger.info(f"🚦 Ollama scheduler: {model} limited to {slots or 'unlimited'} concurrent requests")
+            return self.queues[model]
+
+    @contextmanager
+    def slot(self, model):
+        """Hold one of the model's slots for the duration of the block"""
+        queue = self.queue(model)
+        context = _request_context.get()
+        waited = queue.acquire(context)
+        current_span().set_attribute("queue_wait_ms", round(waited * 1000, 1))
+        if waited > 1:
+            logger.info(f"🚦 {model} slot granted to {context.session_id} after {waited:.1f}s in queue")
+        try:
+            yield
+        finally:
+            queue.release()
+
+
+scheduler = OllamaScheduler()
@@ -0,0 +1,207 @@
+"""
+Keep Ollama's timing fields instead of dropping them
+
+Ollama reports total_duration, load_duration, prompt_eval_count,
+prompt_eval_duration, eval_count and eval_duration on the final chunk of
+every chat stream. collect_stream_result returns them together with the
+text, appends them to a rolling JSON-lines log and feeds the metrics, so a
+slow answer can be attributed to model loading, prompt evaluation or
+generation. done_reason is kept too: "length" means the answer was cut
+off by the task's num_predict.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from shared.tracing import current_span
+from shared.metrics import instrument_chat_stream, observe_chat_response
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_STATS_LOG = os.getenv("OLLAMA_STATS_LOG", "logs/ollama_stats.jsonl")
+OLLAMA_STATS_LOG_MAX_BYTES = int(os.getenv("OLLAMA_STATS_LOG_MAX_BYTES", str(1024 * 1024)))
+OLLAMA_STATS_LOG_BACKUPS = int(os.getenv("OLLAMA_STATS_LOG_BACKUPS", "3"))
+
+STAT_FIELDS = (
+    "done_reason",
+    "total_duration",
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+)
+
+
+class ChatResult:
+    """Text of an Ollama chat reply plus the server-side timing stats"""
+
+    def __init__(self, text, stats=None, model=None, task=None, wall_seconds=None):
+        self.text = text
+        self.stats = stats or {}
+        self.model = model
+        self.task = task
+        self.wall_seconds = wall_seconds
+        self.created_at = datetime.now().isoformat(timespec="seconds")
+
+    def _seconds(self, field):
+        value = self.stats.get(field)
+        return value / 1e9 if value else None
+
+    @property
+    def total_seconds(self):
+        return self._seconds("total_duration")
+
+    @property
+    def load_seconds(self):
+        return self._seconds("load_duration")
+
+    @property
+    def prompt_eval_seconds(self):
+        return self._seconds("prompt_eval_duration")
+
+    @property
+    def eval_seconds(self):
+        return self._seconds("eval_duration")
+
+    @property
+    def wait_seconds(self):
+        """Wall time not spent evaluating: model load, queueing and network"""
+        if self.wall_seconds is None or not self.stats:
+            return None
+        busy = (self.prompt_eval_seconds or 0) + (self.eval_seconds or 0)
+        return max(self.wall_seconds - busy, 0.0)
+
+    @property
+    def tokens_per_second(self):
+        eval_count = self.stats.get("eval_count")
+        if not eval_count or not self.eval_seconds:
+            return None
+        return eval_count / self.eval_seconds
+
+    def to_dict(self):
+        return {
+            "time": self.created_at,
+            "model": self.model,
+            "task": self.task,
+            "wall_seconds": _round(self.wall_seconds),
+            "chars": len(self.text),
+            **self.stats,
+        }
+
+    def to_row(self):
+        """Human-readable breakdown for the debug panel"""
+        return {
+            "task": self.task,
+            "model": self.model,
+            "wall s": _round(self.wall_seconds),
+            "total s": _round(self.total_seconds),
+            "wait s": _round(self.wait_seconds),
+            "load s": _round(self.load_seconds),
+            "prompt tokens": self.stats.get("prompt_eval_count"),
+            "prompt eval s": _round(self.prompt_eval_seconds),
+            "output tokens": self.stats.get("eval_count"),
+            "stop": self.stats.get("done_reason"),
+            "eval s": _round(self.eval_seconds),
+            "tokens/s": _round(self.tokens_per_second, 1),
+        }
+
+
+def _round(value, digits=3):
+    return round(value, digits) if value is not None else None
+
+
+def extract_stats(chunk):
+    """Pick the timing fields out of a final chunk or non-streaming response"""
+    stats = {}
+    if not chunk:
+        return stats
+    for field in STAT_FIELDS:
+        value = chunk.get(field)
+        if value is not None:
+            stats[field] = value
+    return stats
+
+
+_stats_logger = None
+_stats_logger_lock = threading.Lock()
+
+
+def _get_stats_logger():
+    global _stats_logger
+    if _stats_logger is not None:
+        return _stats_logger
+    with _stats_logger_lock:
+        if _stats_logger is None:
+            stats_logger = logging.getLogger("ollama_stats")
+            stats_logger.propagate = False
+            stats_logger.setLevel(logging.INFO)
+            try:
+                log_dir = os.path.dirname(OLLAMA_STATS_LOG)
+                if log_dir:
+                    os.makedirs(log_dir, exist_ok=True)
+                handler = RotatingFileHandler(
+                    OLLAMA_STATS_LOG,
+                    maxBytes=OLLAMA_STATS_LOG_MAX_BYTES,
+                    backupCount=OLLAMA_STATS_LOG_BACKUPS,
+                    encoding="utf-8",
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                stats_logger.addHandler(handler)
+            except OSError as e:
+                logger.warning(f"⚠️ Ollama stats log disabled ({OLLAMA_STATS_LOG}): {e}")
+                stats_logger.addHandler(logging.NullHandler())
+            _stats_logger = stats_logger
+    return _stats_logger
+
+
+def record_result(result):
+    """Append a result's stats to the rolling log and the enclosing span"""
+    _get_stats_logger().info(json.dumps(result.to_dict()))
+    attributes = {
+        "ollama.wall_ms": _ms(result.wall_seconds),
+        "ollama.wait_ms": _ms(result.wait_seconds),
+        "ollama.load_ms": _ms(result.load_seconds),
+        "ollama.eval_count": result.stats.get("eval_count"),
+    }
+    current = current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def collect_stream_result(stream, model, task, on_text=None):
+    """Collect all text from the stream and keep the final chunk's stats
+
+    on_text, when given, is called with every non-empty piece as it arrives
+    so a page can show the answer while it is being generated.
+    """
+    started = time.perf_counter()
+    parts = []
+    final_chunk = None
+    for chunk in instrument_chat_stream(stream, model, task):
+        piece = chunk['message']['content']
+        parts.append(piece)
+        if on_text is not None and piece:
+            on_text(piece)
+        if chunk.get('done'):
+            final_chunk = chunk
+    result = ChatResult("".join(parts), extract_stats(final_chunk), model, task, time.perf_counter() - started)
+    record_result(result)
+    return result
+
+
+def result_from_response(response, model, task, wall_seconds):
+    """Wrap a non-streaming Ollama chat response in a ChatResult"""
+    observe_chat_response(response, model, task, wall_seconds)
+    result = ChatResult(response['message']['content'], extract_stats(response), model, task, wall_seconds)
+    record_result(result)
+    return result
@@ -0,0 +1,153 @@
+"""
+Model and RAG stages of the demo pages, free of any Streamlit calls
+
+The pages call these inside their spinners; the offline benchmark
+(bench/run_bench.py) calls the very same functions against local stand-in
+servers, so a performance change measured on a laptop is the change shipped.
+"""
+import os
+import time
+import requests
+
+from shared.tracing import traced, current_span
+from shared.resilience import retry_call, timeouts
+from shared.ollama_stats import collect_stream_result
+from shared.ollama_scheduler import scheduler
+from shared.model_warmup import keep_alive_for
+from shared.model_config import model_for, sees_images, generation_options
+
+RAG_TIMEOUT = float(os.getenv("RAG_TIMEOUT", "120"))
+
+MOOD_PROMPT = 'Analyze the image and describe the mood. Keep the response within 50 words.'
+MOOD_SUMMARY_PROMPT = 'Summarize this mood analysis in exactly 5 words, on one line with no preamble: {analysis}'
+ENGAGEMENT_PROMPT = 'Analyze the image and describe the engagement level. Keep the response within 30 words'
+COMPARISON_PROMPT = (
+    'Compare these two engagement level analyses and explain the differences or similarities. '
+    'First image engagement level: {first}. Second image engagement level: {second}. '
+    'Keep response within 40 words.'
+)
+ENGAGEMENT_SUMMARY_PROMPT = (
+    'Summarize this engagement level comparison in less than 15 words and inform the user '
+    'which picture has higher engagement level. Answer on one line with no preamble: {comparison}'
+)
+
+
+def _chat(client, task, messages, on_text=None, model=None):
+    model = model or model_for(task)
+    current_span().set_attribute("model", model)
+    if not sees_images(model):
+        # A text model moved onto a vision task gets the text only
+        messages = [{k: v for k, v in m.items() if k != 'images'} for m in messages]
+    # The slot is held until the stream is drained, since that is when
+    # Ollama is actually generating
+    with scheduler.slot(model):
+        stream = client.chat(model=model, messages=messages, stream=True, keep_alive=keep_alive_for(model),
+                             options=generation_options(task, model))
+        return collect_stream_result(stream, model, task, on_text)
+
+
+class PhaseClock:
+    """Seconds from the start of a request to the end of each of its phases
+
+    The marks are also set as attributes of the span that was current when
+    the clock started, so they show up on the request's trace.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.span = current_span()
+        self.marks = {}
+
+    def mark(self, phase):
+        """Record that a phase ended now (the first mark of a name wins)"""
+        if phase not in self.marks:
+            self.marks[phase] = time.perf_counter() - self.started
+            self.span.set_attribute(f"{phase.replace(' ', '_')}_ms", round(self.marks[phase] * 1000))
+        return self.marks[phase]
+
+    def summary(self):
+        return " · ".join(f"{phase} {seconds:.1f}s" for phase, seconds in self.marks.items())
+
+
+@traced("llama.chat")
+def chat_reply(client, messages):
+    """Answer the running conversation with Llama"""
+    return _chat(client, "chat", messages)
+
+
+@traced("llava.analyze")
+def analyze_mood(client, image, on_text=None):
+    """Describe the mood of one image (path or bytes)
+
+    on_text(piece) is called with each piece of the answer as it streams in.
+    """
+    message = {'role': 'user', 'content': MOOD_PROMPT, 'images': [image]}
+    return _chat(client, "mood_analysis", [message], on_text)
+
+
+@traced("mood.summary")
+def summarize_mood(client, analysis_text, model=None):
+    """Condense a mood analysis into five words for the voice reply
+
+    Runs on the summarize model (see shared/model_config.py) unless a
+    model is given.
+    """
+    message = {'role': 'user', 'content': MOOD_SUMMARY_PROMPT.format(analysis=analysis_text)}
+    return _chat(client, "mood_summary", [message], model=model)
+
+
+@traced("llava.analyze")
+def analyze_engagement(client, image):
+    """Describe the engagement level of one image (path or bytes)"""
+    message = {'role': 'user', 'content': ENGAGEMENT_PROMPT, 'images': [image]}
+    return _chat(client, "engagement_analysis", [message])
+
+
+@traced("llava.compare")
+def compare_engagement(client, first_text, second_text, images, model=None):
+    """Compare the two engagement analyses, looking at both images again
+
+    A text-only model compares the two analyses without the images.
+    """
+    message = {
+        'role': 'user',
+        'content': COMPARISON_PROMPT.format(first=first_text, second=second_text),
+        'images': list(images),
+    }
+    return _chat(client, "engagement_compare", [message], model=model)
+
+
+@traced("engagement.summary")
+def summarize_comparison(client, comparison_text, model=None):
+    """Condense the comparison and name the more engaged picture"""
+    message = {'role': 'user', 'content': ENGAGEMENT_SUMMARY_PROMPT.format(comparison=comparison_text)}
+    return _chat(client, "engagement_summary", [message], model=model)
+
+
+@traced("rag.upload_request")
+def rag_upload(service_url, filename, fileobj, content_type):
+    """Send a document to the RAG service and return the HTTP response
+
+    Indexing the same document twice would duplicate it, so an upload is
+    only retried when it never reached the service.
+    """
+    # Read once so a retry sends the whole file again
+    content = fileobj.read()
+    return retry_call("rag", lambda: requests.post(
+        f"{service_url}/upload",
+        files={"file": (filename, content, content_type)},
+        timeout=timeouts(RAG_TIMEOUT)
+    ), idempotent=False)
+
+
+@traced("rag.query_request")
+def rag_query(service_url, question):
+    """Ask the RAG service a question and return its JSON answer"""
+    response = retry_call("rag", lambda: requests.post(
+        f"{service_url}/query",
+        json={"question": question},
+        headers={"Content-Type": "application/json"},
+        timeout=timeouts(RAG_TIMEOUT)
+    ))
+    response.raise_for_status()
+    return response.json()
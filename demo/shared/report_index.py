@@ -0,0 +1,333 @@
+"""
+Full-text index over the analysis reports in events/
+
+Every event folder collects analysis_report_*.md (and mood_report_*.md
+from batch_analyze.py) files. ReportIndex parses them into a SQLite
+database with an FTS5 index over the per-image analyses, the comparison
+and the summary, so the reports of all events can be searched and compared
+without reading the files again.
+
+refresh() is incremental: it stats every report and only parses files
+that are new or whose size or mtime changed, and drops reports whose file
+is gone. The text is stored once in the reports table; the FTS5 table is
+an external-content index over it, kept in sync by triggers, as is a
+narrow id → event table that the per-event counts join against instead
+of the wide report rows. The event name is indexed too, so an event
+filter intersects posting lists instead of checking every match.
+
+Each refresh indexes its reports oldest first, so rowids roughly follow
+report time. A query
+matching a large part of the reports only ranks the newest
+REPORT_SEARCH_RANK_CANDIDATES matches: bm25 costs the same for every
+matching row, and a common word at 100k reports would otherwise take
+well over 100 ms to rank.
+
+  REPORTS_DIR=../events                       folders of reports, one per event
+  REPORT_INDEX_DB=logs/report_index.db        the index (rebuilt from REPORTS_DIR when deleted)
+  REPORT_INDEX_REFRESH_SECONDS=60             how often the search page rescans
+  REPORT_SEARCH_RANK_CANDIDATES=1000          newest matches ranked by relevance
+"""
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+
+from shared.tracing import span
+
+logger = logging.getLogger(__name__)
+
+REPORTS_DIR = os.getenv(
+    "REPORTS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "events"))
+REPORT_INDEX_DB = os.getenv("REPORT_INDEX_DB", "logs/report_index.db")
+REPORT_INDEX_REFRESH_SECONDS = float(os.getenv("REPORT_INDEX_REFRESH_SECONDS", "60"))
+REPORT_SEARCH_RANK_CANDIDATES = int(os.getenv("REPORT_SEARCH_RANK_CANDIDATES", "1000"))
+
+REPORT_FILE = re.compile(r"(analysis|mood)_report_(\d{8}_\d{6})\S*\.md")
+_TITLE = re.compile(r"^# (?:Engagement|Mood) Analysis Report - (.+)$", re.MULTILINE)
+_GENERATED = re.compile(r"^\*\*Generated:\*\* (.+)$", re.MULTILINE)
+_SECTION = re.compile(r"^### (.+?)\s*$", re.MULTILINE)
+_IMAGE = re.compile(r"!\[Image ?(\d?)\]\(([^)]*)\)")
+
+# Section heading → column
+SECTIONS = {
+    "First Image Analysis": "first",
+    "Image Analysis": "first",
+    "Second Image Analysis": "second",
+    "Comparison Analysis": "comparison",
+    "Summary": "summary",
+}
+TEXT_COLUMNS = ("first", "second", "comparison", "summary")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    generated TEXT,
+    image1 TEXT,
+    image2 TEXT,
+    first TEXT,
+    second TEXT,
+    comparison TEXT,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS reports_event_generated ON reports (event, generated);
+CREATE TABLE IF NOT EXISTS report_events (
+    id INTEGER PRIMARY KEY,
+    event TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5 (
+    first, second, comparison, summary, event,
+    content='reports', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS reports_ai AFTER INSERT ON reports BEGIN
+    INSERT INTO reports_fts (rowid, first, second, comparison, summary, event)
+    VALUES (new.id, new.first, new.second, new.comparison, new.summary, new.event);
+    INSERT INTO report_events (id, event) VALUES (new.id, new.event);
+END;
+CREATE TRIGGER IF NOT EXISTS reports_ad AFTER DELETE ON reports BEGIN
+    INSERT INTO reports_fts (reports_fts, rowid, first, second, comparison, summary, event)
+    VALUES ('delete', old.id, old.first, old.second, old.comparison, old.summary, old.event);
+    DELETE FROM report_events WHERE id = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS reports_au AFTER UPDATE ON reports BEGIN
+    INSERT INTO reports_fts (reports_fts, rowid, first, second, comparison, summary, event)
+    VALUES ('delete', old.id, old.first, old.second, old.comparison, old.summary, old.event);
+    INSERT INTO reports_fts (rowid, first, second, comparison, summary, event)
+    VALUES (new.id, new.first, new.second, new.comparison, new.summary, new.event);
+    UPDATE report_events SET event = new.event WHERE id = new.id;
+END;
+-- The event column only filters; it must not add to the relevance
+INSERT INTO reports_fts (reports_fts, rank) VALUES ('rank', 'bm25(1.0, 1.0, 1.0, 1.0, 0.0)');
+"""
+
+
+def parse_report(text, event=None, stamp=None):
+    """Pull the event, time, image links and sections out of a report's markdown
+
+    event and stamp come from the report's folder and file name.
+    """
+    title = _TITLE.search(text)
+    generated = _GENERATED.search(text)
+    report = {
+        # The folder decides the event; the title is the fallback for a loose file
+        "event": event or (title.group(1).strip() if title else None),
+        "kind": "mood" if text.startswith("# Mood") else "engagement",
+        "generated": generated.group(1).strip() if generated else _stamp_time(stamp),
+        "image1": None,
+        "image2": None,
+    }
+    report.update({column: None for column in TEXT_COLUMNS})
+    headings = list(_SECTION.finditer(text))
+    for i, heading in enumerate(headings):
+        column = SECTIONS.get(heading.group(1))
+        if column:
+            end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+            # The last section runs into "## Files"
+            report[column] = text[heading.end():end].split("\n## ", 1)[0].strip()
+    for number, link in _IMAGE.findall(text):
+        report["image2" if number == "2" else "image1"] = link
+    return report
+
+
+def _stamp_time(stamp):
+    """'20251210_155247' → '2025-12-10 15:52:47'"""
+    if not stamp:
+        return None
+    return f"{stamp[0:4]}-{stamp[4:6]}-{stamp[6:8]} {stamp[9:11]}:{stamp[11:13]}:{stamp[13:15]}"
+
+
+def fts_query(text, events=None):
+    """Turn what a visitor typed into an FTS5 query: every word must match, the last one as a prefix
+
+    events limits the matches to those events' reports. The event name is
+    indexed like the text, so searching "paris" also finds apidays-paris-2025.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words[:-1]] + [f'"{words[-1]}"*']
+    query = " ".join(terms)
+    if events:
+        # A phrase can also match a longer event name; search() checks the event exactly
+        names = " OR ".join('event : "{}"'.format(event.replace('"', '""')) for event in events)
+        query += f" AND ({names})"
+    return query
+
+
+class ReportIndex:
+    """SQLite FTS5 index over the report files below one directory"""
+
+    def __init__(self, reports_dir=REPORTS_DIR, db_path=REPORT_INDEX_DB):
+        self.reports_dir = reports_dir
+        self.db_path = db_path
+        self.local = threading.local()
+        self.refresh_lock = threading.Lock()
+        self.schema_lock = threading.Lock()
+        self.schema_ready = False
+        self.refreshed_at = 0.0
+        self.totals = None
+
+    def connection(self):
+        """One connection per thread; Streamlit runs each session's script in its own thread"""
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            db = sqlite3.connect(self.db_path, timeout=30)
+            db.row_factory = sqlite3.Row
+            # Readers keep searching while a refresh writes
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            with self.schema_lock:
+                if not self.schema_ready:
+                    with db:
+                        db.executescript(SCHEMA)
+                    self.schema_ready = True
+            self.local.db = db
+        return db
+
+    def scan(self):
+        """{path: (event, stamp, mtime_ns, size)} for every report file on disk"""
+        found = {}
+        if not os.path.isdir(self.reports_dir):
+            return found
+        for event_dir in os.scandir(self.reports_dir):
+            if not event_dir.is_dir():
+                continue
+            for entry in os.scandir(event_dir.path):
+                match = REPORT_FILE.fullmatch(entry.name)
+                if match and entry.is_file():
+                    stat = entry.stat()
+                    found[entry.path] = (event_dir.name, match.group(2), stat.st_mtime_ns, stat.st_size)
+        return found
+
+    def refresh(self):
+        """Index new and changed reports, forget deleted ones; returns (added/updated, removed)"""
+        with self.refresh_lock, span("reports.index_refresh") as current:
+            found = self.scan()
+            db = self.connection()
+            known = {row["path"]: (row["mtime_ns"], row["size"])
+                     for row in db.execute("SELECT path, mtime_ns, size FROM reports")}
+            changed = [path for path, (_, _, mtime_ns, size) in found.items() if known.get(path) != (mtime_ns, size)]
+            removed = [path for path in known if path not in found]
+            # Oldest first, so new reports get higher rowids (the file name carries the time)
+            changed.sort(key=lambda path: found[path][1])
+            with db:
+                for path in changed:
+                    event, stamp, mtime_ns, size = found[path]
+                    try:
+                        with open(path, encoding="utf-8", errors="replace") as f:
+                            report = parse_report(f.read(), event, stamp)
+                    except OSError as e:
+                        logger.warning(f"⚠️ Could not read report {path}: {e}")
+                        continue
+                    db.execute(
+                        """INSERT INTO reports (path, mtime_ns, size, event, kind, generated, image1, image2,
+                                                first, second, comparison, summary)
+                           VALUES (:path, :mtime_ns, :size, :event, :kind, :generated, :image1, :image2,
+                                   :first, :second, :comparison, :summary)
+                           ON CONFLICT (path) DO UPDATE SET
+                               mtime_ns = excluded.mtime_ns, size = excluded.size, event = excluded.event,
+                               kind = excluded.kind, generated = excluded.generated,
+                               image1 = excluded.image1, image2 = excluded.image2, first = excluded.first,
+                               second = excluded.second, comparison = excluded.comparison,
+                               summary = excluded.summary""",
+                        {"path": path, "mtime_ns": mtime_ns, "size": size, **report})
+                db.executemany("DELETE FROM reports WHERE path = ?", [(path,) for path in removed])
+            current.set_attribute("files", len(found))
+            current.set_attribute("changed", len(changed))
+            current.set_attribute("removed", len(removed))
+            self.refreshed_at = time.monotonic()
+            if changed or removed:
+                self.totals = None
+        if changed or removed:
+            logger.info(f"🗂️ Report index: {len(changed)} reports added or updated, {len(removed)} removed")
+        return len(changed), len(removed)
+
+    def refresh_if_stale(self, max_age=REPORT_INDEX_REFRESH_SECONDS):
+        if time.monotonic() - self.refreshed_at >= max_age:
+            self.refresh()
+
+    def search(self, text, events=None, limit=20):
+        """Best matching reports, with a highlighted snippet; every report (newest first) without a query"""
+        query = fts_query(text or "", events)
+        db = self.connection()
+        with span("reports.search", events=len(events or [])) as current:
+            if query is None:
+                event_filter, params = self._event_filter(events, "event")
+                return [dict(row) for row in db.execute(
+                    f"""SELECT id, path, event, kind, generated, image1, image2, summary,
+                               substr(coalesce(comparison, first), 1, 200) AS snippet
+                        FROM reports WHERE 1 = 1 {event_filter}
+                        ORDER BY generated DESC LIMIT ?""", params + [limit])]
+            # Walking the matches newest first is cheap; only rank the newest candidates
+            cutoff = db.execute(
+                """SELECT rowid FROM reports_fts WHERE reports_fts MATCH ?
+                   ORDER BY rowid DESC LIMIT 1 OFFSET ?""", (query, REPORT_SEARCH_RANK_CANDIDATES - 1)).fetchone()
+            current.set_attribute("truncated", cutoff is not None)
+            newest = "AND reports_fts.rowid >= ?" if cutoff else ""
+            event_filter, params = self._event_filter(events, "r.event")
+            return [dict(row) for row in db.execute(
+                f"""SELECT r.id, r.path, r.event, r.kind, r.generated, r.image1, r.image2, r.summary,
+                           snippet(reports_fts, -1, '**', '**', ' … ', 24) AS snippet
+                    FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid
+                    WHERE reports_fts MATCH ? {newest} {event_filter}
+                    ORDER BY rank LIMIT ?""", [query] + list(cutoff or []) + params + [limit])]
+
+    def matches_by_event(self, text, events=None):
+        """How many reports of each event match the query, next to the event's total"""
+        query = fts_query(text or "", events)
+        db = self.connection()
+        with span("reports.matches_by_event", events=len(events or [])):
+            totals = self.event_totals()
+            if events:
+                totals = {event: totals[event] for event in events if event in totals}
+            if query is None:
+                matches = dict(totals)
+            else:
+                matches = {row["event"]: row["matches"] for row in db.execute(
+                    """SELECT e.event, count(*) AS matches
+                       FROM reports_fts JOIN report_events e ON e.id = reports_fts.rowid
+                       WHERE reports_fts MATCH ?
+                       GROUP BY e.event""", (query,))}
+        return [{"event": event, "matches": matches.get(event, 0), "reports": total,
+                 "share": round(matches.get(event, 0) / total, 3) if total else 0.0}
+                for event, total in sorted(totals.items())]
+
+    def event_totals(self):
+        """{event: reports}, counted again only after a refresh changed something"""
+        if self.totals is None:
+            self.totals = {row["event"]: row["reports"] for row in self.connection().execute(
+                "SELECT event, count(*) AS reports FROM report_events GROUP BY event")}
+        return self.totals
+
+    def events(self):
+        """[{event, reports, first, last}] for every indexed event"""
+        return [dict(row) for row in self.connection().execute(
+            """SELECT event, count(*) AS reports, min(generated) AS first, max(generated) AS last
+               FROM reports GROUP BY event ORDER BY max(generated) DESC""")]
+
+    def report(self, report_id):
+        row = self.connection().execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
+        return dict(row) if row else None
+
+    def optimize(self):
+        """Merge the FTS5 segments after a large refresh so queries read fewer b-trees"""
+        with self.connection() as db:
+            db.execute("INSERT INTO reports_fts (reports_fts) VALUES ('optimize')")
+
+    @staticmethod
+    def _event_filter(events, column):
+        if not events:
+            return "", []
+        return f"AND {column} IN ({', '.join('?' * len(events))})", list(events)
+
+
+report_index = ReportIndex()
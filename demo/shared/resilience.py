@@ -0,0 +1,199 @@
+"""
+Retries and circuit breakers for calls to other services
+
+Every dependency (each MCP server, the GitHub API, the RAG service, each
+Ollama backend) has a named CircuitBreaker. After BREAKER_FAILURES failures
+in a row it opens and calls fail at once with CircuitOpen instead of each
+visitor waiting out a 30-60s timeout. After BREAKER_RESET_SECONDS a single
+trial call is let through (half-open); its outcome closes or reopens it.
+
+retry_call() retries transient failures (dropped connections, 429 and 5xx
+answers) with exponential backoff and full jitter. Calls that are not
+idempotent are only retried when the request never reached the server, so
+a tool call that failed half-way is never run twice. Read timeouts count
+against the breaker but are not retried: a server that took the whole
+timeout once will most likely do it again.
+
+  response = retry_call("rag", lambda: requests.post(url, json=body, timeout=timeouts(120)))
+"""
+import os
+import time
+import random
+import logging
+import threading
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from shared.metrics import BREAKER_STATE, BREAKER_TRANSITIONS, BREAKER_REJECTED, RETRIES
+
+logger = logging.getLogger(__name__)
+
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.25"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "4"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+# An unreachable host should not cost the full read timeout
+CONNECT_TIMEOUT = float(os.getenv("CONNECT_TIMEOUT", "5"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpen(Exception):
+    """The dependency has been failing; the call was not attempted"""
+
+    def __init__(self, endpoint, retry_in):
+        super().__init__(f"{endpoint} is unavailable, next attempt in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Closed → open after repeated failures → half-open trial → closed"""
+
+    def __init__(self, endpoint, failures=BREAKER_FAILURES, reset_seconds=BREAKER_RESET_SECONDS):
+        self.endpoint = endpoint
+        self.threshold = max(1, failures)
+        self.reset_seconds = reset_seconds
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_running = False
+        BREAKER_STATE.labels(endpoint=endpoint).set(0)
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go out now"""
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            retry_in = self.opened_at + self.reset_seconds - time.monotonic()
+            if self.state == OPEN and retry_in <= 0:
+                self._enter(HALF_OPEN)
+            if self.state == HALF_OPEN and not self.trial_running:
+                self.trial_running = True
+                return
+            BREAKER_REJECTED.labels(endpoint=self.endpoint).inc()
+            raise CircuitOpen(self.endpoint, max(retry_in, 0))
+
+    def succeeded(self):
+        with self.lock:
+            self.failures = 0
+            self.trial_running = False
+            if self.state != CLOSED:
+                self._enter(CLOSED)
+
+    def failed(self, error):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+                self._enter(OPEN, error)
+
+    def _enter(self, state, error=None):
+        if state == OPEN:
+            logger.warning(f"⚡ {self.endpoint} circuit opened after {self.failures} failures: {error}")
+        elif state == CLOSED:
+            logger.info(f"✅ {self.endpoint} circuit closed again")
+        self.state = state
+        BREAKER_STATE.labels(endpoint=self.endpoint).set(_STATE_VALUES[state])
+        BREAKER_TRANSITIONS.labels(endpoint=self.endpoint, state=state).inc()
+
+
+class BreakerRegistry:
+    """One CircuitBreaker per endpoint name, created on first use"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.breakers = {}
+
+    def get(self, endpoint):
+        with self.lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = self.breakers[endpoint] = CircuitBreaker(endpoint)
+            return breaker
+
+    def status(self):
+        """Breaker state per endpoint for logs and the debug panel"""
+        with self.lock:
+            return {name: b.state for name, b in self.breakers.items()}
+
+
+breakers = BreakerRegistry()
+
+
+def timeouts(read_timeout):
+    """requests timeout tuple: a short connect timeout, the caller's read timeout"""
+    return (min(CONNECT_TIMEOUT, read_timeout), read_timeout)
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)"""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def is_transient(error):
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def never_sent(error):
+    """True when the request cannot have reached the server (it could not connect)"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def _retry_reason(error=None, status=None):
+    if status is not None:
+        return f"http_{status}"
+    return "timeout" if isinstance(error, requests.exceptions.Timeout) else "connection"
+
+
+def retry_call(endpoint, fn, idempotent=True, attempts=None):
+    """Run fn() through the endpoint's circuit breaker, retrying transient failures
+
+    fn makes one request; when it returns a response with a retryable status
+    the call counts as failed, and the last such response is returned once
+    the retries are used up. Raises CircuitOpen without calling fn while the
+    breaker is open.
+    """
+    breaker = breakers.get(endpoint)
+    attempts = attempts or RETRY_ATTEMPTS
+    for attempt in range(1, attempts + 1):
+        breaker.before_call()
+        try:
+            result = fn()
+        except Exception as e:
+            if not is_transient(e):
+                # The service answered; whatever went wrong is not its health
+                breaker.succeeded()
+                raise
+            breaker.failed(e)
+            retryable = never_sent(e) or (idempotent and not isinstance(e, requests.exceptions.ReadTimeout))
+            if attempt == attempts or not retryable:
+                raise
+            reason = _retry_reason(error=e)
+            detail = e
+        else:
+            status = getattr(result, "status_code", None)
+            if status not in RETRY_STATUSES:
+                breaker.succeeded()
+                return result
+            breaker.failed(f"HTTP {status}")
+            if attempt == attempts or not idempotent:
+                return result
+            reason = _retry_reason(status=status)
+            detail = f"HTTP {status}"
+
+        delay = backoff_delay(attempt)
+        RETRIES.labels(endpoint=endpoint, reason=reason).inc()
+        logger.warning(f"🔄 {endpoint} call failed ({detail}), retry {attempt}/{attempts - 1} in {delay:.2f}s")
+        time.sleep(delay)
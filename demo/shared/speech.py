@@ -0,0 +1,151 @@
+"""
+Text-to-speech and speech-to-text for the voice pages
+
+gTTS, speech_recognition and pydub are only imported the first time audio
+is actually synthesized or transcribed, so pages and code paths that never
+touch audio (the chat page, the RAG page, the benchmarks) do not pay for
+loading them.
+
+synthesize_stream() splits a text into sentences and synthesizes them a
+couple at a time in the background, yielding each clip in order as soon as
+it is ready, so playback of the first sentence can start while the rest is
+still being synthesized.
+"""
+import io
+import os
+import re
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from shared.tracing import span, traced
+
+# Sentences synthesized at once ahead of playback
+TTS_STREAM_WORKERS = int(os.getenv("TTS_STREAM_WORKERS", "2"))
+# Later sentences are grouped up to this many characters to save requests
+TTS_CHUNK_CHARS = int(os.getenv("TTS_CHUNK_CHARS", "240"))
+
+_SENTENCE_END = re.compile(r'(?<=[.!?;:])\s+')
+
+_import_lock = threading.Lock()
+_modules = {}
+
+
+def _lazy(name, loader):
+    module = _modules.get(name)
+    if module is None:
+        with _import_lock:
+            module = _modules.get(name)
+            if module is None:
+                module = _modules[name] = loader()
+    return module
+
+
+def _load_gtts():
+    from gtts import gTTS
+    return gTTS
+
+
+def _load_speech_recognition():
+    import speech_recognition
+    return speech_recognition
+
+
+def _load_audio_segment():
+    from pydub import AudioSegment
+    return AudioSegment
+
+
+def tts_backend():
+    """The gTTS class, imported on first use"""
+    return _lazy("gtts", _load_gtts)
+
+
+def stt_backend():
+    """The speech_recognition module, imported on first use"""
+    return _lazy("speech_recognition", _load_speech_recognition)
+
+
+def audio_segment():
+    """pydub's AudioSegment, imported on first use"""
+    return _lazy("pydub", _load_audio_segment)
+
+
+def text_to_speech(text, lang='en'):
+    """Convert text to speech using gTTS and return audio bytes"""
+    if not text.strip():
+        return None
+
+    tts = tts_backend()(text=text, lang=lang, slow=False)
+    audio_buffer = io.BytesIO()
+    tts.write_to_fp(audio_buffer)
+    audio_buffer.seek(0)
+    return audio_buffer.getvalue()
+
+
+def split_sentences(text, max_chars=TTS_CHUNK_CHARS):
+    """Split text into chunks for synthesis
+
+    The first sentence is a chunk of its own so playback starts as early as
+    possible; the following ones are grouped up to max_chars.
+    """
+    chunks = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(chunks) > 1 and len(chunks[-1]) + len(sentence) + 1 <= max_chars:
+            chunks[-1] += " " + sentence
+        else:
+            chunks.append(sentence)
+    return chunks
+
+
+def _synthesize_chunk(index, chunk, lang):
+    with span("tts.chunk", index=index, chars=len(chunk)):
+        return text_to_speech(chunk, lang)
+
+
+def synthesize_stream(text, lang='en', workers=TTS_STREAM_WORKERS):
+    """Yield MP3 bytes chunk by chunk, in order, synthesizing ahead in the background"""
+    chunks = split_sentences(text)
+    if not chunks:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # A copy of the caller's context per chunk keeps the spans in its trace
+        futures = [pool.submit(contextvars.copy_context().run, _synthesize_chunk, i, chunk, lang)
+                   for i, chunk in enumerate(chunks)]
+        for future in futures:
+            audio_bytes = future.result()
+            if audio_bytes:
+                yield audio_bytes
+
+
+@traced("stt.recognize", error_if=lambda text: text is None or text.startswith(("Could not understand", "Speech recognition error", "Error processing")))
+def speech_to_text(audio_bytes):
+    """Convert audio bytes to text using speech recognition"""
+    if audio_bytes is None:
+        return None
+
+    try:
+        sr = stt_backend()
+
+        # Normalize the recording to a plain wav for speech recognition
+        audio = audio_segment().from_wav(io.BytesIO(audio_bytes))
+        wav_io = io.BytesIO()
+        audio.export(wav_io, format="wav")
+        wav_io.seek(0)
+
+        recognizer = sr.Recognizer()
+        with sr.AudioFile(wav_io) as source:
+            audio_data = recognizer.record(source)
+            try:
+                # Use Google's speech recognition API
+                return recognizer.recognize_google(audio_data)
+            except sr.UnknownValueError:
+                return "Could not understand the audio"
+            except sr.RequestError as e:
+                return f"Speech recognition error: {str(e)}"
+
+    except Exception as e:
+        return f"Error processing audio: {str(e)}"
@@ -0,0 +1,163 @@
+"""
+Per-visitor state that survives a reconnect to a different replica
+
+Streamlit keeps st.session_state in the memory of the pod that served the
+websocket, so with several replicas behind the gateway a visitor who
+reconnects elsewhere loses their conversation. Chat history, MCP session
+ids and the like go through this store instead:
+
+  STATE_STORE=memory   per-process dict (default, single replica)
+  STATE_STORE=redis    any Redis-compatible server at REDIS_URL
+
+redis is optional - without it the store falls back to memory with a
+warning. Every key expires after STATE_TTL_SECONDS unless a shorter ttl is
+given.
+"""
+import os
+import json
+import time
+import logging
+import threading
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+STATE_STORE = os.getenv("STATE_STORE", "memory").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+STATE_KEY_PREFIX = os.getenv("STATE_KEY_PREFIX", "gen-ai-demo:")
+STATE_TTL_SECONDS = int(os.getenv("STATE_TTL_SECONDS", str(24 * 3600)))
+
+
+class MemoryStore:
+    """In-process store with expiry; state is lost when the pod restarts"""
+
+    name = "memory"
+    # Keys nobody reads again are dropped by a sweep on write, at most this often
+    sweep_interval = 60.0
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.swept_at = time.monotonic()
+
+    def get(self, key):
+        with self.lock:
+            item = self.values.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self.values[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        now = time.monotonic()
+        expires = now + ttl if ttl else None
+        with self.lock:
+            self.values[key] = (value, expires)
+            if now - self.swept_at >= self.sweep_interval:
+                self._sweep(now)
+
+    def _sweep(self, now):
+        expired = [key for key, (_, expires) in self.values.items() if expires is not None and expires < now]
+        for key in expired:
+            del self.values[key]
+        self.swept_at = now
+
+    def delete(self, key):
+        with self.lock:
+            self.values.pop(key, None)
+
+
+class RedisStore:
+    """Store backed by a Redis-compatible server shared by all replicas"""
+
+    name = "redis"
+
+    def __init__(self, url=REDIS_URL):
+        self.client = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+class StateStore:
+    """Namespaced bytes/JSON access on top of a backend"""
+
+    def __init__(self, backend, prefix=STATE_KEY_PREFIX, ttl=STATE_TTL_SECONDS):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def get_bytes(self, key):
+        try:
+            value = self.backend.get(self._key(key))
+        except Exception as e:
+            # A store outage should cost the visitor their history, not the page
+            logger.warning(f"⚠️ State store read of {key} failed: {e}")
+            return None
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        return value
+
+    def set_bytes(self, key, value, ttl=None):
+        try:
+            self.backend.set(self._key(key), value, ttl or self.ttl)
+        except Exception as e:
+            logger.warning(f"⚠️ State store write of {key} failed: {e}")
+
+    def get_json(self, key, default=None):
+        value = self.get_bytes(key)
+        if value is None:
+            return default
+        try:
+            return json.loads(value)
+        except ValueError:
+            logger.warning(f"⚠️ Ignoring unreadable state for {key}")
+            return default
+
+    def set_json(self, key, value, ttl=None):
+        self.set_bytes(key, json.dumps(value).encode("utf-8"), ttl)
+
+    def delete(self, key):
+        try:
+            self.backend.delete(self._key(key))
+        except Exception as e:
+            logger.warning(f"⚠️ State store delete of {key} failed: {e}")
+
+
+def _build_backend(name):
+    if name == "redis":
+        if redis is None:
+            logger.warning("⚠️ STATE_STORE=redis but the redis package is not installed, keeping state in memory")
+            return MemoryStore()
+        logger.info(f"🗄️ Keeping visitor state in Redis at {REDIS_URL}")
+        return RedisStore()
+    if name != "memory":
+        logger.warning(f"⚠️ Unknown STATE_STORE '{name}', keeping state in memory")
+    return MemoryStore()
+
+
+state_store = StateStore(_build_backend(STATE_STORE))
+
+
+def chat_history_key(visitor_id):
+    return f"chat:{visitor_id}"
+
+
+def mcp_session_key(server_url):
+    return f"mcp-session:{server_url}"
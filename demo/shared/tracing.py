@@ -0,0 +1,296 @@
+"""
+Per-stage latency tracing for the demo pages
+
+Spans follow the OpenTelemetry data model (trace id, span id, parent span,
+attributes, status) without needing the OpenTelemetry SDK. Tracing is a no-op
+unless TRACING_EXPORTER is set:
+
+  TRACING_EXPORTER=console   print a waterfall of every finished request
+  TRACING_EXPORTER=otlp      POST spans as OTLP/HTTP JSON to OTEL_EXPORTER_OTLP_ENDPOINT
+
+Usage:
+
+  with span("mood.request", page="3_Analyze_Mood"):
+    with span("llava.analyze", model="llava"):
+      ...
+"""
+import os
+import sys
+import json
+import time
+import queue
+import secrets
+import logging
+import functools
+import threading
+import contextvars
+import urllib.request
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "gen-ai-demo")
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A single timed stage of a request"""
+
+    def __init__(self, name, trace_id, parent, attributes):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent = parent
+        self.parent_id = parent.span_id if parent else None
+        # Every span of a trace is collected on the root so the whole
+        # waterfall can be exported once the request finishes
+        self.root = parent.root if parent else self
+        self.finished = [] if parent is None else None
+        self.attributes = dict(attributes)
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    @property
+    def depth(self):
+        depth = 0
+        parent = self.parent
+        while parent is not None:
+            depth += 1
+            parent = parent.parent
+        return depth
+
+    @property
+    def duration_ms(self):
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc):
+        self.set_error(f"{type(exc).__name__}: {exc}")
+
+    def set_error(self, message):
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+
+class _NoopSpan:
+    """Stand-in yielded when tracing is disabled"""
+
+    name = ""
+    attributes = {}
+    duration_ms = 0.0
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def set_error(self, message):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class NoopExporter:
+    """Drops every trace"""
+
+    enabled = False
+
+    def export(self, spans):
+        pass
+
+
+class ConsoleExporter:
+    """Print each finished request as an indented waterfall"""
+
+    enabled = True
+    bar_width = 40
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+
+    def export(self, spans):
+        root = spans[-1]
+        total_ms = max(root.duration_ms, 0.001)
+        lines = [f"🧵 trace {root.trace_id[:12]} {root.name} {root.duration_ms:.1f} ms"]
+        for s in sorted(spans, key=lambda s: (s.start_ns, s.depth)):
+            offset_ms = (s.start_ns - root.start_ns) / 1e6
+            lead = min(int(offset_ms / total_ms * self.bar_width), self.bar_width - 1)
+            width = max(1, min(int(s.duration_ms / total_ms * self.bar_width), self.bar_width - lead))
+            bar = " " * lead + "█" * width
+            mark = " ❌" if s.status == STATUS_ERROR else ""
+            label = "  " * s.depth + s.name
+            lines.append(f"  {label:<40} +{offset_ms:8.1f} ms {s.duration_ms:9.1f} ms |{bar:<{self.bar_width}}|{mark}")
+        print("\n".join(lines), file=self.stream, flush=True)
+
+
+class OTLPExporter:
+    """Send traces to an OTLP/HTTP collector from a background thread"""
+
+    enabled = True
+
+    def __init__(self, endpoint=OTEL_EXPORTER_OTLP_ENDPOINT, service_name=OTEL_SERVICE_NAME, timeout=5):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+        self._queue = queue.Queue(maxsize=1000)
+        self._worker = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._worker.start()
+
+    def export(self, spans):
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            logger.warning("⚠️ OTLP export queue full, dropping trace")
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                body = json.dumps(self.to_otlp(spans)).encode("utf-8")
+                request = urllib.request.Request(
+                    self.url, data=body, headers={"Content-Type": "application/json"}
+                )
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+            except Exception as e:
+                logger.warning(f"⚠️ OTLP export to {self.url} failed: {e}")
+
+    def to_otlp(self, spans):
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "gen-ai-demo.tracing"},
+                    "spans": [_otlp_span(s) for s in spans],
+                }],
+            }]
+        }
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def _otlp_span(s):
+    otlp = {
+        "traceId": s.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": 1,
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns),
+        "attributes": [_otlp_attribute(k, v) for k, v in s.attributes.items()],
+        "status": {"code": s.status, "message": s.status_message},
+    }
+    if s.parent_id:
+        otlp["parentSpanId"] = s.parent_id
+    return otlp
+
+
+class Tracer:
+    """Creates spans and hands finished traces to the exporter"""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter or NoopExporter()
+        self.processors = []
+
+    @property
+    def enabled(self):
+        return self.exporter.enabled or bool(self.processors)
+
+    def add_processor(self, processor):
+        """Call processor(span) whenever a span ends, even if exporting is off"""
+        self.processors.append(processor)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        current = Span(name, trace_id, parent, attributes)
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self._finish(current)
+
+    def _finish(self, current):
+        current.end_ns = time.time_ns()
+        if current.status == STATUS_UNSET:
+            current.status = STATUS_OK
+        current.root.finished.append(current)
+        for processor in self.processors:
+            try:
+                processor(current)
+            except Exception as e:
+                logger.warning(f"⚠️ Span processor failed: {e}")
+        if current.parent is None and self.exporter.enabled:
+            try:
+                self.exporter.export(current.finished)
+            except Exception as e:
+                logger.warning(f"⚠️ Trace export failed: {e}")
+
+
+def current_span():
+    """Return the innermost active span, or a no-op span outside a trace"""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def traced(name, error_if=None, **attributes):
+    """Decorator running the whole function inside a span
+
+    error_if(result) marks the span as failed for functions that report
+    errors through their return value instead of raising.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, **attributes) as current:
+                result = func(*args, **kwargs)
+                if error_if is not None and error_if(result):
+                    current.set_error(f"{func.__name__} returned {str(result)[:100]!r}")
+                return result
+        return wrapper
+    return decorator
+
+
+def _build_exporter(name):
+    if name == "console":
+        return ConsoleExporter()
+    if name == "otlp":
+        return OTLPExporter()
+    if name not in ("", "none", "noop"):
+        logger.warning(f"⚠️ Unknown TRACING_EXPORTER '{name}', tracing disabled")
+    return NoopExporter()
+
+
+tracer = Tracer(_build_exporter(TRACING_EXPORTER))
+span = tracer.span
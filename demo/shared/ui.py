@@ -0,0 +1,214 @@
+"""
+Streamlit helpers shared by the demo pages
+"""
+import os
+import glob
+import time
+import uuid
+from contextlib import contextmanager
+
+import streamlit as st
+import streamlit.components.v1 as components
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from shared.ollama_scheduler import OllamaBusy, request_context, PRIORITY_INTERACTIVE
+from shared.state_store import state_store, chat_history_key
+from shared.tracing import current_span
+from shared.speech import text_to_speech, synthesize_stream
+from shared.audio_store import AudioQueue, AUDIO_URL_PREFIX, audio_store, audio_src, static_serving
+
+SHOW_DEBUG_PANEL = os.getenv("SHOW_DEBUG_PANEL", "false").lower() in ("1", "true", "yes")
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".ogg")
+
+
+def debug_panel_enabled():
+    """Debug panel is on via SHOW_DEBUG_PANEL or by adding ?debug=1 to the URL"""
+    return SHOW_DEBUG_PANEL or st.query_params.get("debug") == "1"
+
+
+def render_debug_panel(results):
+    """Show Ollama's load / prompt-eval / generation split for this run"""
+    results = [r for r in results if r is not None]
+    if not results or not debug_panel_enabled():
+        return
+    with st.sidebar.expander("🐞 Ollama timings", expanded=True):
+        st.dataframe([r.to_row() for r in results], hide_index=True)
+        slowest = max(results, key=lambda r: r.wall_seconds or 0)
+        phases = {
+            "model load": slowest.load_seconds or 0,
+            "prompt eval": slowest.prompt_eval_seconds or 0,
+            "generation": slowest.eval_seconds or 0,
+        }
+        dominant = max(phases, key=phases.get)
+        st.caption(f"Slowest call: {slowest.task} ({slowest.wall_seconds:.2f}s), mostly {dominant}")
+
+
+def session_id():
+    """Streamlit's id for the current browser session"""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else "anonymous"
+
+
+def visitor_id():
+    """Stable id for this visitor, kept in the ?sid= query param
+
+    Unlike session_id() it survives a reconnect, including one that the
+    gateway sends to a different replica.
+    """
+    sid = st.query_params.get("sid")
+    if not sid:
+        sid = uuid.uuid4().hex
+        st.query_params["sid"] = sid
+    return sid
+
+
+def load_chat_history(default):
+    """Conversation for this visitor from st.session_state, else the state store"""
+    if "messages" not in st.session_state:
+        st.session_state["messages"] = state_store.get_json(chat_history_key(visitor_id()), default)
+    return st.session_state.messages
+
+
+def save_chat_history():
+    """Write this visitor's conversation through to the state store"""
+    state_store.set_json(chat_history_key(visitor_id()), st.session_state.messages)
+
+
+@contextmanager
+def ollama_queue(priority=PRIORITY_INTERACTIVE):
+    """Queue this session's Ollama calls fairly and show its place in line
+
+    When no slot frees up in time the page shows a warning and stops
+    instead of adding to the pile-up.
+    """
+    placeholder = st.empty()
+
+    def show_position(model, position):
+        placeholder.info(f"⏳ {model} is busy with other visitors - you are #{position} in line")
+
+    try:
+        with request_context(session_id(), priority, on_position=show_position):
+            yield
+    except OllamaBusy as e:
+        placeholder.warning(f"🚧 {e.model} is too busy right now, please try again in a moment.")
+        st.stop()
+    placeholder.empty()
+
+
+@st.cache_resource(show_spinner=False)
+def _first_audio_file(directory, directory_mtime):
+    for ext in AUDIO_EXTENSIONS:
+        found = sorted(glob.glob(os.path.join(directory, f"*{ext}")))
+        if found:
+            return found[0]
+    return None
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _audio_file_src(path, file_mtime, static):
+    with open(path, "rb") as f:
+        data = f.read()
+    return audio_src(data, os.path.splitext(path)[1].lstrip(".").lower())
+
+
+def find_audio_file(directory):
+    """First audio file in a directory (by extension: mp3, wav, m4a, ogg), or None
+
+    Cached per process until a file is added to or removed from the directory.
+    """
+    return _first_audio_file(directory, os.stat(directory).st_mtime_ns)
+
+
+def audio_file_src(path):
+    """URL (or data: URI) to play an audio file from
+
+    The file is read, hashed or base64-encoded once until it changes, not
+    on every rerun.
+    """
+    key = (path, os.stat(path).st_mtime_ns, bool(static_serving()))
+    src = _audio_file_src(*key)
+    if src.startswith(AUDIO_URL_PREFIX):
+        try:
+            # Keep the stored clip away from eviction, as storing it again would
+            os.utime(os.path.join(audio_store.directory, os.path.basename(src)))
+        except FileNotFoundError:
+            # Evicted since it was cached: store it again
+            _audio_file_src.clear()
+            src = _audio_file_src(*key)
+    return src
+
+
+# Plays the clips listed in an AudioQueue file in order, polling it for new
+# ones until the page marks it done
+_QUEUE_PLAYER = """
+<audio id="player" controls style="width: 100%; {display}"></audio>
+<script>
+  const manifest = new URL("{url}", document.baseURI);
+  const audio = document.getElementById("player");
+  let clips = [], next = 0, done = false, polls = 0;
+  function playNext() {{
+    audio.src = new URL(clips[next++], manifest).href;
+    audio.play().catch(() => {{}});
+  }}
+  audio.addEventListener("ended", () => {{ if (next < clips.length) playNext(); }});
+  audio.addEventListener("error", () => {{ if (next < clips.length) playNext(); }});
+  async function poll() {{
+    try {{
+      const response = await fetch(manifest.href + "?n=" + polls, {{cache: "no-store"}});
+      if (response.ok) ({{clips, done}} = await response.json());
+    }} catch (e) {{}}
+    if (next < clips.length && (!audio.src || audio.ended)) playNext();
+    if (!done && ++polls < 1200) setTimeout(poll, 250);
+  }}
+  poll();
+</script>
+"""
+
+
+def audio_player(hidden=False):
+    """Embed an empty playback queue now and return it, or None without static serving
+
+    Opening the player before the text to speak exists lets the browser
+    load it while the answer is still being generated; pass it to speak().
+    """
+    if not static_serving():
+        return None
+    queue = AudioQueue()
+    player = _QUEUE_PLAYER.format(url=queue.url, display="display: none;" if hidden else "")
+    # st.iframe replaces components.html in newer Streamlit releases
+    embed = getattr(st, "iframe", None) or components.html
+    embed(player, height=1 if hidden else 60)
+    return queue
+
+
+def speak(text, hidden=False, player=None):
+    """Read text aloud in the browser, starting once the first sentence is synthesized
+
+    With static audio serving the sentences are synthesized in the
+    background and queued for playback as they finish (into `player` when
+    one was opened with audio_player()); otherwise the whole text becomes
+    one embedded clip. Returns the seconds until the first clip was ready,
+    or None when there was nothing to say.
+    """
+    started = time.perf_counter()
+    queue = player or audio_player(hidden)
+    if queue is None:
+        audio_bytes = text_to_speech(text)
+        if not audio_bytes:
+            return None
+        style = "display: none;" if hidden else "width: 100%;"
+        st.markdown(f'<audio {"" if hidden else "controls"} autoplay style="{style}">'
+                    f'<source src="{audio_src(audio_bytes)}" type="audio/mpeg"></audio>', unsafe_allow_html=True)
+        return time.perf_counter() - started
+
+    first_clip = None
+    try:
+        for audio_bytes in synthesize_stream(text):
+            queue.add(audio_bytes)
+            if first_clip is None:
+                first_clip = time.perf_counter() - started
+                current_span().set_attribute("first_clip_ms", round(first_clip * 1000))
+    finally:
+        queue.close()
+    return first_clip
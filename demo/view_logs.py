@@ -1,75 +1,240 @@
 #!/usr/bin/env python3
 """
-Log viewer for the Voice with Llama app with Google Slides integration
-Run this in a separate terminal to see real-time logs
+Live log tailer for the demo app
+
+Follows the app's logs from a file (LOG_FILE, surviving rotation) or from a
+pipe on stdin, shows the lines that match the filters and prints a rolling
+per-stage summary (calls, error rate, p50/p95 latency) built from the
+span.end records that LOG_FORMAT=json writes. Plain text lines are shown
+too; they just carry no stage.
+
+  cd demo
+  python view_logs.py logs/app.log --stage 'llava.*' --level WARNING
+  kubectl logs -f deploy/demo | python view_logs.py - --page 4_Analyze_Engagement
+  python view_logs.py logs/app.log --summary-only --window 300
 """
-import subprocess
-import sys
 import os
+import sys
+import json
+import time
+import select
+import fnmatch
+import argparse
+from collections import deque
 
-def main():
-    print("🔍 Real-time Log Viewer for Voice with Llama")
-    print("=" * 50)
-    print("This will show logs from the Streamlit app in real-time.")
-    print("Make sure to run the Streamlit app in another terminal first.")
-    print("=" * 50)
-    print()
-    
-    # Instructions for viewing logs
-    print("📋 To view logs, you have several options:")
-    print()
-    print("1️⃣  Terminal Output (when running streamlit):")
-    print("   The logs will appear in the terminal where you run:")
-    print("   streamlit run pages/2_Voice_With_Llama.py")
-    print()
-    print("2️⃣  Check Streamlit logs directory:")
-    streamlit_logs = os.path.expanduser("~/.streamlit/logs/")
-    if os.path.exists(streamlit_logs):
-        print(f"   Streamlit logs: {streamlit_logs}")
+from shared.stats import percentile, format_table
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+READ_SIZE = 64 * 1024
+
+
+def parse_line(line):
+    """A JSON log line as a dict, or a text line as {"level", "msg"}"""
+    if line.startswith("{"):
         try:
-            log_files = [f for f in os.listdir(streamlit_logs) if f.endswith('.log')]
-            if log_files:
-                latest_log = max(log_files, key=lambda x: os.path.getctime(os.path.join(streamlit_logs, x)))
-                print(f"   Latest log file: {latest_log}")
-                print(f"   View with: tail -f {os.path.join(streamlit_logs, latest_log)}")
+            return json.loads(line)
+        except ValueError:
+            pass
+    # "2026-01-01 10:00:00,123 - INFO - message"
+    parts = line.split(" - ", 2)
+    if len(parts) == 3 and parts[1] in LEVELS:
+        return {"ts": parts[0], "level": parts[1], "msg": parts[2]}
+    return {"msg": line}
+
+
+class LineReader:
+    """Incremental reads that hand back complete lines only"""
+
+    def __init__(self):
+        self.partial = b""
+
+    def feed(self, data):
+        data = self.partial + data
+        lines = data.split(b"\n")
+        self.partial = lines.pop()
+        return [line.decode("utf-8", "replace") for line in lines if line.strip()]
+
+
+class FileFollower:
+    """tail -F: reads what was appended since the last poll and reopens on rotation"""
+
+    def __init__(self, path, from_start=False):
+        self.path = path
+        self.reader = LineReader()
+        self.file = None
+        self.inode = None
+        self._open(seek_end=not from_start)
+
+    def _open(self, seek_end):
+        try:
+            self.file = open(self.path, "rb")
+        except FileNotFoundError:
+            self.file = None
+            return
+        stat = os.fstat(self.file.fileno())
+        self.inode = stat.st_ino
+        if seek_end:
+            self.file.seek(0, os.SEEK_END)
+
+    def _drain(self):
+        lines = []
+        while True:
+            data = self.file.read(READ_SIZE)
+            if not data:
+                return lines
+            lines.extend(self.reader.feed(data))
+
+    def poll(self):
+        if self.file is None:
+            self._open(seek_end=False)
+            return self._drain() if self.file else []
+        lines = self._drain()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Rotated away and the new file is not there yet
+            return lines
+        if stat.st_ino != self.inode or stat.st_size < self.file.tell():
+            # Rotated or truncated: finish the old file, then start the new one from the top
+            self.file.close()
+            self.reader = LineReader()
+            self._open(seek_end=False)
+            lines.extend(self._drain())
+        return lines
+
+
+class PipeFollower:
+    """Non-blocking reads from stdin so summaries keep printing while it is quiet"""
+
+    def __init__(self, stream=sys.stdin):
+        self.fd = stream.fileno()
+        self.reader = LineReader()
+        self.closed = False
+
+    def poll(self, timeout=0):
+        lines = []
+        while not self.closed and select.select([self.fd], [], [], timeout)[0]:
+            data = os.read(self.fd, READ_SIZE)
+            if not data:
+                self.closed = True
+                break
+            lines.extend(self.reader.feed(data))
+            timeout = 0
+        return lines
+
+
+class StageStats:
+    """Span durations and errors per stage over a sliding time window"""
+
+    def __init__(self, window):
+        self.window = window
+        self.spans = {}
+        self.errors = {}
+
+    def add(self, entry, now):
+        stage = entry.get("stage")
+        if not stage:
+            return
+        if entry.get("event") == "span.end":
+            self.spans.setdefault(stage, deque()).append((now, entry.get("duration_ms") or 0, bool(entry.get("error"))))
+        elif LEVELS.get(entry.get("level"), 0) >= LEVELS["ERROR"]:
+            self.errors.setdefault(stage, deque()).append(now)
+
+    def rows(self, now):
+        cutoff = now - self.window
+        for samples in self.spans.values():
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+        for samples in self.errors.values():
+            while samples and samples[0] < cutoff:
+                samples.popleft()
+
+        rows = []
+        for stage in sorted(set(self.spans) | set(self.errors)):
+            samples = self.spans.get(stage, ())
+            durations = [duration for _, duration, _ in samples]
+            failed = sum(error for _, _, error in samples)
+            if not samples and not self.errors.get(stage):
+                continue
+            rows.append({
+                "stage": stage,
+                "calls": len(samples),
+                "error_rate": f"{100 * failed / len(samples):.0f}%" if samples else "-",
+                "error_logs": len(self.errors.get(stage, ())),
+                "p50_ms": percentile(durations, 50),
+                "p95_ms": percentile(durations, 95),
+                "max_ms": max(durations) if durations else None,
+            })
+        rows.sort(key=lambda row: row["p95_ms"] or 0, reverse=True)
+        return rows
+
+
+def matches(entry, args):
+    if LEVELS.get(entry.get("level"), LEVELS["INFO"]) < LEVELS[args.level]:
+        return False
+    if args.page and entry.get("page") != args.page:
+        return False
+    if args.stage and not fnmatch.fnmatch(entry.get("stage") or "", args.stage):
+        return False
+    return True
+
+
+def format_entry(entry):
+    stage = f" [{entry['stage']}]" if entry.get("stage") else ""
+    return f"{entry.get('ts', '')} {entry.get('level', ''):<7}{stage} {entry.get('msg', '')}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tail the demo's logs with filters and per-stage stats")
+    parser.add_argument("source", help="log file to follow (e.g. the app's LOG_FILE), or - for stdin")
+    parser.add_argument("--page", help="only lines from this page, e.g. 4_Analyze_Engagement")
+    parser.add_argument("--stage", help="only lines from stages matching this glob, e.g. 'llava.*'")
+    parser.add_argument("--level", default="INFO", choices=list(LEVELS), help="minimum level to show")
+    parser.add_argument("--window", type=float, default=60, help="seconds of history in the summary")
+    parser.add_argument("--interval", type=float, default=10, help="seconds between summaries (0 = never)")
+    parser.add_argument("--from-start", action="store_true", help="read the file from the beginning")
+    parser.add_argument("--summary-only", action="store_true", help="print summaries but not log lines")
+    parser.add_argument("--show-spans", action="store_true", help="also print span.end records")
+    args = parser.parse_args()
+
+    follower = PipeFollower() if args.source == "-" else FileFollower(args.source, args.from_start)
+    stats = StageStats(args.window)
+    next_summary = time.monotonic() + args.interval
+    poll_seconds = 0.25
+
+    try:
+        while True:
+            if isinstance(follower, PipeFollower):
+                lines = follower.poll(poll_seconds)
             else:
-                print("   No log files found in Streamlit logs directory")
-        except Exception as e:
-            print(f"   Error checking log files: {e}")
-    else:
-        print("   Streamlit logs directory not found")
-    print()
-    print("3️⃣  Python logging output:")
-    print("   The app logs will appear in the terminal output with timestamps")
-    print("   Look for messages with emojis like 🔍, 📊, 🌐, 🤖, etc.")
-    print()
-    print("4️⃣  Debug browser console:")
-    print("   Open browser dev tools (F12) and check the console for any errors")
-    print()
-    
-    # Sample test messages
-    print("🧪 Sample test messages to try:")
-    print("   - 'Create slides for Tokyo'")
-    print("   - 'Make a presentation about Paris'") 
-    print("   - 'Generate slides for New York'")
-    print("   - 'Slides for London'")
-    print()
-    
-    print("🔍 What to look for in the logs:")
-    print("   🔍 Intent detection messages")
-    print("   🌐 MCP server communication")
-    print("   📊 Presentation creation steps") 
-    print("   🤖 Content generation with Llama")
-    print("   ✅ Success messages")
-    print("   ❌ Error messages with details")
-    print()
-    
-    print("💡 Troubleshooting tips:")
-    print("   - If no logs appear, check if logging is enabled")
-    print("   - Look for HTTP errors in MCP communication")
-    print("   - Check if presentation IDs are being extracted")
-    print("   - Verify Ollama is responding for content generation")
-    print()
+                lines = follower.poll()
+                if not lines:
+                    time.sleep(poll_seconds)
+            now = time.monotonic()
+
+            for line in lines:
+                entry = parse_line(line)
+                if not args.page or entry.get("page") == args.page:
+                    stats.add(entry, now)
+                if args.summary_only or not matches(entry, args):
+                    continue
+                if entry.get("event") == "span.end" and not args.show_spans:
+                    continue
+                print(format_entry(entry), flush=True)
+
+            done = isinstance(follower, PipeFollower) and follower.closed
+            if args.interval and (now >= next_summary or done):
+                rows = [row for row in stats.rows(now) if not args.stage or fnmatch.fnmatch(row["stage"], args.stage)]
+                if rows:
+                    print(f"\n📊 Last {args.window:.0f}s by stage (slowest p95 first)")
+                    print(format_table(rows, ["stage", "calls", "error_rate", "error_logs", "p50_ms", "p95_ms", "max_ms"]))
+                    print(flush=True)
+                next_summary = now + args.interval
+            if done:
+                return
+    except KeyboardInterrupt:
+        pass
+
 
 if __name__ == "__main__":
     main()